@@ -0,0 +1,281 @@
+"""
+Async versions of some of the views of api.views, served instead of them
+when ASYNC_VIEWS is set, which `feminnovate_backend/asgi.py` does. They
+answer with the same data and status codes as their sync counterparts, and
+hand the requests they do not implement (e.g. creations) over to them.
+Lists are not streamed over ASGI (see StreamingListMixin).
+"""
+from functools import cached_property
+
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse
+from django.utils.cache import cc_delim_re, patch_vary_headers
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import status
+from rest_framework.exceptions import APIException, AuthenticationFailed, NotAuthenticated
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+from api import views
+from api.authentication import CachedJWTAuthentication
+from api.logic import password_hashing
+from api.logic.user_management import find_login_user, login_details
+from api.models import Company, Job, Workshop
+from api.serializers import (
+    CompanySerializer,
+    JobSerializer,
+    JwtSerializer,
+    UserRegistrationSerializer,
+    WorkshopSerializer
+)
+from api.utils.cache import cache_response, nested_tags
+from api.utils.conditional import conditional_response, object_validators
+from api.utils.fast_serializers import alist_data
+from api.utils.metrics import timed
+from api.utils.prefetch import apply_prefetch_plan
+from api.utils.replicas import ReplicaReadMixin, read_from_replicas
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class AsyncAPIView(View):
+    """
+    Base async view, parsing the request bodies as DRF does, authenticating
+    the requests when `authentication_required` is set, and rendering the
+    DRF responses and exceptions the way DRF does, without leaving the event
+    loop. The methods it does not implement are served by `sync_view`, and
+    its reads go to the replicas if those of `sync_view` do.
+    """
+    sync_view = None
+    authentication_required = False
+    authentication_classes = [CachedJWTAuthentication]
+
+    async def dispatch(self, request, *args, **kwargs):
+        parsers = [parser() for parser in api_settings.DEFAULT_PARSER_CLASSES]
+        request = self.request = Request(request, parsers=parsers, authenticators=())
+        try:
+            if self.authentication_required:
+                await self.authenticate(request)
+            if issubclass(self.sync_view, ReplicaReadMixin):
+                read_from_replicas(request)
+            response = await super().dispatch(request, *args, **kwargs)
+        except APIException as exc:
+            data = exc.detail if isinstance(exc.detail, (list, dict)) else {'detail': exc.detail}
+            response = Response(data, status=exc.status_code)
+            if isinstance(exc, (AuthenticationFailed, NotAuthenticated)):
+                response['WWW-Authenticate'] = 'Bearer realm="api"'
+        return self.finalize_response(request, response)
+
+    async def authenticate(self, request):
+        for authentication_class in self.authentication_classes:
+            result = await authentication_class().aauthenticate(request._request)
+            if result is not None:
+                request.user, request.auth = result
+                return
+        raise NotAuthenticated()
+
+    async def http_method_not_allowed(self, request, *args, **kwargs):
+        return await self.delegate(request, *args, **kwargs)
+
+    async def options(self, request, *args, **kwargs):
+        return await self.delegate(request, *args, **kwargs)
+
+    async def delegate(self, request, *args, **kwargs):
+        """
+        Serves the request with the sync view, from a thread.
+        """
+        def serve():
+            response = self.sync_view.as_view()(request._request, *args, **kwargs)
+            if isinstance(response, Response):
+                with timed('render'):
+                    response.render()
+            return response
+        return await sync_to_async(serve)()
+
+    def finalize_response(self, request, response):
+        """
+        Renders the response as JSON into a plain HttpResponse, which Django
+        does not render from a thread, and sets the headers DRF would set.
+        """
+        if isinstance(response, Response) and not response.is_rendered:
+            response.accepted_renderer = JSONRenderer()
+            response.accepted_media_type = response.accepted_renderer.media_type
+            response.renderer_context = {'view': self, 'request': request}
+            with timed('render'):
+                content = response.rendered_content
+            rendered = HttpResponse(content, status=response.status_code)
+            for name, value in response.items():
+                rendered[name] = value
+            response = rendered
+
+        view = self.sync_view()
+        view.setup(request._request, *self.args, **self.kwargs)
+        headers = view.default_response_headers
+        vary = headers.pop('Vary', None)
+        for name, value in headers.items():
+            response[name] = value
+        if vary is not None:
+            patch_vary_headers(response, cc_delim_re.split(vary))
+        return response
+
+
+class AsyncListView(AsyncAPIView):
+    """
+    Base async view for the lists of a generic view (`sync_view`), reusing
+    its queryset, filters, serializer and pagination. The page, or the whole
+    list, is read with the async ORM.
+    """
+    authentication_required = True
+
+    @cached_property
+    def view(self):
+        return self.sync_view(request=self.request, args=self.args, kwargs=self.kwargs, format_kwarg=None)
+
+    def get_queryset(self):
+        return self.view.get_queryset()
+
+    def filter_queryset(self, queryset):
+        return self.view.filter_queryset(queryset)
+
+    async def get(self, request, *args, **kwargs):
+        return await self.list(request, *args, **kwargs)
+
+    async def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        paginator = self.view.paginator
+        if paginator is not None:
+            page = await paginator.apaginate_queryset(queryset, request, view=self.view)
+            if page is not None:
+                serializer = self.view.get_serializer(page, many=True)
+                return paginator.get_paginated_response(serializer.data)
+        return Response(await alist_data(self.view.get_serializer(queryset, many=True), queryset))
+
+
+class AsyncJwtView(AsyncAPIView):
+    """
+    This view is for the user login endpoint.
+    The password is checked in the password hashing pool, so that the
+    worker keeps serving other requests meanwhile.
+    """
+    sync_view = views.JwtView
+
+    async def post(self, request):
+        # Only the fields are validated here, `JwtSerializer.validate` would
+        # check the password inline
+        attrs = JwtSerializer().to_internal_value(request.data)
+        user = await sync_to_async(find_login_user)(attrs['username'])
+        if not await password_hashing.check_password(user, attrs['password']):
+            raise AuthenticationFailed(detail="Wrong Password")
+        return Response(login_details(user))
+
+
+class AsyncRegisterUserView(AsyncAPIView):
+    """
+    This view is for registering a new user.
+    The password is hashed in the password hashing pool, so that the worker
+    keeps serving other requests meanwhile.
+    """
+    sync_view = views.RegisterUserView
+
+    async def post(self, request):
+        serializer = UserRegistrationSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        password = await password_hashing.make_password(serializer.validated_data['password'])
+        await sync_to_async(serializer.save)(password=password, hashed=True)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+
+class AsyncCompanyRetrieveView(AsyncAPIView):
+    """
+    This view is for retrieving a company based on the provided company ID
+    as the query parameter.
+    """
+    sync_view = views.CompanyRetrieveView
+    authentication_required = True
+
+    @conditional_response(object_validators(Company, 'updated_at'))
+    @cache_response('company-detail', tags=['company:{id}'])
+    async def get(self, request, id):
+        try:
+            company = await Company.objects.aget(pk=id)
+        except Company.DoesNotExist:
+            return Response({"message": "Company with the specified id does not exist"}, status=status.HTTP_404_NOT_FOUND)
+        serializer = CompanySerializer(company)
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+
+class AsyncJobListView(AsyncListView):
+    """
+    This view is for retrieving a list of jobs, see JobListView.
+    """
+    sync_view = views.JobListView
+
+    @conditional_response()
+    @cache_response('job-list', tags=['job'], data_tags=nested_tags('company'))
+    async def list(self, request, *args, **kwargs):
+        return await super().list(request, *args, **kwargs)
+
+
+class AsyncJobDetailView(AsyncAPIView):
+    """
+    This view is for retrieving a job based on the provided job ID.
+    """
+    sync_view = views.JobDetailView
+    authentication_required = True
+
+    @conditional_response(object_validators(Job, 'updated_at', 'company__updated_at'))
+    @cache_response('job-detail', tags=['job:{id}'], data_tags=nested_tags('company'))
+    async def get(self, request, id):
+        try:
+            job = await apply_prefetch_plan(Job.objects, JobSerializer).aget(pk=id)
+        except Job.DoesNotExist:
+            return Response({"message": "Job with the specified id does not exist"}, status=status.HTTP_404_NOT_FOUND)
+        serializer = JobSerializer(job)
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+
+class AsyncWorkshopRetrieveView(AsyncAPIView):
+    """
+    This view is for retrieving a workshop based on the provided workshop ID
+    as the query parameter.
+    """
+    sync_view = views.WorkshopRetrieveView
+    authentication_required = True
+
+    @conditional_response(object_validators(Workshop, 'updated_at', 'organizer__updated_at', counters=['saves']))
+    @cache_response('workshop-detail', tags=['workshop:{id}'], data_tags=nested_tags('organizer', 'company'))
+    async def get(self, request, id):
+        try:
+            workshop = await apply_prefetch_plan(Workshop.objects, WorkshopSerializer).aget(pk=id)
+        except Workshop.DoesNotExist:
+            return Response({"message:": "Workshop with the specified id does not exist"}, status=status.HTTP_404_NOT_FOUND)
+        serializer = WorkshopSerializer(workshop)
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+
+class AsyncRetrieveSavedJobsView(AsyncListView):
+    """
+    This view is for retrieving the saved jobs of a user, see
+    RetrieveSavedJobsView.
+    """
+    sync_view = views.RetrieveSavedJobsView
+
+
+class AsyncRetrieveSavedExperiencesView(AsyncListView):
+    """
+    This view is for retrieving the saved work experiences of a user, see
+    RetrieveSavedExperiencesView.
+    """
+    sync_view = views.RetrieveSavedExperiencesView
+
+
+class AsyncRetrieveSavedWorkshopsView(AsyncListView):
+    """
+    This view is for retrieving the saved workshops of a user, see
+    RetrievedSavedWorkshopsView.
+    """
+    sync_view = views.RetrievedSavedWorkshopsView
@@ -0,0 +1,106 @@
+import threading
+import time
+from collections import OrderedDict
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings
+
+
+class UserCache:
+    """
+    In-process LRU cache of the database rows of the authenticated users,
+    whose entries expire after AUTH_USER_CACHE_TTL seconds.
+
+    Entries are evicted when a user is saved or deleted in this process (see
+    api.signals), and expire after the TTL in the other processes, which
+    bounds how long they can serve a stale user.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires < time.monotonic():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self.lock:
+            self.entries[key] = (time.monotonic() + settings.AUTH_USER_CACHE_TTL, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > settings.AUTH_USER_CACHE_SIZE:
+                self.entries.popitem(last=False)
+
+    def invalidate(self, key):
+        with self.lock:
+            self.entries.pop(str(key), None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+user_cache = UserCache()
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWT authentication loading the user from the in-process user cache, so
+    that authenticated requests do not query the user table every time.
+
+    The cache holds the field values of the users rather than the users
+    themselves: each request gets a fresh instance, so that nothing cached
+    on it (e.g. its profile) leaks into other requests.
+    """
+
+    def get_user(self, validated_token):
+        if api_settings.USER_ID_CLAIM not in validated_token:
+            return super().get_user(validated_token)
+
+        key = str(validated_token[api_settings.USER_ID_CLAIM])
+        user = self.get_cached_user(key)
+        if user is not None:
+            return user
+
+        # Raises if the user does not exist or is inactive
+        user = super().get_user(validated_token)
+        field_names = [field.attname for field in user._meta.concrete_fields]
+        user_cache.set(key, (user._state.db, field_names, [getattr(user, name) for name in field_names]))
+        return user
+
+    def get_cached_user(self, key):
+        cached = user_cache.get(key)
+        if cached is None:
+            return None
+        db, field_names, values = cached
+        return self.user_model.from_db(db, field_names, values)
+
+    async def aauthenticate(self, request):
+        """
+        Async counterpart of `authenticate`, used by the async views. Only a
+        user missing from the cache is loaded from a thread.
+        """
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+        validated_token = self.get_validated_token(raw_token)
+
+        user = None
+        if api_settings.USER_ID_CLAIM in validated_token:
+            user = self.get_cached_user(str(validated_token[api_settings.USER_ID_CLAIM]))
+        if user is None:
+            user = await sync_to_async(self.get_user)(validated_token)
+        return user, validated_token
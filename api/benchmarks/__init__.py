@@ -0,0 +1,3 @@
+"""
+Performance benchmarks of the API, run with `python manage.py benchmark`.
+"""
@@ -0,0 +1,26 @@
+from contextlib import contextmanager
+
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+
+@contextmanager
+def benchmark_database(keepdb=False):
+    """
+    Switches the default connection to a benchmark database named after the
+    configured one, created for the block, and destroyed afterwards unless
+    `keepdb` is set. Queries are not logged, as in production.
+    """
+    setup_test_environment(debug=False)
+    settings_dict = connection.settings_dict
+    if connection.vendor == 'sqlite':
+        settings_dict['TEST']['NAME'] = '{}.benchmark'.format(settings_dict['NAME'])
+    else:
+        settings_dict['TEST']['NAME'] = 'benchmark_{}'.format(settings_dict['NAME'])
+    old_name = settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False, keepdb=keepdb)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=keepdb)
+        teardown_test_environment()
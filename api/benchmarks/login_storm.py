@@ -0,0 +1,155 @@
+"""
+Measures the latency of read requests while other clients keep logging in,
+served by a single sync WSGI worker, and by the ASGI application with the
+async views.
+"""
+import asyncio
+import http.client
+import importlib
+import json
+import threading
+import time
+from contextlib import contextmanager
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer, make_server
+
+from asgiref.sync import ThreadSensitiveContext, sync_to_async
+from django.core.wsgi import get_wsgi_application
+from django.db import connections
+from django.test import AsyncClient
+from django.test.utils import override_settings
+from django.urls import clear_url_caches
+
+from api.benchmarks.runner import percentile
+
+LOGIN_PATH = '/api/auth/login/'
+
+
+@contextmanager
+def async_views(enabled):
+    """
+    Serves the async views or the sync views within the block, by reloading
+    the URLconfs with ASYNC_VIEWS overridden.
+    """
+    import api.urls
+    import feminnovate_backend.urls
+
+    def reload():
+        clear_url_caches()
+        importlib.reload(api.urls)
+        importlib.reload(feminnovate_backend.urls)
+
+    try:
+        with override_settings(ASYNC_VIEWS=enabled):
+            reload()
+            yield
+    finally:
+        reload()
+
+
+def summarize(latencies, logins, elapsed):
+    return {
+        'reads': len(latencies),
+        'read_p50_ms': percentile(latencies, 50) * 1000,
+        'read_p95_ms': percentile(latencies, 95) * 1000,
+        'logins_per_s': logins / elapsed,
+    }
+
+
+class QuietRequestHandler(WSGIRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+class SyncWorker(WSGIServer):
+    """
+    WSGI server handling one request at a time, like a gunicorn sync worker.
+    """
+    request_queue_size = 128
+
+
+def run_wsgi(read_paths, credentials, access, clients, reads):
+    """
+    Runs the reads on a single sync worker, while `clients` threads keep
+    logging in (none to measure the idle latency).
+    """
+    server = make_server('127.0.0.1', 0, get_wsgi_application(),
+                         server_class=SyncWorker, handler_class=QuietRequestHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    port = server.server_address[1]
+
+    def request(method, path, body=None, headers=None):
+        connection = http.client.HTTPConnection('127.0.0.1', port)
+        connection.request(method, path, body=body, headers=headers or {})
+        response = connection.getresponse()
+        response.read()
+        connection.close()
+        return response.status
+
+    stop = threading.Event()
+    logins = [0]
+
+    def login():
+        while not stop.is_set():
+            request('POST', LOGIN_PATH, json.dumps(credentials), {'Content-Type': 'application/json'})
+            logins[0] += 1
+
+    threads = [threading.Thread(target=login) for _ in range(clients)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    latencies = []
+    try:
+        for i in range(reads):
+            request_started = time.perf_counter()
+            request('GET', read_paths[i % len(read_paths)], headers={'Authorization': 'Bearer ' + access})
+            latencies.append(time.perf_counter() - request_started)
+    finally:
+        stop.set()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+        server.shutdown()
+        server.server_close()
+    return summarize(latencies, logins[0], elapsed)
+
+
+def run_asgi(read_paths, credentials, access, clients, reads):
+    """
+    Runs the reads on the ASGI application, with the async views, while
+    `clients` coroutines keep logging in.
+    """
+    async def storm():
+        client = AsyncClient()
+        stop = asyncio.Event()
+        logins = [0]
+
+        async def request(method, *args, **kwargs):
+            # As in ASGIHandler, so that the sync parts of each request run
+            # in their own thread, rather than in a thread shared by all
+            async with ThreadSensitiveContext():
+                response = await getattr(client, method)(*args, **kwargs)
+                # As at the end of every request, which the test client does
+                # not do. The request's thread is not reused, nor is its
+                # connection, as with the default settings under ASGI.
+                await sync_to_async(connections.close_all)()
+                return response
+
+        async def login():
+            while not stop.is_set():
+                await request('post', LOGIN_PATH, credentials, content_type='application/json')
+                logins[0] += 1
+
+        tasks = [asyncio.create_task(login()) for _ in range(clients)]
+        started = time.perf_counter()
+        latencies = []
+        try:
+            for i in range(reads):
+                request_started = time.perf_counter()
+                await request('get', read_paths[i % len(read_paths)], authorization='Bearer ' + access)
+                latencies.append(time.perf_counter() - request_started)
+        finally:
+            stop.set()
+            await asyncio.gather(*tasks)
+        return summarize(latencies, logins[0], time.perf_counter() - started)
+
+    return asyncio.run(storm())
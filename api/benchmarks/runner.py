@@ -0,0 +1,127 @@
+import json
+import time
+import tracemalloc
+
+from django.db import connection, transaction
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from api.utils.cache import get_cache
+
+
+def percentile(values, percent):
+    """
+    Returns the nearest-rank percentile of the values.
+    """
+    values = sorted(values)
+    index = max(int(round(percent / 100 * len(values) + 0.5)) - 1, 0)
+    return values[min(index, len(values) - 1)]
+
+
+class ScenarioRunner:
+    """
+    Runs the scenarios through the test client, and measures the latency of
+    each run, the number of queries, and the peak memory allocated while
+    handling a request (measured on a separate run, as tracing allocations
+    slows everything down).
+    With `cold_cache`, the response cache is cleared before each run, so
+    that the views are measured rather than the cache.
+    A run answered with a status other than 2xx fails the scenario (`ok` is
+    false in its result), as its timings measure the error instead.
+    """
+
+    def __init__(self, context, iterations=20, warmup=2, cold_cache=True):
+        self.context = context
+        self.iterations = iterations
+        self.warmup = warmup
+        self.cold_cache = cold_cache
+        self.client = APIClient(raise_request_exception=False)
+
+    def run(self, scenario):
+        for _ in range(self.warmup):
+            self.request(scenario)
+
+        timings = []
+        statuses = set()
+        for _ in range(self.iterations):
+            started = time.perf_counter()
+            response = self.request(scenario)
+            timings.append(time.perf_counter() - started)
+            statuses.add(response.status_code)
+
+        queries = []
+
+        def log_query(execute, sql, params, many, context):
+            queries.append(sql)
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(log_query):
+            self.request(scenario)
+
+        tracemalloc.start()
+        try:
+            self.request(scenario)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        return {
+            'status': response.status_code,
+            'ok': all(200 <= status < 300 for status in statuses),
+            'p50_ms': percentile(timings, 50) * 1000,
+            'p95_ms': percentile(timings, 95) * 1000,
+            'p99_ms': percentile(timings, 99) * 1000,
+            'mean_ms': sum(timings) / len(timings) * 1000,
+            'queries': len(queries),
+            'peak_kb': peak / 1024,
+        }
+
+    def request(self, scenario):
+        if self.cold_cache:
+            get_cache().clear()
+        headers = {}
+        if scenario.authenticated:
+            headers['HTTP_AUTHORIZATION'] = 'Bearer {}'.format(self.context['access'])
+        method = getattr(self.client, scenario.method)
+        path = scenario.get_path(self.context)
+
+        if scenario.method == 'get':
+            response = method(path, **headers)
+            # Streaming responses are only produced as they are consumed
+            if response.streaming:
+                for _ in response.streaming_content:
+                    pass
+            return response
+
+        data = scenario.data(self.context) if scenario.data is not None else None
+        with transaction.atomic():
+            # The callbacks run on commit (e.g. the cache invalidations) are
+            # run before the rollback, as TestCase does, so that their work
+            # is measured too
+            with TestCase.captureOnCommitCallbacks(execute=True):
+                response = method(path, json.dumps(data), content_type=scenario.content_type, **headers)
+            transaction.set_rollback(True)
+        return response
+
+
+def compare(results, baseline, threshold):
+    """
+    Compares the results with a baseline, returning a row per scenario found
+    in both, with the relative change of the median latency, the change of
+    the number of queries, and whether it is a regression: the median grew
+    by more than `threshold` (e.g. 0.25 for 25%), or queries were added.
+    """
+    rows = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        before = baseline[name]
+        change = result['p50_ms'] / before['p50_ms'] - 1 if before['p50_ms'] else 0
+        queries = result['queries'] - before['queries']
+        rows.append({
+            'name': name,
+            'p50_change': change,
+            'queries_change': queries,
+            'regression': change > threshold or queries > 0,
+        })
+    return rows
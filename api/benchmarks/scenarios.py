@@ -0,0 +1,153 @@
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+from django.contrib.auth.models import User
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from api.benchmarks.seed import PASSWORD, username
+from api.logic.workshop_calendar import regenerate_calendar_token
+from api.models import Company, Job, WorkExperience, Workshop
+
+# Routes of api/urls.py that cannot be exercised as they are, with the reason
+SKIPPED_ROUTES = {
+    'user/': "UserView requires a username, the route always fails",
+}
+
+
+@dataclass
+class Scenario:
+    """
+    A request to benchmark. `path` and `data` are formatted with, or called
+    with, the context of the seeded dataset (e.g. the id of a job).
+    Requests other than GET are rolled back after each run, so that every
+    run starts from the same data. Their on-commit callbacks run before the
+    rollback, the similar jobs refresh included, which is otherwise run in
+    the background.
+    """
+    name: str
+    route: str
+    method: str = 'get'
+    path: str = ''
+    data: Optional[Callable[[dict], object]] = None
+    authenticated: bool = True
+    content_type: str = 'application/json'
+
+    def get_path(self, context):
+        return '/api/' + (self.path or self.route).format(**context)
+
+
+def _job(context):
+    return {
+        'title': 'Benchmark job', 'description': 'A job created by the benchmark', 'salary': 5000,
+        'location': 'Singapore', 'job_type': 'Full-time', 'experience': 'B12', 'company_id': context['company'],
+    }
+
+
+def _bulk_jobs(context):
+    return [dict(_job(context), title='Benchmark job {}'.format(i)) for i in range(100)]
+
+
+def _batch_items(context):
+    return {'items': [
+        {'type': item_type, 'id': context[item_type] + i, 'save': i % 2 == 0}
+        for item_type in ('job', 'work_experience', 'workshop')
+        for i in range(10)
+    ]}
+
+
+SCENARIOS = [
+    Scenario('login', 'auth/login/', 'post', authenticated=False,
+             data=lambda context: {'username': context['username'], 'password': PASSWORD}),
+    Scenario('register', 'auth/register/', 'post', authenticated=False,
+             data=lambda context: {'name': 'New user', 'username': 'benchmark', 'email': 'benchmark@example.com',
+                                   'password': PASSWORD}),
+    Scenario('token refresh', 'auth/token/refresh/', 'post', authenticated=False,
+             data=lambda context: {'refresh': context['refresh']}),
+    Scenario('company list', 'company/'),
+    Scenario('company create', 'company/', 'post',
+             data=lambda context: {'name': 'Benchmark company', 'description': 'A company'}),
+    Scenario('company detail', 'company/<int:id>/', path='company/{company}/'),
+    Scenario('job list', 'job/'),
+    Scenario('job list page', 'job/', path='job/?page_size=12'),
+    Scenario('job list filtered', 'job/', path='job/?page_size=12&job_type__in=Full-time,Internship'),
+    Scenario('job list active filtered', 'job/',
+             path='job/?page_size=12&is_active=true&job_type__in=Full-time&experience__in=B12,B26'),
+    Scenario('job list by company', 'job/', path='job/?page_size=12&company_id__in={company}'),
+    Scenario('job search', 'job/', path='job/?page_size=12&q=software%20engineer'),
+    Scenario('job list stream', 'job/', path='job/?stream=ndjson'),
+    Scenario('job create', 'job/', 'post', data=_job),
+    Scenario('job bulk create', 'job/bulk/', 'post', data=_bulk_jobs),
+    Scenario('job facets', 'job/facets/'),
+    Scenario('job facets filtered', 'job/facets/', path='job/facets/?job_type__in=Full-time&experience__in=B12,B26'),
+    Scenario('job detail', 'job/<int:id>/', path='job/{job}/'),
+    Scenario('similar jobs', 'job/<int:id>/similar/', path='job/{job}/similar/'),
+    Scenario('nearby', 'nearby/'),
+    Scenario('nearby point', 'nearby/', path='nearby/?lat=3.139&lng=101.6869&radius=400&limit=50'),
+    Scenario('public', 'public/', authenticated=False),
+    Scenario('metrics', 'metrics/'),
+    Scenario('user detail', 'user/<str:username>/', path='user/{username}/'),
+    Scenario('user detail compact', 'user/<str:username>/', path='user/{username}/?compact=true'),
+    Scenario('user update', 'user/<str:username>/', 'put', path='user/{username}/',
+             data=lambda context: {'name': 'Updated', 'email': '', 'password': '', 'description': 'Updated',
+                                   'picture': '', 'location': 'Singapore'}),
+    Scenario('save job', 'save/job/', 'post', data=lambda context: {'job_id': context['job'], 'save': True}),
+    Scenario('work experience list', 'work_experience/'),
+    Scenario('work experience stream', 'work_experience/', path='work_experience/?stream=ndjson'),
+    Scenario('work experience create', 'work_experience/', 'post',
+             data=lambda context: {'role': 'Engineer', 'description': 'An experience', 'start_time': '2023-01-01',
+                                   'end_time': '2023-06-01', 'company_id': context['company']}),
+    Scenario('work experience detail', 'work_experience/<int:id>/', path='work_experience/{work_experience}/'),
+    Scenario('save work experience', 'save/work_experience/', 'post',
+             data=lambda context: {'work_experience_id': context['work_experience'], 'save': True}),
+    Scenario('workshop list', 'workshop/'),
+    Scenario('workshop list page', 'workshop/', path='workshop/?page_size=12'),
+    Scenario('workshop list by organizer', 'workshop/', path='workshop/?page_size=12&organizer_id__in={company}'),
+    Scenario('workshop create', 'workshop/', 'post',
+             data=lambda context: {'title': 'Benchmark workshop', 'start_time': '2023-01-01',
+                                   'end_time': '2023-01-02', 'company_id': context['company']}),
+    Scenario('workshop calendar', 'workshop/calendar/'),
+    Scenario('workshop calendar month', 'workshop/calendar/',
+             path='workshop/calendar/?ends_after=2024-03-01&starts_before=2024-03-31&page_size=12'),
+    Scenario('trending workshops', 'workshop/trending/'),
+    Scenario('workshop detail', 'workshop/<int:id>/', path='workshop/{workshop}/'),
+    Scenario('save workshop', 'save/workshop/', 'post',
+             data=lambda context: {'workshop_id': context['workshop'], 'save': True}),
+    Scenario('save batch', 'save/batch/', 'post', data=_batch_items),
+    Scenario('saved jobs', 'user/<str:username>/saved_jobs/', path='user/{username}/saved_jobs/'),
+    Scenario('saved jobs page', 'user/<str:username>/saved_jobs/', path='user/{username}/saved_jobs/?page_size=12'),
+    Scenario('recommended jobs', 'user/<str:username>/recommended_jobs/', path='user/{username}/recommended_jobs/'),
+    Scenario('saved experiences', 'user/<str:username>/saved_experiences/',
+             path='user/{username}/saved_experiences/'),
+    Scenario('saved workshops', 'user/<str:username>/saved_workshops/', path='user/{username}/saved_workshops/'),
+    Scenario('saved workshops calendar', 'saved_workshops/calendar/<str:token>.ics',
+             path='saved_workshops/calendar/{calendar_token}.ics', authenticated=False),
+    Scenario('calendar token', 'user/<str:username>/saved_workshops/calendar_token/', 'post',
+             path='user/{username}/saved_workshops/calendar_token/'),
+]
+
+
+def get_context():
+    """
+    Returns the values the scenarios are formatted with, taken from the
+    seeded dataset.
+    """
+    user = User.objects.get(username=username(0))
+    refresh = RefreshToken.for_user(user)
+    return {
+        'username': user.username,
+        'access': str(refresh.access_token),
+        'refresh': str(refresh),
+        'company': Company.objects.order_by('pk').values_list('pk', flat=True).first(),
+        'job': Job.objects.order_by('pk').values_list('pk', flat=True).first(),
+        'work_experience': WorkExperience.objects.order_by('pk').values_list('pk', flat=True).first(),
+        'workshop': Workshop.objects.order_by('pk').values_list('pk', flat=True).first(),
+        'calendar_token': regenerate_calendar_token(user.pk),
+    }
+
+
+def uncovered_routes(urlpatterns):
+    """
+    Returns the routes of the URL patterns that no scenario exercises.
+    """
+    covered = {scenario.route for scenario in SCENARIOS} | set(SKIPPED_ROUTES)
+    return [str(pattern.pattern) for pattern in urlpatterns if str(pattern.pattern) not in covered]
@@ -0,0 +1,166 @@
+import datetime
+import random
+from io import StringIO
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.utils import timezone
+
+from api.enums import Experience, JobType
+from api.logic.job_cards import rebuild_job_cards
+from api.logic.job_neighbors import build_job_neighbors
+from api.logic.job_search import refresh_search_vectors
+from api.logic.job_similarity import build_similar_jobs
+from api.logic.places import link_places, load_places
+from api.logic.trending_workshops import rebuild_trending_scores
+from api.models import Company, Job, JobCard, JobNeighbor, SimilarJob, UserProfile, WorkExperience, Workshop
+
+# Number of rows of each model per scale. Every user saves `saves` items of
+# each type, picked at random.
+SCALES = {
+    '1k': {'companies': 50, 'jobs': 1000, 'workshops': 1000, 'work_experiences': 1000, 'users': 100, 'saves': 20},
+    '100k': {'companies': 1000, 'jobs': 100000, 'workshops': 100000, 'work_experiences': 100000,
+             'users': 1000, 'saves': 50},
+    '1m': {'companies': 10000, 'jobs': 1000000, 'workshops': 1000000, 'work_experiences': 1000000,
+           'users': 10000, 'saves': 50},
+}
+
+BATCH_SIZE = 5000
+# The users' locations, assigned in turn rather than at random, so that the
+# rest of the dataset does not depend on them
+USER_LOCATIONS = ['Singapore', 'Jakarta', 'Kuala Lumpur', '']
+PASSWORD = 'benchmark'
+WORDS = (
+    'software engineer data analyst product design research marketing cloud security mobile web '
+    'frontend backend machine learning mentoring leadership career women tech startup finance '
+    'operations python django react kubernetes community workshop networking interview'
+).split()
+
+
+def username(index):
+    return 'user{}'.format(index)
+
+
+def is_seeded(scale):
+    """
+    Returns whether the database holds exactly the dataset of the scale.
+    """
+    counts = SCALES[scale]
+    return (
+        Company.objects.count() == counts['companies']
+        and Job.objects.count() == counts['jobs']
+        and JobCard.objects.count() == counts['jobs']
+        and Workshop.objects.count() == counts['workshops']
+        and WorkExperience.objects.count() == counts['work_experiences']
+        and UserProfile.objects.count() == counts['users']
+        and JobNeighbor.objects.exists()
+        and SimilarJob.objects.exists()
+    )
+
+
+def seed(scale, random_seed=0, log=None):
+    """
+    Replaces the data of the database by a synthetic dataset of the scale.
+    The dataset only depends on the scale and the random seed, so that runs
+    on different commits are comparable.
+    """
+    counts = SCALES[scale]
+    rng = random.Random(random_seed)
+    log = log or (lambda message: None)
+    # Truncates the tables, deleting through the ORM would take hours at 1M rows
+    call_command('flush', interactive=False, verbosity=0)
+    # Which empties the gazetteer too
+    load_places()
+
+    def text(words):
+        return ' '.join(rng.choice(WORDS) for _ in range(words))
+
+    log('Seeding {} companies'.format(counts['companies']))
+    Company.objects.bulk_create((
+        Company(name='Company {}'.format(i), description=text(30),
+                picture='https://example.com/companies/{}.png'.format(i),
+                website='https://example.com/companies/{}'.format(i))
+        for i in range(counts['companies'])
+    ), batch_size=BATCH_SIZE)
+    company_ids = list(Company.objects.values_list('pk', flat=True))
+
+    log('Seeding {} jobs'.format(counts['jobs']))
+    job_types, experiences = JobType.values, Experience.values
+    _bulk_create(Job, counts['jobs'], lambda i: Job(
+        title='{} {}'.format(text(2).title(), i), description=text(60), responsibilities=text(40),
+        qualifications=text(40), company_id=rng.choice(company_ids), salary=rng.randrange(1000, 20000),
+        location=rng.choice(['Singapore', 'Jakarta', 'Kuala Lumpur', 'Remote']),
+        job_type=rng.choice(job_types), experience=rng.choice(experiences),
+        is_active=rng.random() < 0.9,
+    ))
+    refresh_search_vectors(Job.objects.all())
+    link_places(Job)
+    rebuild_job_cards()
+    build_similar_jobs()
+
+    log('Seeding {} workshops'.format(counts['workshops']))
+    start = datetime.date(2023, 1, 1)
+    _bulk_create(Workshop, counts['workshops'], lambda i: Workshop(
+        organizer_id=rng.choice(company_ids), title='{} {}'.format(text(3).title(), i), description=text(40),
+        start_time=start + datetime.timedelta(days=i % 1000),
+        end_time=start + datetime.timedelta(days=i % 1000 + rng.randrange(1, 3)),
+        location=rng.choice(['Singapore', 'Online', 'Jakarta']),
+        website='https://example.com/workshops/{}'.format(i),
+    ))
+    link_places(Workshop)
+
+    log('Seeding {} work experiences'.format(counts['work_experiences']))
+    _bulk_create(WorkExperience, counts['work_experiences'], lambda i: WorkExperience(
+        company_id=rng.choice(company_ids), role=text(2).title(), description=text(40),
+        start_time=start + datetime.timedelta(days=i % 1000),
+        end_time=start + datetime.timedelta(days=i % 1000 + 365),
+    ))
+
+    log('Seeding {} users'.format(counts['users']))
+    # Hashing a password per user would dominate the seeding time
+    password = make_password(PASSWORD)
+    # The first user is staff, to access the staff-only endpoints
+    User.objects.bulk_create((
+        User(username=username(i), email='{}@example.com'.format(username(i)), password=password, is_staff=i == 0)
+        for i in range(counts['users'])
+    ), batch_size=BATCH_SIZE)
+    users = list(User.objects.values_list('pk', flat=True))
+    UserProfile.objects.bulk_create((
+        UserProfile(user_id=user_id, name='User {}'.format(user_id),
+                    location=USER_LOCATIONS[user_id % len(USER_LOCATIONS)])
+        for user_id in users
+    ), batch_size=BATCH_SIZE)
+    link_places(UserProfile)
+
+    log('Seeding saved items')
+    now = timezone.now()
+    for field_name, model in [('saved_jobs', Job), ('saved_experiences', WorkExperience),
+                              ('saved_workshops', Workshop)]:
+        through = UserProfile._meta.get_field(field_name).remote_field.through
+        target = '{}_id'.format(model._meta.model_name)
+        ids = list(model.objects.values_list('pk', flat=True))
+        saves = min(counts['saves'], len(ids))
+        # The saved workshops are dated over the last two months, for their trending scores
+        if model is Workshop:
+            saved_at = lambda: {'saved_at': now - datetime.timedelta(seconds=rng.randrange(60 * 86400))}
+        else:
+            saved_at = dict
+        step = max(BATCH_SIZE // max(saves, 1), 1)
+        for start in range(0, len(users), step):
+            through.objects.bulk_create([
+                through(**{'userprofile_id': user_id, target: item_id}, **saved_at())
+                for user_id in users[start:start + step]
+                for item_id in rng.sample(ids, saves)
+            ])
+    call_command('reconcile_workshop_saves', stdout=StringIO())
+    rebuild_trending_scores()
+
+    log('Building job neighbours')
+    build_job_neighbors()
+
+
+def _bulk_create(model, count, build):
+    for start in range(0, count, BATCH_SIZE):
+        model.objects.bulk_create([build(i) for i in range(start, min(start + BATCH_SIZE, count))])
+
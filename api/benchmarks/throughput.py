@@ -0,0 +1,127 @@
+"""
+Measures the throughput of the home screen's fan-out, where each client
+fetches several endpoints at once, served by sync WSGI workers with the sync
+views, and by the ASGI application with the async views.
+"""
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from asgiref.sync import ThreadSensitiveContext, sync_to_async
+from django.db import close_old_connections, connections
+from django.db.backends.signals import connection_created
+from django.test import AsyncClient, Client
+
+from api.benchmarks.runner import percentile
+
+
+@contextmanager
+def database_latency(seconds):
+    """
+    Adds `seconds` of latency to every query run within the block, as with
+    a database across the network, in whichever thread the query runs.
+    """
+    enabled = [True]
+
+    def delay(execute, sql, params, many, context):
+        if enabled[0]:
+            time.sleep(seconds)
+        return execute(sql, params, many, context)
+
+    def install(sender, connection, **kwargs):
+        if delay not in connection.execute_wrappers:
+            connection.execute_wrappers.append(delay)
+
+    if seconds:
+        for connection in connections.all():
+            connection.execute_wrappers.append(delay)
+        connection_created.connect(install)
+    try:
+        yield
+    finally:
+        enabled[0] = False
+        connection_created.disconnect(install)
+        for connection in connections.all():
+            if delay in connection.execute_wrappers:
+                connection.execute_wrappers.remove(delay)
+
+
+def summarize(fanouts, requests, elapsed):
+    return {
+        'requests_per_s': requests / elapsed,
+        'fanout_p50_ms': percentile(fanouts, 50) * 1000,
+        'fanout_p95_ms': percentile(fanouts, 95) * 1000,
+    }
+
+
+def check(response):
+    if response.status_code != 200:
+        raise RuntimeError('{} answered {}'.format(response.request['PATH_INFO'], response.status_code))
+
+
+def run_wsgi(paths, access, clients, rounds, workers=1):
+    """
+    Runs `rounds` fan-outs per client on `workers` WSGI worker threads, one
+    being a gunicorn sync worker, and several a gthread worker.
+    """
+    local = threading.local()
+
+    def get(path):
+        if not hasattr(local, 'client'):
+            local.client = Client()
+        response = local.client.get(path, HTTP_AUTHORIZATION='Bearer ' + access)
+        # As at the end of every request, which the test client does not do
+        close_old_connections()
+        check(response)
+
+    fanouts = []
+
+    def client(pool):
+        for _ in range(rounds):
+            started = time.perf_counter()
+            for future in [pool.submit(get, path) for path in paths]:
+                future.result()
+            fanouts.append(time.perf_counter() - started)
+
+    with ThreadPoolExecutor(workers) as pool:
+        threads = [threading.Thread(target=client, args=(pool,)) for _ in range(clients)]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+    return summarize(fanouts, len(fanouts) * len(paths), elapsed)
+
+
+def run_asgi(paths, access, clients, rounds):
+    """
+    Runs `rounds` fan-outs per client on the ASGI application, all served by
+    one event loop.
+    """
+    async def run():
+        client = AsyncClient()
+        fanouts = []
+
+        async def get(path):
+            # As in ASGIHandler, each request gets its own sync thread
+            async with ThreadSensitiveContext():
+                response = await client.get(path, authorization='Bearer ' + access)
+                # The request's thread is not reused, nor is its connection,
+                # as with the default settings under ASGI
+                await sync_to_async(connections.close_all)()
+            check(response)
+
+        async def fanout_client():
+            for _ in range(rounds):
+                started = time.perf_counter()
+                await asyncio.gather(*(get(path) for path in paths))
+                fanouts.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(fanout_client() for _ in range(clients)))
+        return summarize(fanouts, len(fanouts) * len(paths), time.perf_counter() - started)
+
+    return asyncio.run(run())
@@ -0,0 +1,92 @@
+from itertools import islice
+
+from django.db import transaction
+
+from api.models import Job, JobCard
+from api.utils.cache import invalidate_tags
+
+BATCH_SIZE = 1000
+
+# Field of the job card, and the job lookup it is copied from
+CARD_FIELDS = {
+    'id': 'id',
+    'title': 'title',
+    'description': 'description',
+    'salary': 'salary',
+    'location': 'location',
+    'job_type': 'job_type',
+    'experience': 'experience',
+    'is_active': 'is_active',
+    'updated_at': 'updated_at',
+    'company_id': 'company_id',
+    'company_name': 'company__name',
+    'company_description': 'company__description',
+    'company_picture': 'company__picture',
+    'company_website': 'company__website',
+    'company_updated_at': 'company__updated_at',
+    'place_id': 'place_id',
+}
+
+# Fields of the job card copied from the company
+COMPANY_FIELDS = {
+    'company_name': 'name',
+    'company_description': 'description',
+    'company_picture': 'picture',
+    'company_website': 'website',
+    'company_updated_at': 'updated_at',
+}
+
+
+def _build_cards(rows):
+    return [JobCard(**dict(zip(CARD_FIELDS, row))) for row in rows]
+
+
+def refresh_job_cards(queryset):
+    """
+    Creates or updates the card of every job in the queryset, reading the
+    jobs and their companies in a single query and writing the cards in a
+    single upsert.
+    """
+    cards = _build_cards(queryset.values_list(*CARD_FIELDS.values()))
+    if not cards:
+        return 0
+    JobCard.objects.bulk_create(
+        cards,
+        update_conflicts=True,
+        unique_fields=['id'],
+        update_fields=[field for field in CARD_FIELDS if field != 'id'],
+    )
+    return len(cards)
+
+
+def refresh_company_cards(company):
+    """
+    Copies the fields of the company into the cards of its jobs in a single
+    UPDATE.
+    """
+    return JobCard.objects.filter(company_id=company.pk).update(**{
+        field: getattr(company, source) for field, source in COMPANY_FIELDS.items()
+    })
+
+
+def delete_job_cards(ids):
+    return JobCard.objects.filter(pk__in=ids).delete()
+
+
+def rebuild_job_cards(batch_size=BATCH_SIZE) -> int:
+    """
+    Rebuilds every job card from the jobs, in a single transaction so that
+    the job list never shows a partial table. Returns the number of cards.
+    """
+    built = 0
+    with transaction.atomic():
+        JobCard.objects.all().delete()
+        rows = Job.objects.order_by('pk').values_list(*CARD_FIELDS.values()).iterator(chunk_size=batch_size)
+        while True:
+            batch = list(islice(rows, batch_size))
+            if not batch:
+                break
+            JobCard.objects.bulk_create(_build_cards(batch))
+            built += len(batch)
+        invalidate_tags('job')
+    return built
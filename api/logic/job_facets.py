@@ -0,0 +1,81 @@
+from django.db.models import Count
+from django_filters.utils import translate_validation
+
+from api.enums import Experience, JobType
+from api.logic.job_search import search_jobs
+from api.models import Job
+from api.utils.filters import JobFilter
+
+# Query parameters filtering on each facet. The counts of a facet ignore its
+# own filters, so that they tell how many jobs ticking one more of its
+# checkboxes would add.
+FACET_PARAMS = {
+    'job_type': ('job_type__in',),
+    'experience': ('experience__in',),
+    'company': ('company_id__in', 'company__name__in'),
+}
+
+
+def filter_jobs(params, terms='', exclude=()):
+    """
+    Returns the jobs matching the filters of the job list in `params` and
+    the search terms, ignoring the `exclude` parameters.
+    Raises a ValidationError if the filters are invalid.
+    """
+    data = params.copy()
+    for name in exclude:
+        data.pop(name, None)
+    filterset = JobFilter(data, queryset=Job.objects.all())
+    if not filterset.is_valid():
+        raise translate_validation(filterset.errors)
+    queryset = filterset.qs
+    if terms:
+        queryset = search_jobs(queryset, terms)
+    return queryset.order_by()
+
+
+def _choice_counts(queryset, field, choices):
+    """
+    Returns the count of each choice of the field, and the total count.
+    """
+    counts = dict(queryset.values_list(field).annotate(count=Count('id')))
+    rows = [
+        {'value': value, 'label': str(label), 'count': counts.get(value, 0)}
+        for value, label in choices.choices
+    ]
+    return rows, sum(counts.values())
+
+
+def job_facets(params, terms=''):
+    """
+    Returns the number of jobs per job type, experience and company for the
+    filters of the job list in `params`, with one grouped query per facet,
+    plus the number of jobs matching every filter.
+    Every job type and experience is listed, the companies are those with at
+    least one job, the largest first.
+    """
+    # Without a job type filter, the job type counts add up to the total
+    queryset = filter_jobs(params, terms, FACET_PARAMS['job_type'])
+    job_types, total = _choice_counts(queryset, 'job_type', JobType)
+
+    queryset = filter_jobs(params, terms, FACET_PARAMS['experience'])
+    experiences, _ = _choice_counts(queryset, 'experience', Experience)
+
+    queryset = filter_jobs(params, terms, FACET_PARAMS['company'])
+    companies = [
+        {'id': id, 'name': name, 'count': count}
+        for id, name, count in queryset.values_list('company_id', 'company__name')
+        .annotate(count=Count('id')).order_by('-count', 'company__name', 'company_id')
+    ]
+
+    if any(name in params for name in FACET_PARAMS['job_type']):
+        total = filter_jobs(params, terms).count()
+    return {'total': total, 'job_type': job_types, 'experience': experiences, 'company': companies}
+
+
+def facet_tags(data):
+    """
+    Returns the cache tags of the companies listed in the facets, whose names
+    are part of the response.
+    """
+    return ['company:{}'.format(row['id']) for row in data['company']]
@@ -0,0 +1,121 @@
+from itertools import islice
+
+from django.db import DataError, IntegrityError, transaction
+from rest_framework.exceptions import ParseError, ValidationError
+
+from api.logic.job_cards import refresh_job_cards
+from api.logic.job_search import refresh_search_vectors
+from api.logic.job_similarity import schedule_similar_jobs_update
+from api.logic.places import resolve_place_id
+from api.models import Company, Job
+from api.serializers import JobSerializer
+from api.utils.cache import invalidate_tags
+
+BATCH_SIZE = 1000
+
+
+def ingest_jobs(rows, batch_size=BATCH_SIZE) -> dict:
+    """
+    Validates and inserts job postings in batches.
+
+    Each row has the same format as the body of `POST /api/job/`, i.e. the
+    job fields and a `company_id`. The companies of a batch are resolved in
+    a single query, and the valid rows of a batch are inserted with
+    `bulk_create`. Invalid rows are skipped and reported with their index.
+    """
+    created = 0
+    errors = []
+    # A single serializer validates every row, as ListSerializer does, so its
+    # fields are only built once
+    serializer = JobSerializer()
+    rows = enumerate(rows)
+    while True:
+        batch = list(islice(rows, batch_size))
+        if not batch:
+            break
+        jobs, batch_errors = _validate_batch(serializer, batch)
+        errors.extend(batch_errors)
+        created_jobs, insert_errors = _insert_batch(jobs)
+        errors.extend(insert_errors)
+        created += len(created_jobs)
+
+    if created:
+        invalidate_tags('job')
+    errors.sort(key=lambda error: error['index'])
+    return {
+        'created': created,
+        'errors': errors,
+    }
+
+
+def _validate_batch(serializer, batch):
+    company_ids = {
+        _to_int(row.get('company_id')) for _, row in batch if isinstance(row, dict)
+    }
+    companies = Company.objects.in_bulk([id for id in company_ids if id is not None])
+
+    jobs = []
+    errors = []
+    for index, row in batch:
+        if isinstance(row, ParseError):
+            errors.append({'index': index, 'errors': {'non_field_errors': [row.detail]}})
+            continue
+        if not isinstance(row, dict):
+            errors.append({'index': index, 'errors': {'non_field_errors': ['Expected a JSON object.']}})
+            continue
+
+        try:
+            validated_data = serializer.run_validation(row)
+            row_errors = {}
+        except ValidationError as exc:
+            row_errors = dict(exc.detail)
+        company = companies.get(_to_int(row.get('company_id')))
+        if company is None:
+            row_errors['company_id'] = ['Company with the specified id does not exist']
+        if row_errors:
+            errors.append({'index': index, 'errors': row_errors})
+            continue
+        job = Job(company=company, **validated_data)
+        # As the signals do, which bulk_create skips
+        job.place_id = resolve_place_id(job.location)
+        jobs.append((index, job))
+    return jobs, errors
+
+
+def _insert_batch(jobs):
+    """
+    Inserts the jobs of a batch with a single `bulk_create`. If the database
+    rejects the batch, the jobs are inserted one by one instead, to find out
+    which rows are at fault.
+    """
+    if not jobs:
+        return [], []
+    try:
+        with transaction.atomic():
+            created = Job.objects.bulk_create([job for _, job in jobs])
+            created_jobs = Job.objects.filter(pk__in=[job.pk for job in created])
+            refresh_search_vectors(created_jobs)
+            refresh_job_cards(created_jobs)
+            schedule_similar_jobs_update([job.pk for job in created])
+        return created, []
+    except (DataError, IntegrityError):
+        pass
+
+    created = []
+    errors = []
+    for index, job in jobs:
+        job.pk = None
+        try:
+            with transaction.atomic():
+                job.save()
+            created.append(job)
+        except (DataError, IntegrityError) as e:
+            errors.append({'index': index, 'errors': {'non_field_errors': [str(e)]}})
+    return created, errors
+
+
+def _to_int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
@@ -0,0 +1,92 @@
+import numpy as np
+from django.db import transaction
+
+from api.models import JobNeighbor, UserProfile
+from api.utils.arrays import concatenated_ranges, top_k_per_row
+
+# Number of neighbours kept per job
+TOP_K = 20
+# Number of jobs whose co-occurrences are counted at once, which bounds the
+# memory used by the build
+BLOCK_SIZE = 20000
+BATCH_SIZE = 5000
+
+SAVE_DTYPE = np.dtype([('user', np.int64), ('job', np.int64), ('is_active', np.bool_)])
+
+
+def _read_saves():
+    """
+    Reads the saved-job through table as an array of (user, job, whether
+    the job is active) rows, in a single query.
+    """
+    through = UserProfile.saved_jobs.through
+    rows = through.objects.order_by().values_list('userprofile_id', 'job_id', 'job__is_active')
+    return np.fromiter(rows.iterator(chunk_size=BATCH_SIZE), dtype=SAVE_DTYPE)
+
+
+def compute_job_neighbors(saves, top_k=TOP_K, block_size=BLOCK_SIZE):
+    """
+    Yields, block by block, the (job IDs, neighbour IDs, scores) arrays of
+    the `top_k` neighbours of every saved job, from the saves as read by
+    `_read_saves`.
+
+    The saves form a sparse user×job matrix X, stored by user (CSR). The
+    item-item co-occurrence XᵀX is computed for a block of jobs at a time:
+    every save of a job of the block is paired with the other saves of its
+    user, and the pairs are counted with `np.unique`. The score of a pair is
+    the cosine similarity of the two columns of X, i.e. the number of users
+    who saved both jobs over the geometric mean of their numbers of saves.
+    Inactive jobs are never neighbours.
+    """
+    if not len(saves):
+        return
+    users, user_index = np.unique(saves['user'], return_inverse=True)
+    jobs, job_index = np.unique(saves['job'], return_inverse=True)
+    saves_per_user = np.bincount(user_index, minlength=len(users))
+    saves_per_job = np.bincount(job_index, minlength=len(jobs))
+    active = np.zeros(len(jobs), dtype=bool)
+    active[job_index] = saves['is_active']
+
+    # CSR layout: the saved jobs of each user are contiguous in `columns`,
+    # starting at `indptr[user]`
+    order = np.argsort(user_index, kind='stable')
+    columns = job_index[order]
+    save_users = user_index[order]
+    indptr = np.concatenate([[0], np.cumsum(saves_per_user)])
+
+    for start in range(0, len(jobs), block_size):
+        in_block = np.flatnonzero((columns >= start) & (columns < start + block_size))
+        block_users = save_users[in_block]
+        lengths = saves_per_user[block_users]
+        sources = np.repeat(columns[in_block], lengths)
+        others = columns[concatenated_ranges(indptr[block_users], lengths)]
+        keep = (sources != others) & active[others]
+        # Encodes each pair as a single integer, so that they are counted at once
+        pairs, counts = np.unique((sources[keep] - start) * len(jobs) + others[keep], return_counts=True)
+        if not len(pairs):
+            continue
+        sources, others = pairs // len(jobs) + start, pairs % len(jobs)
+        scores = counts / np.sqrt(saves_per_job[sources] * saves_per_job[others])
+        sources, others, scores = top_k_per_row(sources, jobs[others], scores, top_k)
+        yield jobs[sources], others, scores
+
+
+def build_job_neighbors(top_k=TOP_K, block_size=BLOCK_SIZE, batch_size=BATCH_SIZE) -> int:
+    """
+    Rebuilds the neighbours of every job from the saved jobs, in a single
+    transaction so that the recommendations never read a partial table.
+    Returns the number of neighbours.
+    """
+    saves = _read_saves()
+    built = 0
+    with transaction.atomic():
+        JobNeighbor.objects.all().delete()
+        for job_ids, neighbor_ids, scores in compute_job_neighbors(saves, top_k, block_size):
+            for batch in range(0, len(job_ids), batch_size):
+                rows = zip(*(array[batch:batch + batch_size].tolist() for array in (job_ids, neighbor_ids, scores)))
+                JobNeighbor.objects.bulk_create([
+                    JobNeighbor(job_id=job_id, neighbor_id=neighbor_id, score=score)
+                    for job_id, neighbor_id, score in rows
+                ])
+            built += len(job_ids)
+    return built
@@ -0,0 +1,84 @@
+from functools import reduce
+from operator import add, or_
+
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db import connections
+from django.db.models import Case, F, FloatField, OuterRef, Q, Subquery, Value, When
+from django.db.models.functions import Cast
+
+from api.models import Company
+
+SEARCH_CONFIG = 'english'
+
+# Weight of each searchable field, as (lookup, PostgreSQL weight, fallback weight)
+SEARCH_FIELDS = [
+    ('title', 'A', 1.0),
+    ('company__name', 'A', 1.0),
+    ('description', 'B', 0.4),
+    ('responsibilities', 'C', 0.2),
+    ('qualifications', 'C', 0.2),
+]
+
+
+def is_postgresql(using='default'):
+    return connections[using].vendor == 'postgresql'
+
+
+def job_search_vector():
+    """
+    Returns the expression computing the stored search vector of a job.
+    The company name is read through a subquery so that the expression can be
+    used in `QuerySet.update()`.
+    """
+    company_name = Subquery(
+        Company.objects.filter(pk=OuterRef('company_id')).values('name')[:1]
+    )
+    vectors = []
+    for lookup, weight, _ in SEARCH_FIELDS:
+        expression = company_name if lookup == 'company__name' else lookup
+        vectors.append(SearchVector(expression, weight=weight, config=SEARCH_CONFIG))
+    return reduce(add, vectors)
+
+
+def refresh_search_vectors(queryset):
+    """
+    Recomputes the stored search vector of every job in the queryset in a
+    single UPDATE. This is a no-op on databases without full-text search.
+    """
+    if not is_postgresql(queryset.db):
+        return 0
+    return queryset.update(search_vector=job_search_vector())
+
+
+def search_jobs(queryset, terms):
+    """
+    Filters the job queryset down to the jobs matching the search terms, and
+    annotates each job with its relevance as `rank`.
+
+    On PostgreSQL, the stored search vector is matched against a web search
+    style query and ranked with ts_rank. Elsewhere, every term has to appear
+    in one of the searchable fields, and the rank is the weighted number of
+    fields each term appears in.
+    """
+    if is_postgresql(queryset.db):
+        query = SearchQuery(terms, search_type='websearch', config=SEARCH_CONFIG)
+        # Cast to double precision, so that the rank survives the round trip
+        # through the pagination cursor exactly
+        rank = Cast(SearchRank(F('search_vector'), query), FloatField())
+        return queryset.filter(search_vector=query).annotate(rank=rank)
+
+    words = terms.split()
+    if not words:
+        return queryset.none()
+    conditions = []
+    scores = []
+    for word in words:
+        matches = [Q(**{'{}__icontains'.format(lookup): word}) for lookup, _, _ in SEARCH_FIELDS]
+        conditions.append(reduce(or_, matches))
+        scores.extend(
+            Case(When(match, then=Value(weight)), default=Value(0.0), output_field=FloatField())
+            for match, (_, _, weight) in zip(matches, SEARCH_FIELDS)
+        )
+    for condition in conditions:
+        queryset = queryset.filter(condition)
+    return queryset.annotate(rank=reduce(add, scores))
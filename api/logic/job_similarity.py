@@ -0,0 +1,403 @@
+import logging
+import re
+import threading
+from array import array
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+import numpy as np
+from django.db import connection, connections, transaction
+from django.db.models import F, Q, Window
+from django.db.models.functions import RowNumber
+
+from api.models import Job, JobTerm, SimilarJob, SimilarityTerm
+from api.serializers import JobCardSerializer
+from api.utils.arrays import concatenated_ranges, top_k_per_row
+
+# Number of similar jobs kept per job
+TOP_K = 10
+# Number of terms kept in the vector of each job, its heaviest ones
+TERMS_PER_JOB = 10
+# Number of candidates looked up per term of a job: the jobs in which the
+# term weighs the most
+CANDIDATES_PER_TERM = 200
+# Number of jobs, and of candidates, multiplied at once, which bounds the
+# memory used by the build
+BLOCK_SIZE = 256
+CANDIDATE_BLOCK_SIZE = 10000
+BATCH_SIZE = 5000
+
+# Fields of the job that are indexed, and the weight of their terms
+TEXT_FIELDS = {
+    'title': 2,
+    'description': 1,
+    'responsibilities': 1,
+    'qualifications': 1,
+}
+# The term whose document frequency is the number of indexed jobs
+DOCUMENTS_TERM = ''
+
+TOKEN_PATTERN = re.compile(r'[^\W\d_]{2,50}')
+STOP_WORDS = frozenset((
+    'a an and are as at be by for from has have in is it its of on or our that the their this to was we '
+    'will with you your'
+).split())
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def term_counts(texts) -> Counter:
+    """
+    Returns the weighted number of occurrences of each term of the texts of
+    a job, given in the order of TEXT_FIELDS.
+    """
+    counts = Counter()
+    for text, weight in zip(texts, TEXT_FIELDS.values()):
+        for token in TOKEN_PATTERN.findall((text or '').casefold()):
+            if token not in STOP_WORDS:
+                counts[token] += weight
+    return counts
+
+
+def _weigh(rows, terms, counts, document_frequencies, documents):
+    """
+    Returns the TF-IDF vectors of the jobs, as (row, term, weight) arrays
+    sorted by row: the sublinear term frequency times the smoothed inverse
+    document frequency, keeping the TERMS_PER_JOB heaviest terms of each
+    job, normalized to unit length.
+    """
+    idf = np.log((1 + documents) / (1 + document_frequencies)) + 1
+    weights = (1 + np.log(counts)) * idf
+    rows, terms, weights = top_k_per_row(rows, terms, weights, TERMS_PER_JOB)
+    norms = np.sqrt(np.bincount(rows, weights ** 2))
+    return rows, terms, (weights / norms[rows]).astype(np.float32)
+
+
+def _nearest(queries, candidates, query_ids, candidate_ids, top_k):
+    """
+    Returns the `top_k` most similar candidates of each query job, as
+    (query row, candidate ID, score) arrays sorted by row, then by score.
+    Both are (row, term, weight) vectors, the candidates sorted by row.
+
+    The queries are laid out as a dense matrix over their own terms, and
+    multiplied with the candidates block by block, keeping the running
+    `top_k` of each query, so that at most CANDIDATE_BLOCK_SIZE candidates
+    are held densely at once.
+    """
+    query_rows, query_terms, query_weights = queries
+    columns = np.unique(query_terms)
+    matrix = np.zeros((len(query_ids), len(columns)), dtype=np.float32)
+    matrix[query_rows, np.searchsorted(columns, query_terms)] = query_weights
+
+    rows, terms, weights = candidates
+    # The other terms do not contribute to the dot products
+    shared = np.isin(terms, columns)
+    rows, terms, weights = rows[shared], terms[shared], weights[shared]
+
+    best_ids = np.zeros((len(query_ids), 0), dtype=np.int64)
+    best_scores = np.zeros((len(query_ids), 0), dtype=np.float32)
+    for start in range(0, len(candidate_ids), CANDIDATE_BLOCK_SIZE):
+        stop = min(start + CANDIDATE_BLOCK_SIZE, len(candidate_ids))
+        lo, hi = np.searchsorted(rows, [start, stop])
+        block = np.zeros((stop - start, len(columns)), dtype=np.float32)
+        block[rows[lo:hi] - start, np.searchsorted(columns, terms[lo:hi])] = weights[lo:hi]
+        ids = candidate_ids[start:stop]
+        scores = matrix @ block.T
+        scores[query_ids[:, None] == ids[None, :]] = 0
+        best_ids = np.hstack([best_ids, np.broadcast_to(ids, scores.shape)])
+        best_scores = np.hstack([best_scores, scores])
+        if best_ids.shape[1] > top_k:
+            keep = np.argpartition(-best_scores, top_k - 1, axis=1)[:, :top_k]
+            best_ids = np.take_along_axis(best_ids, keep, axis=1)
+            best_scores = np.take_along_axis(best_scores, keep, axis=1)
+
+    query_rows = np.repeat(np.arange(len(query_ids)), best_ids.shape[1])
+    best_ids, best_scores = best_ids.ravel(), best_scores.ravel()
+    similar = best_scores > 0
+    return top_k_per_row(query_rows[similar], best_ids[similar], best_scores[similar], top_k)
+
+
+def _similar_jobs(job_ids, similar_ids, scores):
+    return [
+        SimilarJob(job_id=job_id, similar_id=similar_id, score=score)
+        for job_id, similar_id, score in zip(job_ids.tolist(), similar_ids.tolist(), scores.tolist())
+    ]
+
+
+def _read_jobs():
+    """
+    Reads and tokenizes the texts of every active job. Returns the job IDs,
+    the terms, and the (row, term index, count) arrays of their occurrences.
+    """
+    vocabulary = {}
+    job_ids, rows, terms, counts = array('q'), array('l'), array('l'), array('d')
+    jobs = Job.objects.filter(is_active=True).order_by('pk').values_list('pk', *TEXT_FIELDS)
+    for row in jobs.iterator(chunk_size=BATCH_SIZE):
+        for term, count in term_counts(row[1:]).items():
+            rows.append(len(job_ids))
+            terms.append(vocabulary.setdefault(term, len(vocabulary)))
+            counts.append(count)
+        job_ids.append(row[0])
+    return np.array(job_ids), list(vocabulary), np.array(rows), np.array(terms), np.array(counts)
+
+
+def build_similar_jobs(top_k=TOP_K, block_size=BLOCK_SIZE, batch_size=BATCH_SIZE) -> int:
+    """
+    Rebuilds the index of the similar jobs from every active job, in a single
+    transaction so that the job details never read a partial index. Returns
+    the number of similar jobs.
+
+    The jobs are vectorized with TF-IDF. The candidates of each job are the
+    CANDIDATES_PER_TERM heaviest jobs of each of its terms, and are scored
+    with blocked matrix multiplications, BLOCK_SIZE jobs at a time.
+    """
+    job_ids, vocabulary, rows, terms, counts = _read_jobs()
+    document_frequencies = np.bincount(terms, minlength=len(vocabulary))
+    rows, terms, weights = _weigh(rows, terms, counts, document_frequencies[terms], len(job_ids))
+    indptr = np.concatenate([[0], np.cumsum(np.bincount(rows, minlength=len(job_ids)))])
+    # The candidates of each term, as the rows of the jobs it weighs the most in
+    posting_terms, postings, _ = top_k_per_row(terms, rows, weights, CANDIDATES_PER_TERM)
+    posting_ptr = np.concatenate([[0], np.cumsum(np.bincount(posting_terms, minlength=len(vocabulary)))])
+
+    built = 0
+    with transaction.atomic():
+        _lock_index()
+        SimilarJob.objects.all().delete()
+        JobTerm.objects.all().delete()
+        SimilarityTerm.objects.all().delete()
+        SimilarityTerm.objects.bulk_create([SimilarityTerm(term=DOCUMENTS_TERM, document_frequency=len(job_ids))] + [
+            SimilarityTerm(term=term, document_frequency=frequency)
+            for term, frequency in zip(vocabulary, document_frequencies.tolist())
+        ], batch_size=batch_size)
+        term_ids = dict(SimilarityTerm.objects.values_list('term', 'pk'))
+        term_pks = np.array([term_ids[term] for term in vocabulary], dtype=np.int64)
+        for start in range(0, len(rows), batch_size):
+            JobTerm.objects.bulk_create([
+                JobTerm(job_id=job_id, term_id=term_id, weight=weight)
+                for job_id, term_id, weight in zip(job_ids[rows[start:start + batch_size]].tolist(),
+                                                   term_pks[terms[start:start + batch_size]].tolist(),
+                                                   weights[start:start + batch_size].tolist())
+            ])
+
+        for start in range(0, len(job_ids), block_size):
+            stop = min(start + block_size, len(job_ids))
+            lo, hi = indptr[start], indptr[stop]
+            block_terms = np.unique(terms[lo:hi])
+            candidates = np.unique(postings[concatenated_ranges(
+                posting_ptr[block_terms], posting_ptr[block_terms + 1] - posting_ptr[block_terms]
+            )])
+            lengths = indptr[candidates + 1] - indptr[candidates]
+            entries = concatenated_ranges(indptr[candidates], lengths)
+            query_rows, similar_ids, scores = _nearest(
+                (rows[lo:hi] - start, terms[lo:hi], weights[lo:hi]),
+                (np.repeat(np.arange(len(candidates)), lengths), terms[entries], weights[entries]),
+                job_ids[start:stop], job_ids[candidates], top_k,
+            )
+            similar_jobs = _similar_jobs(job_ids[start:stop][query_rows], similar_ids, scores)
+            SimilarJob.objects.bulk_create(similar_jobs, batch_size=batch_size)
+            built += len(similar_jobs)
+    return built
+
+
+def _term_ids(terms) -> dict:
+    """
+    Returns the ID and document frequency of each term, adding the terms
+    missing from the vocabulary.
+    """
+    SimilarityTerm.objects.bulk_create(
+        [SimilarityTerm(term=term, document_frequency=0) for term in terms], ignore_conflicts=True,
+    )
+    return {
+        term: (id, frequency)
+        for term, id, frequency in SimilarityTerm.objects.filter(term__in=terms).values_list(
+            'term', 'pk', 'document_frequency')
+    }
+
+
+def _count_documents(new_counts):
+    """
+    Adds the new jobs to the document frequencies of their terms, with an
+    UPDATE per distinct increment.
+    """
+    increments = Counter(term for counts in new_counts for term in counts)
+    increments[DOCUMENTS_TERM] = len(new_counts)
+    terms_by_increment = defaultdict(list)
+    for term, increment in increments.items():
+        terms_by_increment[increment].append(term)
+    for increment, terms in terms_by_increment.items():
+        SimilarityTerm.objects.filter(term__in=terms).update(
+            document_frequency=F('document_frequency') + increment
+        )
+
+
+def _lock_index():
+    """
+    Locks the index until the end of the transaction, through the row of
+    DOCUMENTS_TERM, so that the updates run one at a time: they rewrite the
+    similar jobs of the neighbours they share.
+    """
+    # A rebuild deletes the row, which releases the updates waiting for it
+    while not list(SimilarityTerm.objects.select_for_update().filter(term=DOCUMENTS_TERM).values_list('pk')):
+        _term_ids([DOCUMENTS_TERM])
+
+
+@transaction.atomic
+def update_similar_jobs(ids, top_k=TOP_K) -> int:
+    """
+    Updates the index of the similar jobs for the created, edited or
+    deactivated jobs. Returns the number of similar jobs found for them.
+
+    The vectors of the active jobs are recomputed, with the document
+    frequencies of the index (only created jobs are counted in, edits and
+    deactivations only affect them at the next rebuild). Their candidates
+    are read with a single query over the (term, weight) index, and their
+    similar jobs are replaced. Each job is then ranked into the similar jobs of its own
+    similar jobs; the other jobs that listed it lose it until the next
+    rebuild.
+    """
+    _lock_index()
+    jobs = list(Job.objects.filter(pk__in=ids, is_active=True).values_list('pk', *TEXT_FIELDS))
+    active_ids = [job[0] for job in jobs]
+    SimilarJob.objects.filter(Q(job_id__in=ids) | Q(similar_id__in=ids)).delete()
+    indexed = set(JobTerm.objects.filter(job_id__in=ids).values_list('job_id', flat=True).distinct())
+    JobTerm.objects.filter(job_id__in=ids).delete()
+    if not jobs:
+        return 0
+
+    counts = [term_counts(job[1:]) for job in jobs]
+    terms = _term_ids({term for job_counts in counts for term in job_counts} | {DOCUMENTS_TERM})
+    new_counts = [job_counts for id, job_counts in zip(active_ids, counts) if id not in indexed]
+    if new_counts:
+        _count_documents(new_counts)
+        terms = _term_ids(list(terms))
+
+    entries = [(row, *terms[term], count) for row, job_counts in enumerate(counts)
+               for term, count in job_counts.items()]
+    if not entries:
+        return 0
+    rows, term_ids, frequencies, occurrences = (np.array(column) for column in zip(*entries))
+    rows, term_ids, weights = _weigh(rows, term_ids, occurrences, frequencies, terms[DOCUMENTS_TERM][1])
+    query_ids = np.array(active_ids, dtype=np.int64)
+    JobTerm.objects.bulk_create([
+        JobTerm(job_id=job_id, term_id=term_id, weight=weight)
+        for job_id, term_id, weight in zip(query_ids[rows].tolist(), term_ids.tolist(), weights.tolist())
+    ])
+
+    candidate_ids = _candidate_ids(np.unique(term_ids).tolist())
+    vectors = JobTerm.objects.filter(job_id__in=candidate_ids, term_id__in=term_ids.tolist()).order_by(
+        'job_id').values_list('job_id', 'term_id', 'weight')
+    candidate_ids, candidate_rows, candidate_terms, candidate_weights = (
+        np.array(sorted(candidate_ids), dtype=np.int64), *(np.array(column) for column in zip(*vectors))
+    )
+    query_rows, similar_ids, scores = _nearest(
+        (rows, term_ids, weights),
+        (np.searchsorted(candidate_ids, candidate_rows), candidate_terms, candidate_weights),
+        query_ids, candidate_ids, top_k,
+    )
+    SimilarJob.objects.bulk_create(_similar_jobs(query_ids[query_rows], similar_ids, scores))
+    if not len(similar_ids):
+        return 0
+
+    # Ranks each job into the similar jobs of its own similar jobs
+    listed_ids = np.unique(similar_ids).tolist()
+    listed = {
+        (job_id, similar_id): score
+        for job_id, similar_id, score in SimilarJob.objects.filter(job_id__in=listed_ids).values_list(
+            'job_id', 'similar_id', 'score')
+    }
+    listed.update(zip(zip(similar_ids.tolist(), query_ids[query_rows].tolist()), scores.tolist()))
+    job_ids, listed_similar_ids = (np.array(column) for column in zip(*listed))
+    job_ids, listed_similar_ids, listed_scores = top_k_per_row(
+        job_ids, listed_similar_ids, np.array(list(listed.values())), top_k
+    )
+    SimilarJob.objects.filter(job_id__in=listed_ids).delete()
+    SimilarJob.objects.bulk_create(_similar_jobs(job_ids, listed_similar_ids, listed_scores))
+    return len(similar_ids)
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """
+    Returns the thread updating the similar jobs of the saved jobs. A single
+    one, as the updates are serialized by the lock of the index anyway.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='similar-jobs')
+        return _executor
+
+
+def schedule_similar_jobs_update(ids):
+    """
+    Updates the similar jobs of the jobs from a background thread, once the
+    current transaction (if any) is committed, so that the requests saving
+    jobs do not wait for it. A failed update is logged, and leaves the
+    similar jobs of those jobs stale until they are saved again or the index
+    is rebuilt.
+    """
+    transaction.on_commit(partial(_submit_update, list(ids)))
+
+
+def _submit_update(ids):
+    if connection.in_atomic_block:
+        # The hooks of a test case run before its transaction ends, which the
+        # thread could not read
+        _update_logged(ids)
+    else:
+        get_executor().submit(_update_in_background, ids)
+
+
+def _update_in_background(ids):
+    try:
+        _update_logged(ids)
+    finally:
+        connections.close_all()
+
+
+def _update_logged(ids):
+    try:
+        update_similar_jobs(ids)
+    except Exception:
+        logger.exception('Could not update the similar jobs of the jobs %s', ids)
+
+
+def _candidate_ids(term_ids) -> set:
+    """
+    Returns the IDs of the jobs in which any of the terms is among the
+    CANDIDATES_PER_TERM heaviest, with a single query ranking the jobs of
+    each term by weight.
+    """
+    ranked = JobTerm.objects.filter(term_id__in=term_ids).annotate(
+        candidate_rank=Window(RowNumber(), partition_by=F('term_id'), order_by=F('weight').desc()),
+    ).values('job_id', 'candidate_rank')
+    # Window functions can only be filtered on from Django 4.2, hence the outer query
+    sql, params = ranked.query.sql_with_params()
+    with connections[ranked.db].cursor() as cursor:
+        cursor.execute(
+            'SELECT DISTINCT job_id FROM ({}) ranked WHERE candidate_rank <= %s'.format(sql),
+            [*params, CANDIDATES_PER_TERM],
+        )
+        return {row[0] for row in cursor.fetchall()}
+
+
+def similar_jobs(job_id) -> list:
+    """
+    Returns the active jobs most similar to the job, the most similar first,
+    each with its `score`, read with a single lookup of the index joined to
+    the job cards.
+    """
+    rows = SimilarJob.objects.filter(job_id=job_id, similar__is_active=True).select_related(
+        'similar').order_by('-score', 'similar_id')
+    data = JobCardSerializer([row.similar for row in rows], many=True).data
+    for item, row in zip(data, rows):
+        item['score'] = round(row.score, 4)
+    return data
+
+
+def delete_similar_jobs(ids):
+    # The similar jobs of the jobs themselves are deleted with them
+    return SimilarJob.objects.filter(similar_id__in=ids).delete()
@@ -0,0 +1,26 @@
+from api.logic.places import nearest, places_within
+from api.models import JobCard, Workshop
+from api.serializers import JobCardSerializer, WorkshopSerializer
+from api.utils.prefetch import apply_prefetch_plan
+
+
+def _with_distances(serializer_class, pairs):
+    data = serializer_class([row for row, _ in pairs], many=True).data
+    for item, (_, distance) in zip(data, pairs):
+        item['distance'] = round(distance, 1)
+    return data
+
+
+def nearby(latitude, longitude, radius_km, limit) -> dict:
+    """
+    Returns up to `limit` active jobs and `limit` workshops within the radius
+    of the point, the closest first, each with its distance in kilometers.
+    The jobs are read from the job cards.
+    """
+    places = places_within(latitude, longitude, radius_km)
+    jobs = nearest(JobCard.objects.filter(is_active=True), places, limit)
+    workshops = nearest(apply_prefetch_plan(Workshop.objects, WorkshopSerializer), places, limit)
+    return {
+        'jobs': _with_distances(JobCardSerializer, jobs),
+        'workshops': _with_distances(WorkshopSerializer, workshops),
+    }
@@ -0,0 +1,48 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import hashers
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """
+    Returns the pool hashing the passwords of the async views. It is bounded
+    by PASSWORD_HASHING_WORKERS, so that a burst of logins is queued there
+    instead of taking every CPU of the worker. Hashing releases the GIL, so
+    the event loop keeps serving the other requests meanwhile.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.PASSWORD_HASHING_WORKERS,
+                thread_name_prefix='password-hashing',
+            )
+        return _executor
+
+
+async def _run(func, *args):
+    return await asyncio.get_running_loop().run_in_executor(get_executor(), func, *args)
+
+
+async def make_password(raw_password: str) -> str:
+    return await _run(hashers.make_password, raw_password)
+
+
+async def check_password(user, raw_password: str) -> bool:
+    """
+    Async version of `user.check_password`, which also upgrades the stored
+    hash when the hasher or its parameters have changed.
+    """
+    needs_upgrade = []
+    valid = await _run(hashers.check_password, raw_password, user.password, needs_upgrade.append)
+    if valid and needs_upgrade:
+        user.password = await make_password(raw_password)
+        await sync_to_async(user.save)(update_fields=['password'])
+    return valid
@@ -0,0 +1,172 @@
+import csv
+import math
+from functools import lru_cache
+from pathlib import Path
+
+from django.db import transaction
+from django.db.models import Q
+
+from api.models import Place
+
+# The bundled gazetteer, with a row per place: its name, ISO country code,
+# coordinates, and other names separated by '|'
+PLACES_CSV = Path(__file__).resolve().parent.parent / 'data' / 'places.csv'
+
+EARTH_RADIUS_KM = 6371.0088
+# Length of a degree of latitude, and of longitude at the equator
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+
+def normalize_location(location: str) -> str:
+    return ' '.join(location.casefold().split())
+
+
+def read_places(path=PLACES_CSV) -> list:
+    with open(path, newline='', encoding='utf-8') as file:
+        return [
+            {
+                'name': row['name'],
+                'country': row['country'],
+                'latitude': float(row['latitude']),
+                'longitude': float(row['longitude']),
+                'aliases': row['aliases'],
+            }
+            for row in csv.DictReader(file)
+        ]
+
+
+def load_places(path=PLACES_CSV) -> int:
+    """
+    Creates or updates the places of the gazetteer from the CSV file, and
+    returns their number. Places missing from the file are kept, as the
+    locations may point to them.
+    """
+    rows = read_places(path)
+    with transaction.atomic():
+        for row in rows:
+            Place.objects.update_or_create(name=row['name'], country=row['country'], defaults=row)
+    _gazetteer.cache_clear()
+    return len(rows)
+
+
+@lru_cache(maxsize=None)
+def _gazetteer() -> dict:
+    """
+    Returns the ID of the place of every normalized place name and alias.
+    The gazetteer only changes with `manage.py load_places`, so it is read
+    once per process.
+    """
+    places = {}
+    for id, name, aliases in Place.objects.order_by('pk').values_list('id', 'name', 'aliases'):
+        for key in [name, *aliases.split('|')]:
+            places.setdefault(normalize_location(key), id)
+    places.pop('', None)
+    return places
+
+
+def resolve_place_id(location: str):
+    """
+    Returns the ID of the place of a free-text location, e.g. "Kuala Lumpur",
+    "KL" or "Jakarta, Indonesia", or None if it is not in the gazetteer
+    (e.g. "Remote").
+    """
+    key = normalize_location(location or '')
+    if not key:
+        return None
+    places = _gazetteer()
+    if key in places:
+        return places[key]
+    # Drops the region or country following the place name
+    return places.get(key.split(',')[0].strip())
+
+
+def link_places(model) -> int:
+    """
+    Resolves the place of every row of the model (a model with `location`
+    and `place` fields) from its location, with an UPDATE per distinct
+    location. Returns the number of rows whose place changed.
+    """
+    linked = 0
+    locations = model.objects.order_by().values_list('location', flat=True).distinct()
+    for location in list(locations):
+        place_id = resolve_place_id(location)
+        rows = model.objects.filter(location=location)
+        if place_id is None:
+            linked += rows.filter(place__isnull=False).update(place=None)
+        else:
+            linked += rows.exclude(place_id=place_id).update(place_id=place_id)
+    return linked
+
+
+def haversine_km(latitude1, longitude1, latitude2, longitude2) -> float:
+    """
+    Returns the great-circle distance between two points, in kilometers.
+    """
+    phi1, phi2 = math.radians(latitude1), math.radians(latitude2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(longitude2 - longitude1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def bounding_box(latitude, longitude, radius_km) -> Q:
+    """
+    Returns the lookups of the places within the bounding box of the circle,
+    which contains every place within the radius and can be answered with
+    the index on the coordinates. Longitudes wrapping around the
+    antimeridian are split into two ranges.
+    """
+    d_latitude = radius_km / KM_PER_DEGREE
+    min_latitude, max_latitude = latitude - d_latitude, latitude + d_latitude
+    if min_latitude <= -90 or max_latitude >= 90:
+        # The circle contains a pole, and thus every longitude
+        return Q(latitude__range=(max(min_latitude, -90), min(max_latitude, 90)))
+
+    # At the latitude of the circle farthest from the equator, where the
+    # degrees of longitude are the shortest
+    widest = max(abs(min_latitude), abs(max_latitude))
+    d_longitude = radius_km / (KM_PER_DEGREE * math.cos(math.radians(widest)))
+    box = Q(latitude__range=(min_latitude, max_latitude))
+    if d_longitude >= 180:
+        return box
+    min_longitude, max_longitude = longitude - d_longitude, longitude + d_longitude
+    if min_longitude < -180:
+        longitudes = Q(longitude__gte=min_longitude + 360) | Q(longitude__lte=max_longitude)
+    elif max_longitude > 180:
+        longitudes = Q(longitude__gte=min_longitude) | Q(longitude__lte=max_longitude - 360)
+    else:
+        longitudes = Q(longitude__range=(min_longitude, max_longitude))
+    return box & longitudes
+
+
+def places_within(latitude, longitude, radius_km) -> list:
+    """
+    Returns the places within the radius as (place, distance) pairs, the
+    closest first: the bounding box is read through the index, and the exact
+    distances are then computed for the places in it.
+    """
+    places = []
+    for place in Place.objects.filter(bounding_box(latitude, longitude, radius_km)):
+        distance = haversine_km(latitude, longitude, place.latitude, place.longitude)
+        if distance <= radius_km:
+            places.append((place, distance))
+    places.sort(key=lambda pair: (pair[1], pair[0].pk))
+    return places
+
+
+def nearest(queryset, places, limit) -> list:
+    """
+    Returns up to `limit` (row, distance) pairs from the queryset, whose
+    model has a `place`: the rows of the closest places first, the most
+    recently updated first within a place. Each place is read through the
+    (place, updated_at, id) index of the model, and only until the limit is
+    reached, however many rows the places have.
+    """
+    results = []
+    for place, distance in places:
+        remaining = limit - len(results)
+        if remaining <= 0:
+            break
+        rows = queryset.filter(place_id=place.pk).order_by('-updated_at', '-id')[:remaining]
+        results.extend((row, distance) for row in rows)
+    return results
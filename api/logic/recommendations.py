@@ -0,0 +1,34 @@
+from collections import defaultdict
+
+from api.models import JobCard, JobNeighbor, UserProfile
+from api.serializers import JobCardSerializer
+
+
+def recommended_jobs(username, limit) -> list:
+    """
+    Returns up to `limit` active jobs recommended to the user, the best
+    first, each with its `score`: the neighbours of the jobs the user saved
+    (see api.logic.job_neighbors), scored by the sum of their similarities
+    to the saved jobs. The jobs already saved are left out. Users who saved
+    no job get no recommendations.
+    """
+    through = UserProfile.saved_jobs.through
+    saved = set(through.objects.filter(userprofile__user__username=username).values_list('job_id', flat=True))
+    if not saved:
+        return []
+
+    scores = defaultdict(float)
+    for neighbor_id, score in JobNeighbor.objects.filter(job_id__in=saved).values_list('neighbor_id', 'score'):
+        if neighbor_id not in saved:
+            scores[neighbor_id] += score
+    ranked = sorted(scores, key=lambda id: (-scores[id], id))
+
+    # The neighbours are rebuilt periodically, and may have been deactivated since
+    active = set(JobCard.objects.filter(id__in=ranked, is_active=True).values_list('id', flat=True))
+    top = [id for id in ranked if id in active][:limit]
+    cards = JobCard.objects.in_bulk(top)
+    top = [id for id in top if id in cards]
+    data = JobCardSerializer([cards[id] for id in top], many=True).data
+    for item, id in zip(data, top):
+        item['score'] = round(scores[id], 4)
+    return data
@@ -0,0 +1,165 @@
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from api.logic.trending_workshops import trending_score_change
+from api.logic.workshop_calendar import invalidate_saved_workshops
+from api.models import SavedWorkshop, UserProfile, Workshop
+from api.utils.cache import invalidate_tags
+
+# The UserProfile many-to-many field holding each type of saved item
+SAVED_ITEM_FIELDS = {
+    'job': 'saved_jobs',
+    'work_experience': 'saved_experiences',
+    'workshop': 'saved_workshops',
+}
+
+
+def annotate_saved_counts(queryset):
+    """
+    Annotates each user profile of the queryset with the number of items it
+    saved of each type, as `<field name>_count` (e.g. `saved_jobs_count`),
+    using correlated subqueries rather than loading the saved items.
+    """
+    counts = {}
+    for field_name in SAVED_ITEM_FIELDS.values():
+        through = UserProfile._meta.get_field(field_name).remote_field.through
+        saved = through.objects.filter(userprofile_id=OuterRef('pk')).order_by().values('userprofile_id')
+        counts['{}_count'.format(field_name)] = Coalesce(
+            Subquery(saved.annotate(count=Count('*')).values('count')), 0
+        )
+    return queryset.annotate(**counts)
+
+
+@transaction.atomic
+def apply_saved_items(profile: UserProfile, items: list) -> dict:
+    """
+    Saves and unsaves a mixed list of items for the user profile.
+
+    Each item is a dict with the `type` of the item (a key of
+    SAVED_ITEM_FIELDS), its `id`, and whether to `save` or unsave it. If an
+    item appears more than once, the last occurrence wins. The changes are
+    applied with one set-based insert and one set-based delete on each
+    through table, and the workshop save counters and trending scores are
+    updated in aggregate. The profile is locked first, so that concurrent
+    changes to its saved items cannot be counted twice.
+    """
+    requested = {item_type: {} for item_type in SAVED_ITEM_FIELDS}
+    for item in items:
+        requested[item['type']][item['id']] = item['save']
+    _lock_profile(profile.pk)
+    # The unsaves take back the weight the saves added to the trending scores
+    workshop_saves = SavedWorkshop.objects.filter(userprofile_id=profile.pk)
+    saved_at = dict(workshop_saves.filter(workshop_id__in=requested['workshop']).values_list('workshop_id', 'saved_at'))
+
+    result = {'saved': {}, 'unsaved': {}, 'not_found': {}}
+    for item_type, field_name in SAVED_ITEM_FIELDS.items():
+        changes = requested[item_type]
+        if not changes:
+            continue
+        saved, unsaved, not_found = _apply_changes(profile, field_name, changes)
+        result['saved'][item_type] = saved
+        result['unsaved'][item_type] = unsaved
+        result['not_found'][item_type] = not_found
+
+    workshops_saved = result['saved'].get('workshop', [])
+    workshops_unsaved = result['unsaved'].get('workshop', [])
+    if workshops_saved:
+        update_workshop_saves(dict(workshop_saves.filter(workshop_id__in=workshops_saved).values_list(
+            'workshop_id', 'saved_at')), 1)
+    update_workshop_saves({id: saved_at[id] for id in workshops_unsaved}, -1)
+    if workshops_saved or workshops_unsaved:
+        invalidate_saved_workshops(profile.pk)
+    return result
+
+
+def _lock_profile(profile_id):
+    """
+    Locks the row of the user profile until the end of the transaction,
+    which serializes the changes to its saved items: the saved items read
+    after the lock are those the changes apply to.
+    """
+    list(UserProfile.objects.select_for_update().filter(pk=profile_id).values_list('pk'))
+
+
+def _apply_changes(profile, field_name, changes):
+    field = UserProfile._meta.get_field(field_name)
+    through = field.remote_field.through
+    model = field.related_model
+    source = '{}_id'.format(field.m2m_field_name())
+    target = '{}_id'.format(field.m2m_reverse_field_name())
+
+    existing = set(model.objects.filter(pk__in=changes.keys()).values_list('pk', flat=True))
+    not_found = sorted(set(changes) - existing)
+    rows = through.objects.filter(**{source: profile.pk, target + '__in': existing})
+    already_saved = set(rows.values_list(target, flat=True))
+
+    to_save = sorted(id for id in existing if changes[id] and id not in already_saved)
+    to_unsave = sorted(id for id in existing if not changes[id] and id in already_saved)
+    if to_save:
+        through.objects.bulk_create(
+            [through(**{source: profile.pk, target: id}) for id in to_save],
+            ignore_conflicts=True,
+        )
+    if to_unsave:
+        through.objects.filter(**{source: profile.pk, target + '__in': to_unsave}).delete()
+    return to_save, to_unsave, not_found
+
+
+@transaction.atomic
+def save_workshop(profile_id, workshop_id) -> bool:
+    """
+    Saves the workshop for the user profile, and increments its save counter
+    and trending score if it was not saved yet. Returns whether the workshop
+    was newly saved.
+
+    Membership is checked on the unique (userprofile, workshop) row of the
+    through table, with the profile locked as by apply_saved_items, so
+    concurrent saves of the same workshop cannot be counted twice. The
+    profile is identified by its primary key, which is the id of its user.
+    """
+    _lock_profile(profile_id)
+    save, created = SavedWorkshop.objects.get_or_create(userprofile_id=profile_id, workshop_id=workshop_id)
+    if created:
+        update_workshop_saves({workshop_id: save.saved_at}, 1)
+        invalidate_saved_workshops(profile_id)
+    return created
+
+
+@transaction.atomic
+def unsave_workshop(profile_id, workshop_id) -> bool:
+    """
+    Unsaves the workshop for the user profile, and decrements its save
+    counter if it was saved. The weight of the save is taken back from its
+    trending score. Returns whether the workshop was saved.
+    """
+    _lock_profile(profile_id)
+    saves = SavedWorkshop.objects.filter(userprofile_id=profile_id, workshop_id=workshop_id)
+    saved_at = saves.values_list('saved_at', flat=True).first()
+    deleted, _ = saves.delete()
+    if deleted:
+        update_workshop_saves({workshop_id: saved_at}, -1)
+        invalidate_saved_workshops(profile_id)
+    return bool(deleted)
+
+
+def update_workshop_saves(saved_at, delta):
+    """
+    Adds `delta` to the save counter of each of the workshops, and `delta`
+    times the weight of its save to its trending score (see
+    api.logic.trending_workshops), with a single database-side UPDATE.
+    `saved_at` maps the ID of each workshop to the time it was saved.
+
+    `updated_at` is left alone, so that the saves do not move the workshops
+    across the pages of the lists, nor evict every cached list. The details
+    of the workshops, and the responses ranked by the saves (tagged
+    `workshop-saves`), are refreshed; the counters shown by the cached lists
+    are refreshed within API_CACHE_TIMEOUT.
+    """
+    if not saved_at:
+        return
+    Workshop.objects.filter(pk__in=saved_at).update(
+        saves=F('saves') + delta,
+        trending_score=trending_score_change(saved_at, delta),
+    )
+    invalidate_tags('workshop-saves', *('workshop:{}'.format(id) for id in saved_at))
@@ -0,0 +1,103 @@
+import datetime
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, F, FloatField, Value, When
+from django.utils import timezone
+
+from api.models import SavedWorkshop, Workshop
+from api.utils.cache import invalidate_tags
+
+# The trending scores are stored relative to this date: a save weighs
+# 2 ** (half-lives since EPOCH), so that older saves never have to be decayed
+# and the scores keep the order of the decayed ones. With a half-life of a
+# week, the weights overflow around 2043, before which EPOCH has to be moved
+# forward and the scores rebuilt.
+EPOCH = datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc)
+BATCH_SIZE = 5000
+
+
+def _half_lives(times):
+    """
+    Returns the number of half-lives from EPOCH to each of the times, given
+    as seconds since the Unix epoch.
+    """
+    return (times - EPOCH.timestamp()) / (settings.TRENDING_HALF_LIFE_DAYS * 86400)
+
+
+def save_weight(saved_at) -> float:
+    """
+    Returns the weight of a save made at `saved_at` in the trending scores.
+    """
+    return float(np.exp2(_half_lives(saved_at.timestamp())))
+
+
+def decay(score, now=None) -> float:
+    """
+    Returns the trending score decayed to `now`, i.e. the number of saves
+    made now that it is worth.
+    """
+    now = now or timezone.now()
+    return float(score * np.exp2(-_half_lives(now.timestamp())))
+
+
+def trending_score_change(saved_at, delta):
+    """
+    Returns the expression adding `delta` times the weight of the saves to
+    the trending score of each workshop, for an UPDATE of the workshops.
+    `saved_at` maps the ID of each workshop to the time of its save.
+    """
+    weights = {id: delta * save_weight(time) for id, time in saved_at.items()}
+    if len(set(weights.values())) == 1:
+        change = Value(next(iter(weights.values())))
+    else:
+        change = Case(*(When(pk=id, then=Value(weight)) for id, weight in weights.items()),
+                      output_field=FloatField())
+    return F('trending_score') + change
+
+
+def trending_workshops(queryset, limit):
+    """
+    Returns up to `limit` workshops of the queryset with the highest trending
+    scores, the best first. They are read from the start of the index of the
+    scores, which the saves keep sorted as they update them, rather than by
+    sorting the workshops.
+    """
+    return queryset.filter(trending_score__gt=0).order_by('-trending_score', 'id')[:limit]
+
+
+def rebuild_trending_scores(batch_size=BATCH_SIZE) -> int:
+    """
+    Recomputes the trending score of every workshop by replaying its saves.
+    Returns the number of saves replayed.
+
+    The workshops are locked first, so that the saves made during the
+    rebuild wait for it, and then add their weight to the rebuilt scores.
+    """
+    with transaction.atomic():
+        workshop_ids = np.fromiter(
+            Workshop.objects.select_for_update().order_by('pk').values_list('pk', flat=True).iterator(),
+            dtype=np.int64,
+        )
+        if not len(workshop_ids):
+            return 0
+        saves = SavedWorkshop.objects.values_list('workshop_id', 'saved_at').iterator(chunk_size=batch_size)
+        rows = np.fromiter(((id, time.timestamp()) for id, time in saves),
+                           dtype=[('workshop_id', np.int64), ('saved_at', np.float64)])
+        # The workshops created since they were locked keep the scores their saves gave them
+        rows = rows[np.isin(rows['workshop_id'], workshop_ids)]
+        scores = np.zeros(len(workshop_ids))
+        np.add.at(scores, np.searchsorted(workshop_ids, rows['workshop_id']), np.exp2(_half_lives(rows['saved_at'])))
+
+        Workshop.objects.filter(pk__lte=workshop_ids[-1]).exclude(trending_score=0).update(trending_score=0)
+        scored = np.flatnonzero(scores)
+        for start in range(0, len(scored), batch_size):
+            batch = scored[start:start + batch_size]
+            Workshop.objects.bulk_update(
+                [Workshop(pk=id, trending_score=score)
+                 for id, score in zip(workshop_ids[batch].tolist(), scores[batch].tolist())],
+                ['trending_score'],
+            )
+        invalidate_tags('workshop-saves')
+    return len(rows)
@@ -2,7 +2,7 @@ from django.db import transaction, IntegrityError
 from django.contrib.auth.models import User
 from django.http import HttpResponseBadRequest
 
-from rest_framework.exceptions import APIException
+from rest_framework.exceptions import APIException, AuthenticationFailed
 from rest_framework_simplejwt.tokens import RefreshToken
 
 from api.models import (
@@ -21,14 +21,27 @@ def register_user(
     password: str,
     name: str,
     id=None,
+    hashed: bool = False,
 ) -> dict:
+    """
+    Registers a new user with its profile. With `hashed`, the password is
+    taken as already hashed (e.g. by `make_password` in a worker pool)
+    instead of being hashed here.
+    """
 
     try:
-        user = User.objects.create_user(
-            username=username,
-            email=email,
-            password=password,
-        )
+        if hashed:
+            user = User(
+                username=User.normalize_username(username),
+                email=User.objects.normalize_email(email),
+                password=password,
+            )
+        else:
+            user = User.objects.create_user(
+                username=username,
+                email=email,
+                password=password,
+            )
         user.save()
 
     except IntegrityError:
@@ -53,6 +66,33 @@ def register_user(
         'id': user.id,
     }
 
+def find_login_user(username: str) -> User:
+    """
+    Returns the user logging in with the username, or email address if it
+    contains an @. Raises AuthenticationFailed if there is none.
+    """
+    if "@" in username:
+        user = User.objects.filter(email=username).first()
+    else:
+        user = User.objects.filter(username=username).first()
+    if user is None:
+        raise AuthenticationFailed(detail="User not found")
+    return user
+
+
+def login_details(user: User) -> dict:
+    """
+    Returns the tokens and details sent to a user who logged in.
+    """
+    refresh = RefreshToken.for_user(user)
+    return {
+        'refresh': str(refresh),
+        'access': str(refresh.access_token),
+        'username': user.username,
+        'email': user.email,
+        'id': user.id,
+    }
+
 @transaction.atomic
 def update_user(
     user: User,
@@ -0,0 +1,173 @@
+import datetime
+import hashlib
+import secrets
+
+from django.conf import settings
+
+from api.models import UserProfile, Workshop
+from api.utils.cache import ANY_TAG, get_cache, get_cached_data, get_tag_versions, invalidate_tags, set_cached_data
+from api.utils.replicas import read_from_primary
+
+EVENT_KEY_PREFIX = 'api:ical-event:'
+FEED_KEY_PREFIX = 'api:ical-feed:'
+PRODUCT_ID = '-//Feminnovate//Saved workshops//EN'
+# Lines are folded at 75 octets (RFC 5545, section 3.1)
+LINE_LENGTH = 75
+
+
+def saved_workshops_tag(profile_id) -> str:
+    return 'saved-workshops:{}'.format(profile_id)
+
+
+def invalidate_saved_workshops(*profile_ids):
+    """
+    Invalidates the calendar feeds of the user profiles, whose saved
+    workshops changed.
+    """
+    invalidate_tags(*(saved_workshops_tag(id) for id in profile_ids))
+
+
+def _hash_token(token) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def regenerate_calendar_token(profile_id):
+    """
+    Gives the user profile a new secret token for the URL of its calendar
+    feed, which revokes the previous one, and returns it (None if there is no
+    such profile). Only the hash of the token is stored.
+    """
+    token = secrets.token_urlsafe(32)
+    updated = UserProfile.objects.filter(pk=profile_id).update(calendar_token_hash=_hash_token(token))
+    return token if updated else None
+
+
+def revoke_calendar_token(profile_id) -> bool:
+    """
+    Revokes the token of the calendar feed of the user profile. Returns
+    whether it had one.
+    """
+    return bool(UserProfile.objects.filter(pk=profile_id, calendar_token_hash__isnull=False).update(
+        calendar_token_hash=None))
+
+
+def calendar_profile_id(token):
+    """
+    Returns the ID of the user profile whose calendar feed the token opens,
+    or None.
+    """
+    return UserProfile.objects.filter(calendar_token_hash=_hash_token(token)).values_list('pk', flat=True).first()
+
+
+def _escape(text) -> str:
+    return (text.replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,')
+            .replace('\r\n', '\\n').replace('\n', '\\n'))
+
+
+def _fold(line) -> str:
+    """
+    Folds a content line into lines of at most LINE_LENGTH octets, without
+    splitting a UTF-8 character.
+    """
+    folded, current, size = [], '', 0
+    for char in line:
+        char_size = len(char.encode())
+        if size + char_size > LINE_LENGTH:
+            folded.append(current)
+            # Continuation lines start with a space, which counts towards their length
+            current, size = ' ', 1
+        current += char
+        size += char_size
+    folded.append(current)
+    return '\r\n'.join(folded)
+
+
+def render_event(workshop) -> str:
+    """
+    Returns the VEVENT of the workshop, as an all-day event from its start
+    date to its end date (the end of an all-day event being exclusive).
+    """
+    end = workshop.end_time if workshop.end_time >= workshop.start_time else workshop.start_time
+    lines = [
+        'BEGIN:VEVENT',
+        'UID:workshop-{}@feminnovate'.format(workshop.pk),
+        'DTSTAMP:{:%Y%m%dT%H%M%SZ}'.format(workshop.updated_at.astimezone(datetime.timezone.utc)),
+        'DTSTART;VALUE=DATE:{:%Y%m%d}'.format(workshop.start_time),
+        'DTEND;VALUE=DATE:{:%Y%m%d}'.format(end + datetime.timedelta(days=1)),
+        'SUMMARY:{}'.format(_escape(workshop.title)),
+    ]
+    description = '\n\n'.join(text for text in (workshop.description, workshop.organizer.name) if text)
+    if description:
+        lines.append('DESCRIPTION:{}'.format(_escape(description)))
+    if workshop.location:
+        lines.append('LOCATION:{}'.format(_escape(workshop.location)))
+    if workshop.website:
+        lines.append('URL:{}'.format(workshop.website))
+    lines.append('END:VEVENT')
+    return ''.join(_fold(line) + '\r\n' for line in lines)
+
+
+def _event_key(id, updated_at, organizer_updated_at) -> str:
+    return '{}{}:{}:{}'.format(EVENT_KEY_PREFIX, id, updated_at.timestamp(), organizer_updated_at.timestamp())
+
+
+def saved_workshops_calendar(profile_id) -> str:
+    """
+    Returns the iCalendar feed of the workshops saved by the user profile,
+    the earliest first.
+
+    The feed is cached until the saved workshops, or any of them or of their
+    organizers, change. It is then rebuilt incrementally: the events are
+    cached by the version of their workshop and organizer, so that only the
+    events of the workshops that changed are rendered again.
+    """
+    key = FEED_KEY_PREFIX + str(profile_id)
+    feed = get_cached_data(key)
+    if feed is not None:
+        return feed
+
+    # The feed is cached, it is built from the primary rather than a lagging replica
+    read_from_primary()
+    # Read before the workshops, so that a concurrent change invalidates the new entry
+    versions = get_tag_versions([saved_workshops_tag(profile_id), ANY_TAG])
+    written = versions.pop(ANY_TAG)
+    through = UserProfile.saved_workshops.through
+    rows = list(Workshop.objects.filter(
+        pk__in=through.objects.filter(userprofile_id=profile_id).values('workshop_id')
+    ).order_by('start_time', 'id').values_list('pk', 'updated_at', 'organizer_id', 'organizer__updated_at'))
+    # Read after the workshops, so the feed is not cached if any tag has been
+    # invalidated meanwhile, as cache_response does
+    row_versions = get_tag_versions(
+        ['workshop:{}'.format(id) for id, _, _, _ in rows]
+        + sorted({'company:{}'.format(organizer_id) for _, _, organizer_id, _ in rows})
+        + [ANY_TAG]
+    )
+    cacheable = row_versions.pop(ANY_TAG) == written
+    versions.update(row_versions)
+
+    keys = {id: _event_key(id, updated_at, organizer_updated_at)
+            for id, updated_at, _, organizer_updated_at in rows}
+    cache = get_cache()
+    cached = cache.get_many(keys.values())
+    events = {id: cached[key] for id, key in keys.items() if key in cached}
+    missing = [id for id in keys if id not in events]
+    if missing:
+        rendered = {}
+        for workshop in Workshop.objects.filter(pk__in=missing).select_related('organizer'):
+            events[workshop.pk] = render_event(workshop)
+            rendered[_event_key(workshop.pk, workshop.updated_at, workshop.organizer.updated_at)] = events[workshop.pk]
+        cache.set_many(rendered, settings.API_CACHE_TIMEOUT)
+
+    feed = ''.join([
+        'BEGIN:VCALENDAR\r\n',
+        'VERSION:2.0\r\n',
+        'PRODID:{}\r\n'.format(PRODUCT_ID),
+        'CALSCALE:GREGORIAN\r\n',
+        'X-WR-CALNAME:Saved workshops\r\n',
+        # Workshops deleted since they were read are left out
+        *(events[id] for id in keys if id in events),
+        'END:VCALENDAR\r\n',
+    ])
+    if cacheable:
+        set_cached_data(key, feed, versions)
+    return feed
@@ -0,0 +1,101 @@
+import json
+import platform
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from api.benchmarks import seed
+from api.benchmarks.database import benchmark_database
+from api.benchmarks.runner import ScenarioRunner, compare
+from api.benchmarks.scenarios import SCENARIOS, SKIPPED_ROUTES, get_context, uncovered_routes
+from api.urls import urlpatterns
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmarks every route of the API on a synthetic dataset, reporting "
+        "the latency percentiles, query count and peak memory of each request, "
+        "and comparing them with a baseline. The dataset is seeded into a "
+        "separate benchmark database, next to the configured one."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', choices=list(seed.SCALES), default='1k', help="Size of the dataset.")
+        parser.add_argument('--iterations', type=int, default=20, help="Timed runs per scenario.")
+        parser.add_argument('--warmup', type=int, default=2, help="Untimed runs per scenario.")
+        parser.add_argument('--only', help="Only runs the scenarios whose name contains this text.")
+        parser.add_argument('--keepdb', action='store_true',
+                            help="Keeps the benchmark database, and its dataset, for the next run.")
+        parser.add_argument('--reseed', action='store_true', help="Seeds the dataset even if it is already there.")
+        parser.add_argument('--random-seed', type=int, default=0, help="Seed of the generated dataset.")
+        parser.add_argument('--warm-cache', action='store_true',
+                            help="Keeps the response cache between runs, instead of clearing it before each run.")
+        parser.add_argument('--output', help="Writes the results to this JSON file, e.g. to use as a baseline.")
+        parser.add_argument('--baseline', help="Compares the results with those of this JSON file.")
+        parser.add_argument('--threshold', type=float, default=0.25,
+                            help="Relative growth of the median latency reported as a regression.")
+
+    def handle(self, *args, **options):
+        missing = uncovered_routes(urlpatterns)
+        if missing:
+            raise CommandError("No benchmark scenario for the route(s): {}".format(', '.join(missing)))
+        scenarios = [s for s in SCENARIOS if not options['only'] or options['only'] in s.name]
+
+        with benchmark_database(options['keepdb']):
+            if options['reseed'] or not seed.is_seeded(options['scale']):
+                started = time.perf_counter()
+                seed.seed(options['scale'], options['random_seed'], log=self.stdout.write)
+                self.stdout.write("Seeded in {:.1f}s".format(time.perf_counter() - started))
+
+            runner = ScenarioRunner(get_context(), options['iterations'], options['warmup'],
+                                    cold_cache=not options['warm_cache'])
+            results = {}
+            self.stdout.write('{:<28}{:>7}{:>10}{:>10}{:>10}{:>9}{:>11}'.format(
+                'scenario', 'status', 'p50 ms', 'p95 ms', 'p99 ms', 'queries', 'peak KB'))
+            for scenario in scenarios:
+                result = results[scenario.name] = runner.run(scenario)
+                line = '{:<28}{:>7}{:>10.1f}{:>10.1f}{:>10.1f}{:>9}{:>11.0f}'.format(
+                    scenario.name, result['status'], result['p50_ms'], result['p95_ms'], result['p99_ms'],
+                    result['queries'], result['peak_kb'])
+                self.stdout.write(line if result['ok'] else self.style.ERROR(line))
+            for route, reason in SKIPPED_ROUTES.items():
+                self.stdout.write("Skipped {}: {}".format(route, reason))
+
+        report = {
+            'meta': {
+                'scale': options['scale'],
+                'database': connection.vendor,
+                'iterations': options['iterations'],
+                'cold_cache': not options['warm_cache'],
+                'python': platform.python_version(),
+            },
+            'results': results,
+        }
+        if options['output']:
+            with open(options['output'], 'w') as file:
+                json.dump(report, file, indent=2, sort_keys=True)
+        # The timings of failed scenarios measure errors, they are not compared
+        failed = [name for name, result in results.items() if not result['ok']]
+        if failed:
+            raise CommandError("Scenario(s) answered with a status other than 2xx: {}".format(', '.join(failed)))
+        if options['baseline']:
+            self.compare_baseline(report, options['baseline'], options['threshold'])
+
+    def compare_baseline(self, report, path, threshold):
+        with open(path) as file:
+            baseline = json.load(file)
+        if baseline['meta']['scale'] != report['meta']['scale'] or \
+                baseline['meta']['database'] != report['meta']['database']:
+            self.stdout.write(self.style.WARNING("The baseline was measured on a different scale or database"))
+
+        rows = compare(report['results'], baseline['results'], threshold)
+        self.stdout.write('\n{:<28}{:>12}{:>9}'.format('scenario', 'p50 change', 'queries'))
+        for row in rows:
+            line = '{:<28}{:>+11.0%}{:>+9}'.format(row['name'], row['p50_change'], row['queries_change'])
+            self.stdout.write(self.style.ERROR(line) if row['regression'] else line)
+
+        regressions = [row['name'] for row in rows if row['regression']]
+        if regressions:
+            raise CommandError("Regression(s) against the baseline: {}".format(', '.join(regressions)))
+        self.stdout.write(self.style.SUCCESS("No regression against the baseline"))
@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand
+
+from api.benchmarks import seed
+from api.benchmarks.database import benchmark_database
+from api.benchmarks.login_storm import async_views, run_asgi, run_wsgi
+from api.benchmarks.scenarios import get_context
+
+
+class Command(BaseCommand):
+    help = (
+        "Measures the latency of read requests while other clients keep "
+        "logging in, on a single sync WSGI worker with the sync views, and on "
+        "the ASGI application with the async views. Runs on the 1k dataset of "
+        "the benchmark database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clients', type=int, default=8, help="Number of clients logging in concurrently.")
+        parser.add_argument('--reads', type=int, default=50, help="Number of read requests measured per run.")
+        parser.add_argument('--keepdb', action='store_true', help="Keeps the benchmark database for the next run.")
+
+    def handle(self, *args, **options):
+        with benchmark_database(options['keepdb']):
+            if not seed.is_seeded('1k'):
+                seed.seed('1k')
+            context = get_context()
+            read_paths = ['/api/job/{}/'.format(context['job']), '/api/job/?page_size=12',
+                          '/api/workshop/{}/'.format(context['workshop'])]
+            credentials = {'username': context['username'], 'password': seed.PASSWORD}
+
+            self.stdout.write('{:<6}{:<8}{:>8}{:>14}{:>14}{:>10}'.format(
+                'server', 'logins', 'reads', 'read p50 ms', 'read p95 ms', 'logins/s'))
+            for server, run, use_async_views in [('wsgi', run_wsgi, False), ('asgi', run_asgi, True)]:
+                with async_views(use_async_views):
+                    for clients in (0, options['clients']):
+                        result = run(read_paths, credentials, context['access'], clients, options['reads'])
+                        self.stdout.write('{:<6}{:<8}{:>8}{:>14.1f}{:>14.1f}{:>10.1f}'.format(
+                            server, clients, result['reads'], result['read_p50_ms'], result['read_p95_ms'],
+                            result['logins_per_s']))
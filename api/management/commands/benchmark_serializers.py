@@ -0,0 +1,90 @@
+import datetime
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+
+from api.models import Company, Job, Workshop
+from api.serializers import JobListSerializer, JobSerializer, WorkshopSerializer
+from api.utils.fast_serializers import drf_serialization
+from api.utils.prefetch import apply_prefetch_plan
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Compares the fast read serializers with the plain DRF serializers on "
+        "generated jobs and workshops, and checks that both render the same "
+        "JSON. The generated rows are rolled back afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=10000, help="Number of jobs and of workshops.")
+        parser.add_argument('--repeat', type=int, default=3, help="Runs per serializer, the best is reported.")
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self.seed(options['rows'])
+                self.compare(options['repeat'])
+                raise Rollback
+        except Rollback:
+            pass
+
+    def seed(self, rows):
+        companies = Company.objects.bulk_create([
+            Company(name='Company {}'.format(i), description='Description of company {}'.format(i),
+                    picture='https://example.com/{}.png'.format(i), website='https://example.com/{}'.format(i))
+            for i in range(max(rows // 100, 1))
+        ])
+        Job.objects.bulk_create([
+            Job(title='Job {}'.format(i), description='Description of job {}'.format(i) * 5,
+                responsibilities='Responsibilities', qualifications='Qualifications',
+                company=companies[i % len(companies)], salary=1000 + i, location='Singapore')
+            for i in range(rows)
+        ], batch_size=1000)
+        start = datetime.date(2023, 1, 1)
+        Workshop.objects.bulk_create([
+            Workshop(organizer=companies[i % len(companies)], title='Workshop {}'.format(i),
+                     description='Description of workshop {}'.format(i), location='Singapore',
+                     start_time=start + datetime.timedelta(days=i % 365),
+                     end_time=start + datetime.timedelta(days=i % 365 + 1))
+            for i in range(rows)
+        ], batch_size=1000)
+
+    def compare(self, repeat):
+        self.stdout.write('{:<22}{:<10}{:>10}{:>10}{:>9}'.format('serializer', 'input', 'drf (s)', 'fast (s)', 'speedup'))
+        for serializer_class, model in [
+            (JobListSerializer, Job),
+            (JobSerializer, Job),
+            (WorkshopSerializer, Workshop),
+        ]:
+            queryset = apply_prefetch_plan(model.objects.order_by('-updated_at', '-id'), serializer_class)
+            instances = list(queryset)
+            for label, data in [('queryset', lambda: queryset.all()), ('instances', lambda: instances)]:
+                drf, drf_time = self.measure(serializer_class, data, repeat, fast=False)
+                fast, fast_time = self.measure(serializer_class, data, repeat, fast=True)
+                if JSONRenderer().render(drf) != JSONRenderer().render(fast):
+                    raise CommandError("{} renders different JSON on {}".format(serializer_class.__name__, label))
+                self.stdout.write('{:<22}{:<10}{:>10.3f}{:>10.3f}{:>8.1f}x'.format(
+                    serializer_class.__name__, label, drf_time, fast_time, drf_time / fast_time,
+                ))
+        self.stdout.write(self.style.SUCCESS("The fast serializers render the same JSON as DRF"))
+
+    def measure(self, serializer_class, data, repeat, fast):
+        best = None
+        for _ in range(repeat):
+            items = data()
+            started = time.perf_counter()
+            if fast:
+                result = serializer_class(items, many=True).data
+            else:
+                with drf_serialization():
+                    result = serializer_class(items, many=True).data
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        return result, best
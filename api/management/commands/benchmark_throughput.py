@@ -0,0 +1,60 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management.base import BaseCommand
+
+from api.benchmarks import seed
+from api.benchmarks.database import benchmark_database
+from api.benchmarks.login_storm import async_views
+from api.benchmarks.scenarios import get_context
+from api.benchmarks.throughput import database_latency, run_asgi, run_wsgi
+
+# The requests the home screen sends at once
+HOME_SCREEN_PATHS = [
+    '/api/job/?page_size=12',
+    '/api/job/{job}/',
+    '/api/company/{company}/',
+    '/api/workshop/{workshop}/',
+    '/api/user/{username}/saved_jobs/?page_size=12',
+    '/api/user/{username}/saved_workshops/?page_size=12',
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Measures the throughput of the home screen's concurrent fan-out "
+        "requests on a sync WSGI worker, on a threaded WSGI worker, and on the "
+        "ASGI application with the async views. Runs on the 1k dataset of the "
+        "benchmark database, with the response cache cleared before each run."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clients', type=int, default=8, help="Number of concurrent clients.")
+        parser.add_argument('--rounds', type=int, default=10, help="Number of fan-outs per client.")
+        parser.add_argument('--threads', type=int, default=4, help="Threads of the threaded WSGI worker.")
+        parser.add_argument('--db-latency', type=float, default=0.0,
+                            help="Milliseconds of latency added to every query, as with a remote database.")
+        parser.add_argument('--keepdb', action='store_true', help="Keeps the benchmark database for the next run.")
+
+    def handle(self, *args, **options):
+        with benchmark_database(options['keepdb']):
+            if not seed.is_seeded('1k'):
+                seed.seed('1k')
+            context = get_context()
+            paths = [path.format(**context) for path in HOME_SCREEN_PATHS]
+            runs = [
+                ('wsgi', 1, lambda: run_wsgi(paths, context['access'], options['clients'], options['rounds'])),
+                ('wsgi', options['threads'], lambda: run_wsgi(
+                    paths, context['access'], options['clients'], options['rounds'], options['threads'])),
+                ('asgi', 1, lambda: run_asgi(paths, context['access'], options['clients'], options['rounds'])),
+            ]
+
+            self.stdout.write('{:<8}{:<9}{:>12}{:>16}{:>16}'.format(
+                'server', 'threads', 'requests/s', 'fan-out p50 ms', 'fan-out p95 ms'))
+            with database_latency(options['db_latency'] / 1000):
+                for server, threads, run in runs:
+                    with async_views(server == 'asgi'):
+                        caches[settings.API_CACHE_ALIAS].clear()
+                        result = run()
+                    self.stdout.write('{:<8}{:<9}{:>12.1f}{:>16.1f}{:>16.1f}'.format(
+                        server, threads, result['requests_per_s'], result['fanout_p50_ms'],
+                        result['fanout_p95_ms']))
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from api.logic.job_neighbors import BATCH_SIZE, BLOCK_SIZE, TOP_K, build_job_neighbors
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuilds the neighbours of every job, i.e. the jobs most often saved "
+        "together with it, from which the recommended jobs are read. Meant to "
+        "be run periodically, e.g. nightly."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top-k', type=int, default=TOP_K, help="Number of neighbours kept per job.")
+        parser.add_argument(
+            '--block-size', type=int, default=BLOCK_SIZE,
+            help="Number of jobs whose co-occurrences are counted at once, which bounds the memory used.",
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=BATCH_SIZE,
+            help="Number of neighbours inserted per INSERT statement.",
+        )
+
+    def handle(self, *args, **options):
+        built = build_job_neighbors(options['top_k'], options['block_size'], options['batch_size'])
+        self.stdout.write(self.style.SUCCESS("Built {} job neighbour(s)".format(built)))
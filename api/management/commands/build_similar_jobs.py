@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from api.logic.job_similarity import BATCH_SIZE, BLOCK_SIZE, TOP_K, build_similar_jobs
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuilds the index of the similar jobs from the titles, descriptions, "
+        "responsibilities and qualifications of every active job. The index is "
+        "updated as jobs are saved, but the document frequencies of the terms "
+        "and the jobs that lost a similar job are only refreshed by a rebuild."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top-k', type=int, default=TOP_K, help="Number of similar jobs kept per job.")
+        parser.add_argument(
+            '--block-size', type=int, default=BLOCK_SIZE,
+            help="Number of jobs whose similar jobs are computed at once, which bounds the memory used.",
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=BATCH_SIZE,
+            help="Number of rows inserted per INSERT statement.",
+        )
+
+    def handle(self, *args, **options):
+        built = build_similar_jobs(options['top_k'], options['block_size'], options['batch_size'])
+        self.stdout.write(self.style.SUCCESS("Indexed {} similar job(s)".format(built)))
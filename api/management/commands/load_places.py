@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from api.logic.places import PLACES_CSV, link_places, load_places
+from api.models import Job, JobCard, UserProfile, Workshop
+
+
+class Command(BaseCommand):
+    help = (
+        "Loads the gazetteer from a CSV file (the bundled api/data/places.csv by "
+        "default), and resolves the places of the jobs, workshops and user "
+        "profiles from their locations again. Other workers read the new "
+        "gazetteer once restarted."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--file', default=PLACES_CSV, help="CSV file with the name, country, "
+                            "latitude, longitude and aliases of each place.")
+
+    def handle(self, *args, **options):
+        loaded = load_places(options['file'])
+        # The job cards have the location of their job, and resolve to the same place
+        linked = sum(link_places(model) for model in [Job, JobCard, Workshop, UserProfile])
+        self.stdout.write(self.style.SUCCESS(
+            "Loaded {} place(s), and updated the place of {} row(s)".format(loaded, linked)
+        ))
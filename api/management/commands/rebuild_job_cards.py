@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from api.logic.job_cards import BATCH_SIZE, rebuild_job_cards
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuilds the job cards, from which the job list is read, from the jobs "
+        "and their companies, e.g. after jobs were changed with bulk updates "
+        "that bypass the signals."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=BATCH_SIZE,
+            help="Number of job cards inserted per INSERT statement.",
+        )
+
+    def handle(self, *args, **options):
+        built = rebuild_job_cards(options['batch_size'])
+        self.stdout.write(self.style.SUCCESS("Rebuilt {} job card(s)".format(built)))
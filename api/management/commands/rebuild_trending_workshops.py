@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from api.logic.trending_workshops import BATCH_SIZE, rebuild_trending_scores
+
+
+class Command(BaseCommand):
+    help = (
+        "Recomputes the trending score of every workshop by replaying the saved "
+        "workshops of the users. The scores are updated as workshops are saved and "
+        "unsaved, but have to be rebuilt after TRENDING_HALF_LIFE_DAYS changes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=BATCH_SIZE,
+            help="Number of workshops updated per UPDATE statement.",
+        )
+
+    def handle(self, *args, **options):
+        replayed = rebuild_trending_scores(options['batch_size'])
+        self.stdout.write(self.style.SUCCESS("Replayed {} saved workshop(s)".format(replayed)))
@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from api.models import UserProfile, Workshop
+from api.utils.cache import invalidate_tags
+
+
+class Command(BaseCommand):
+    help = (
+        "Recomputes the save counter of the workshops from the saved workshops "
+        "of the users, and fixes the counters that have drifted."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help="Number of workshops fixed per UPDATE statement.",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        through = UserProfile.saved_workshops.through
+        saves = through.objects.filter(workshop_id=OuterRef('pk')).order_by().values('workshop_id')
+        actual_saves = Coalesce(Subquery(saves.annotate(count=Count('*')).values('count')), 0)
+
+        stale_ids = list(
+            Workshop.objects.annotate(actual_saves=actual_saves)
+            .exclude(saves=F('actual_saves'))
+            .values_list('pk', flat=True)
+        )
+        for start in range(0, len(stale_ids), batch_size):
+            batch = stale_ids[start:start + batch_size]
+            # The counters are recomputed in the UPDATE itself, so that saves
+            # made since the workshops were selected are taken into account
+            with transaction.atomic():
+                # As the saves do, see update_workshop_saves
+                Workshop.objects.filter(pk__in=batch).update(saves=actual_saves)
+                invalidate_tags('workshop-saves', *('workshop:{}'.format(id) for id in batch))
+
+        self.stdout.write(self.style.SUCCESS(
+            "Reconciled the save counters of {} workshop(s)".format(len(stale_ids))
+        ))
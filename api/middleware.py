@@ -0,0 +1,145 @@
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+from api.utils.metrics import RequestTimings, current_timings, registry
+from api.utils.replicas import RequestRouting, current_routing, pin_to_primary
+
+
+class RequestMetricsMiddleware:
+    """
+    Measures each request: its latency, its database queries and the time
+    they took, and the time spent serializing and rendering its data. The
+    measures are sent back in a Server-Timing header, and aggregated per
+    route into the metrics served by the MetricsView.
+
+    Streaming responses are measured up to their first byte. Works both in
+    sync and async mode, so that it does not hold a thread for every request
+    of the async views.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        timings = RequestTimings()
+        token = current_timings.set(timings)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            current_timings.reset(token)
+        return self.record(request, response, timings, time.perf_counter() - started)
+
+    async def __acall__(self, request):
+        timings = RequestTimings()
+        token = current_timings.set(timings)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_timings.reset(token)
+        return self.record(request, response, timings, time.perf_counter() - started)
+
+    def record(self, request, response, timings, duration):
+        match = request.resolver_match
+        route = match.route if match is not None else 'unmatched'
+        registry.record(route, request.method, response.status_code, duration, timings)
+        response['Server-Timing'] = ', '.join([
+            'db;dur={:.1f};desc="{} queries"'.format(timings.db * 1000, timings.queries),
+            'serialize;dur={:.1f}'.format(timings.serialize * 1000),
+            'render;dur={:.1f}'.format(timings.render * 1000),
+            'total;dur={:.1f}'.format(duration * 1000),
+        ])
+        return response
+
+    def process_template_response(self, request, response):
+        # Called right before the response is rendered
+        timings = current_timings.get()
+        if timings is not None:
+            started = time.perf_counter()
+
+            def rendered(response):
+                timings.render += time.perf_counter() - started
+            response.add_post_render_callback(rendered)
+        return response
+
+
+class AsyncWhiteNoiseMiddleware(WhiteNoiseMiddleware):
+    """
+    WhiteNoise middleware that also works in async mode. WhiteNoise is sync
+    only, which under ASGI would run every request in a thread. Here only the
+    requests for static files are served from a thread.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, *args, **kwargs):
+        super().__init__(get_response, *args, **kwargs)
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh or request.path_info in self.files:
+            response = await sync_to_async(self.process_request)(request)
+            if response is not None:
+                return response
+        return await self.get_response(request)
+
+
+class DatabaseRoutingMiddleware:
+    """
+    Sets up the database routing of each request, see api.utils.replicas.
+    The users whose requests wrote to the database are pinned to the primary
+    for a while, so that their next reads see their writes.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        routing = RequestRouting()
+        token = current_routing.set(routing)
+        try:
+            response = self.get_response(request)
+        finally:
+            current_routing.reset(token)
+        return self.record(request, response, routing)
+
+    async def __acall__(self, request):
+        routing = RequestRouting()
+        token = current_routing.set(routing)
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_routing.reset(token)
+        return self.record(request, response, routing)
+
+    def record(self, request, response, routing):
+        # DRF sets the user it authenticated on the request
+        user = getattr(request, 'user', None)
+        if routing.wrote and settings.DATABASE_REPLICAS and user is not None and user.is_authenticated:
+            pin_to_primary(user.pk)
+        return response
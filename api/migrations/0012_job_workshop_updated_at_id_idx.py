@@ -0,0 +1,21 @@
+# Generated by Django 4.1.8 on 2026-10-18 11:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0011_userprofile_location'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(fields=['updated_at', 'id'], name='job_updated_at_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='workshop',
+            index=models.Index(fields=['updated_at', 'id'], name='workshop_updated_at_id_idx'),
+        ),
+    ]
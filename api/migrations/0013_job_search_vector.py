@@ -0,0 +1,52 @@
+# Generated by Django 4.1.8 on 2026-10-18 11:50
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+def create_search_index(apps, schema_editor):
+    """
+    Creates the GIN index over the search vector and fills in the vectors of
+    the existing jobs. Both only apply to PostgreSQL. The index is not
+    declared in Job.Meta, as SQLite would then try to create it whenever it
+    rebuilds the job table.
+    """
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(
+        "CREATE INDEX job_search_vector_idx ON api_job USING gin (search_vector)"
+    )
+    schema_editor.execute(
+        """
+        UPDATE api_job SET search_vector =
+            setweight(to_tsvector('english', coalesce(api_job.title, '')), 'A') ||
+            setweight(to_tsvector('english', coalesce(api_company.name, '')), 'A') ||
+            setweight(to_tsvector('english', coalesce(api_job.description, '')), 'B') ||
+            setweight(to_tsvector('english', coalesce(api_job.responsibilities, '')), 'C') ||
+            setweight(to_tsvector('english', coalesce(api_job.qualifications, '')), 'C')
+        FROM api_company
+        WHERE api_company.id = api_job.company_id
+        """
+    )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute("DROP INDEX IF EXISTS job_search_vector_idx")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0012_job_workshop_updated_at_id_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
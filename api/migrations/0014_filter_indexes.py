@@ -0,0 +1,33 @@
+# Generated by Django 4.1.8 on 2026-10-18 12:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0013_job_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='company',
+            index=models.Index(fields=['name'], name='company_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(fields=['is_active', 'job_type', 'experience'], name='job_active_type_exp_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(fields=['job_type', 'experience'], name='job_type_experience_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(fields=['experience'], name='job_experience_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='workshop',
+            index=models.Index(fields=['location'], name='workshop_location_idx'),
+        ),
+    ]
@@ -0,0 +1,79 @@
+# Generated by Django 4.1.8 on 2026-10-18 12:45
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def fill_job_cards(apps, schema_editor):
+    """
+    Builds the cards of the existing jobs, see api.logic.job_cards.
+    """
+    Job = apps.get_model('api', 'Job')
+    JobCard = apps.get_model('api', 'JobCard')
+    jobs = Job.objects.using(schema_editor.connection.alias).select_related('company').order_by('pk')
+    cards = []
+    for job in jobs.iterator(chunk_size=1000):
+        company = job.company
+        cards.append(JobCard(
+            id=job.pk, title=job.title, description=job.description, salary=job.salary,
+            location=job.location, job_type=job.job_type, experience=job.experience,
+            is_active=job.is_active, updated_at=job.updated_at, company_id=company.pk,
+            company_name=company.name, company_description=company.description,
+            company_picture=company.picture, company_website=company.website,
+            company_updated_at=company.updated_at,
+        ))
+        if len(cards) == 1000:
+            JobCard.objects.using(schema_editor.connection.alias).bulk_create(cards)
+            cards = []
+    JobCard.objects.using(schema_editor.connection.alias).bulk_create(cards)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0014_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JobCard',
+            fields=[
+                ('id', models.IntegerField(primary_key=True, serialize=False)),
+                ('title', models.CharField(max_length=155)),
+                ('description', models.TextField()),
+                ('salary', models.PositiveIntegerField(blank=True)),
+                ('location', models.CharField(blank=True, max_length=155)),
+                ('job_type', models.CharField(blank=True, choices=[('Full-time', 'Full Time'), ('Part-time', 'Part Time'), ('Internship', 'Internship'), ('Freelance', 'Freelance'), ('Other', 'Other')], max_length=10)),
+                ('experience', models.CharField(blank=True, choices=[('LT1', 'Less than 1 year'), ('B12', 'Between 1 and 2 years'), ('B26', 'Between 2 and 6 years'), ('GT6', 'Greater than 6 years')], max_length=3)),
+                ('is_active', models.BooleanField()),
+                ('updated_at', models.DateTimeField()),
+                ('company_name', models.CharField(max_length=155)),
+                ('company_description', models.TextField()),
+                ('company_picture', models.URLField(blank=True, max_length=155)),
+                ('company_website', models.URLField(blank=True, max_length=155)),
+                ('company_updated_at', models.DateTimeField()),
+                ('company', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='api.company')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='jobcard',
+            index=models.Index(fields=['updated_at', 'id'], name='jobcard_updated_at_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='jobcard',
+            index=models.Index(fields=['is_active', 'job_type', 'experience'], name='jobcard_active_type_exp_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='jobcard',
+            index=models.Index(fields=['job_type', 'experience'], name='jobcard_type_experience_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='jobcard',
+            index=models.Index(fields=['experience'], name='jobcard_experience_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='jobcard',
+            index=models.Index(fields=['company_name'], name='jobcard_company_name_idx'),
+        ),
+        migrations.RunPython(fill_job_cards, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 4.1.8 on 2026-10-18 12:53
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0015_jobcard'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Place',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('country', models.CharField(max_length=2)),
+                ('latitude', models.FloatField()),
+                ('longitude', models.FloatField()),
+                ('aliases', models.CharField(blank=True, max_length=255)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='place',
+            index=models.Index(fields=['latitude', 'longitude'], name='place_lat_lng_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='place',
+            constraint=models.UniqueConstraint(fields=('name', 'country'), name='place_name_country_unique'),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='place',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='api.place'),
+        ),
+        migrations.AddField(
+            model_name='jobcard',
+            name='place',
+            field=models.ForeignKey(db_index=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='api.place'),
+        ),
+        migrations.AddField(
+            model_name='userprofile',
+            name='place',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='api.place'),
+        ),
+        migrations.AddField(
+            model_name='workshop',
+            name='place',
+            field=models.ForeignKey(blank=True, db_index=False, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='api.place'),
+        ),
+        migrations.AddIndex(
+            model_name='jobcard',
+            index=models.Index(fields=['place', 'updated_at', 'id'], name='jobcard_place_updated_at_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='workshop',
+            index=models.Index(fields=['place', 'updated_at', 'id'], name='workshop_place_updated_at_idx'),
+        ),
+    ]
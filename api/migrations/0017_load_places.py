@@ -0,0 +1,67 @@
+import csv
+from pathlib import Path
+
+from django.db import migrations
+
+# The gazetteer bundled with the app. The reading and normalization below are
+# copies of those of api.logic.places, which may change after this migration
+PLACES_CSV = Path(__file__).resolve().parent.parent / 'data' / 'places.csv'
+
+
+def normalize_location(location):
+    return ' '.join(location.casefold().split())
+
+
+def read_places():
+    with open(PLACES_CSV, newline='', encoding='utf-8') as file:
+        return [
+            {
+                'name': row['name'],
+                'country': row['country'],
+                'latitude': float(row['latitude']),
+                'longitude': float(row['longitude']),
+                'aliases': row['aliases'],
+            }
+            for row in csv.DictReader(file)
+        ]
+
+
+def load_places(apps, schema_editor):
+    """
+    Loads the bundled gazetteer, and resolves the places of the existing
+    jobs, job cards, workshops and user profiles from their locations, as
+    api.logic.places did when this migration was written.
+    """
+    alias = schema_editor.connection.alias
+    Place = apps.get_model('api', 'Place')
+    places = Place.objects.using(alias).bulk_create(Place(**row) for row in read_places())
+
+    gazetteer = {}
+    for place in places:
+        for key in [place.name, *place.aliases.split('|')]:
+            gazetteer.setdefault(normalize_location(key), place.pk)
+    gazetteer.pop('', None)
+
+    for model_name in ['Job', 'JobCard', 'Workshop', 'UserProfile']:
+        model = apps.get_model('api', model_name)
+        rows = model.objects.using(alias)
+        for location in list(rows.order_by().values_list('location', flat=True).distinct()):
+            key = normalize_location(location)
+            place_id = gazetteer.get(key, gazetteer.get(key.split(',')[0].strip()))
+            if place_id is not None:
+                rows.filter(location=location).update(place_id=place_id)
+
+
+def unload_places(apps, schema_editor):
+    apps.get_model('api', 'Place').objects.using(schema_editor.connection.alias).all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0016_places'),
+    ]
+
+    operations = [
+        migrations.RunPython(load_places, unload_places),
+    ]
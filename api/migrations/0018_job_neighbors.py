@@ -0,0 +1,27 @@
+# Generated by Django 4.1.8 on 2026-10-18 13:14
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0017_load_places'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JobNeighbor',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField()),
+                ('job', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='api.job')),
+                ('neighbor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='api.job')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='jobneighbor',
+            constraint=models.UniqueConstraint(fields=('job', 'neighbor'), name='jobneighbor_job_neighbor_unique'),
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 4.1.8 on 2026-10-18 13:25
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0018_job_neighbors'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SimilarityTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=50, unique=True)),
+                ('document_frequency', models.PositiveIntegerField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='SimilarJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField()),
+                ('job', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='api.job')),
+                ('similar', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='api.jobcard')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='JobTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('weight', models.FloatField()),
+                ('job', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='api.job')),
+                ('term', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='api.similarityterm')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='similarjob',
+            constraint=models.UniqueConstraint(fields=('job', 'similar'), name='similarjob_job_similar_unique'),
+        ),
+        migrations.AddIndex(
+            model_name='jobterm',
+            index=models.Index(fields=['term', '-weight'], name='jobterm_term_weight_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='jobterm',
+            constraint=models.UniqueConstraint(fields=('job', 'term'), name='jobterm_job_term_unique'),
+        ),
+    ]
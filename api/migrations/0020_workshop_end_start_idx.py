@@ -0,0 +1,17 @@
+# Generated by Django 4.1.8 on 2026-10-18 14:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0019_similar_jobs'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='workshop',
+            index=models.Index(fields=['end_time', 'start_time', 'id'], name='workshop_end_start_idx'),
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 4.1.8 on 2026-10-18 15:10
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0020_workshop_end_start_idx'),
+    ]
+
+    operations = [
+        # The through model takes over the table Django created for
+        # UserProfile.saved_workshops, which keeps its rows
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.CreateModel(
+                    name='SavedWorkshop',
+                    fields=[
+                        ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                        ('userprofile', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='api.userprofile')),
+                        ('workshop', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='api.workshop')),
+                    ],
+                    options={
+                        'db_table': 'api_userprofile_saved_workshops',
+                        'unique_together': {('userprofile', 'workshop')},
+                    },
+                ),
+                migrations.AlterField(
+                    model_name='userprofile',
+                    name='saved_workshops',
+                    field=models.ManyToManyField(blank=True, through='api.SavedWorkshop', to='api.workshop'),
+                ),
+            ],
+        ),
+        # The existing saves are dated from the migration
+        migrations.AddField(
+            model_name='savedworkshop',
+            name='saved_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddField(
+            model_name='workshop',
+            name='trending_score',
+            field=models.FloatField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='workshop',
+            index=models.Index(fields=['-trending_score', 'id'], name='workshop_trending_idx'),
+        ),
+    ]
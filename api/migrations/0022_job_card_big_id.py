@@ -0,0 +1,18 @@
+# Generated by Django 4.1.8 on 2026-10-18 14:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0021_trending_workshops'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='jobcard',
+            name='id',
+            field=models.BigIntegerField(primary_key=True, serialize=False),
+        ),
+    ]
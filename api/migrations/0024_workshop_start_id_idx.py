@@ -0,0 +1,17 @@
+# Generated by Django 4.1.8 on 2026-10-18 14:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0023_calendar_token'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='workshop',
+            index=models.Index(fields=['start_time', 'id'], name='workshop_start_id_idx'),
+        ),
+    ]
@@ -1,5 +1,6 @@
 from django.db import models
 from django.contrib.auth.models import User
+from django.contrib.postgres.search import SearchVectorField
 from django.db.models.deletion import (
     CASCADE,
     DO_NOTHING,
@@ -11,6 +12,7 @@ from django.db.models.deletion import (
     ProtectedError,
     RestrictedError,
 )
+from django.utils import timezone
 from api.enums import JobType, Experience
 
 # Create your models here.
@@ -24,6 +26,27 @@ class BaseModel(models.Model):
     class Meta:
         abstract = True
 
+class Place(models.Model):
+    """
+    Model to store the places of the gazetteer, to which the free-text
+    locations are resolved (see api.logic.places)
+    """
+    name = models.CharField(max_length=100)
+    country = models.CharField(max_length=2)
+    latitude = models.FloatField()
+    longitude = models.FloatField()
+    # Other names of the place, separated by '|'
+    aliases = models.CharField(max_length=255, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['name', 'country'], name='place_name_country_unique'),
+        ]
+        indexes = [
+            # Supports the bounding box prefilter of the nearby search
+            models.Index(fields=['latitude', 'longitude'], name='place_lat_lng_idx'),
+        ]
+
 class UserProfile(BaseModel):
     """
     Model to store user profile information
@@ -33,10 +56,14 @@ class UserProfile(BaseModel):
     description = models.CharField(max_length=155, blank=True)
     picture = models.URLField(max_length=155, blank=True)
     location = models.CharField(max_length=155, blank=True)
+    # Resolved from the location, see api.logic.places
+    place = models.ForeignKey(Place, null=True, blank=True, editable=False, on_delete=SET_NULL, related_name='+')
     
     saved_jobs = models.ManyToManyField('Job', blank=True)
     saved_experiences = models.ManyToManyField('WorkExperience', blank=True)
-    saved_workshops = models.ManyToManyField('Workshop', blank=True)
+    saved_workshops = models.ManyToManyField('Workshop', blank=True, through='SavedWorkshop')
+    # SHA-256 of the secret token of the saved workshops calendar feed, see api.logic.workshop_calendar
+    calendar_token_hash = models.CharField(max_length=64, unique=True, null=True, blank=True, editable=False)
 
 class Company(BaseModel):
     """
@@ -47,6 +74,12 @@ class Company(BaseModel):
     picture = models.URLField(max_length=155, blank=True)
     website = models.URLField(max_length=155, blank=True)
 
+    class Meta:
+        indexes = [
+            # Supports the `company__name__in` and `organizer__name__in` filters
+            models.Index(fields=['name'], name='company_name_idx'),
+        ]
+
 class Job(BaseModel):
     """
     Model to store job information
@@ -62,6 +95,120 @@ class Job(BaseModel):
     experience = models.CharField(max_length=3, choices=Experience.choices, default=Experience.BETWEEN_1_2, blank=True)
     is_active = models.BooleanField(default=True)
     website = models.URLField(max_length=155, blank=True)
+    # Resolved from the location, see api.logic.places
+    place = models.ForeignKey(Place, null=True, blank=True, editable=False, on_delete=SET_NULL, related_name='+')
+    # Maintained by api.logic.job_search on PostgreSQL, where it is backed by
+    # a GIN index created in migration 0013. Unused on other databases.
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    class Meta:
+        indexes = [
+            # Supports the keyset pagination of the job list
+            models.Index(fields=['updated_at', 'id'], name='job_updated_at_id_idx'),
+            # Support the filters of the job list (see api.utils.filters.JobFilter),
+            # with or without `is_active`
+            models.Index(fields=['is_active', 'job_type', 'experience'], name='job_active_type_exp_idx'),
+            models.Index(fields=['job_type', 'experience'], name='job_type_experience_idx'),
+            models.Index(fields=['experience'], name='job_experience_idx'),
+        ]
+
+class JobCard(models.Model):
+    """
+    Read model of the job list: each job with the fields of its company that
+    the job cards show, so that the list is read from this table alone.
+    Maintained by api.logic.job_cards, the `id` being that of the job.
+    """
+    # As wide as the primary key of Job (DEFAULT_AUTO_FIELD)
+    id = models.BigIntegerField(primary_key=True)
+    title = models.CharField(max_length=155)
+    description = models.TextField()
+    salary = models.PositiveIntegerField(blank=True)
+    location = models.CharField(max_length=155, blank=True)
+    job_type = models.CharField(max_length=10, choices=JobType.choices, blank=True)
+    experience = models.CharField(max_length=3, choices=Experience.choices, blank=True)
+    is_active = models.BooleanField()
+    updated_at = models.DateTimeField()
+    company = models.ForeignKey(Company, on_delete=CASCADE, related_name='+')
+    company_name = models.CharField(max_length=155)
+    company_description = models.TextField()
+    company_picture = models.URLField(max_length=155, blank=True)
+    company_website = models.URLField(max_length=155, blank=True)
+    company_updated_at = models.DateTimeField()
+    place = models.ForeignKey(Place, null=True, db_index=False, on_delete=SET_NULL, related_name='+')
+
+    class Meta:
+        indexes = [
+            # Same as the indexes of Job, for the pagination and filters of the job list
+            models.Index(fields=['updated_at', 'id'], name='jobcard_updated_at_id_idx'),
+            models.Index(fields=['is_active', 'job_type', 'experience'], name='jobcard_active_type_exp_idx'),
+            models.Index(fields=['job_type', 'experience'], name='jobcard_type_experience_idx'),
+            models.Index(fields=['experience'], name='jobcard_experience_idx'),
+            models.Index(fields=['company_name'], name='jobcard_company_name_idx'),
+            # Supports the nearby search, most recent jobs of each place first
+            models.Index(fields=['place', 'updated_at', 'id'], name='jobcard_place_updated_at_idx'),
+        ]
+
+class JobNeighbor(models.Model):
+    """
+    Model to store, for each job, the jobs most often saved together with it
+    and their similarity. Rebuilt by `manage.py build_job_neighbors`, see
+    api.logic.job_neighbors
+    """
+    # Served by the unique constraint, which starts with the job
+    job = models.ForeignKey(Job, on_delete=CASCADE, db_index=False, related_name='+')
+    neighbor = models.ForeignKey(Job, on_delete=CASCADE, related_name='+')
+    score = models.FloatField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['job', 'neighbor'], name='jobneighbor_job_neighbor_unique'),
+        ]
+
+class SimilarityTerm(models.Model):
+    """
+    Model to store the vocabulary of the similar jobs index, with the number
+    of active jobs each term appears in (see api.logic.job_similarity). The
+    empty term counts the indexed jobs themselves.
+    """
+    term = models.CharField(max_length=50, unique=True)
+    document_frequency = models.PositiveIntegerField()
+
+class JobTerm(models.Model):
+    """
+    Model to store the TF-IDF vector of each active job: the weights of its
+    top terms, normalized so that the cosine similarity of two jobs is the
+    sum of the products of the weights of their shared terms
+    """
+    job = models.ForeignKey(Job, on_delete=CASCADE, db_index=False, related_name='+')
+    term = models.ForeignKey(SimilarityTerm, on_delete=CASCADE, db_index=False, related_name='+')
+    weight = models.FloatField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['job', 'term'], name='jobterm_job_term_unique'),
+        ]
+        indexes = [
+            # Supports the lookup of the candidates of a job, the heaviest jobs of each of its terms
+            models.Index(fields=['term', '-weight'], name='jobterm_term_weight_idx'),
+        ]
+
+class SimilarJob(models.Model):
+    """
+    Model to store, for each active job, the active jobs most similar to it
+    and their cosine similarity, read by the similar jobs of the job details.
+    The similar job is read from its card (the `id` of the card being that
+    of the job), which is not constrained so that rebuilding the job cards
+    keeps the similar jobs.
+    """
+    # Served by the unique constraint, which starts with the job
+    job = models.ForeignKey(Job, on_delete=CASCADE, db_index=False, related_name='+')
+    similar = models.ForeignKey(JobCard, on_delete=DO_NOTHING, db_constraint=False, related_name='+')
+    score = models.FloatField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['job', 'similar'], name='similarjob_job_similar_unique'),
+        ]
 
 class WorkExperience(BaseModel):
     """
@@ -85,4 +232,42 @@ class Workshop(BaseModel):
     location = models.CharField(max_length=155, blank=True)
     website = models.URLField(max_length=155, blank=True)
     picture = models.URLField(max_length=155, blank=True)
-    saves = models.IntegerField(default=0)
\ No newline at end of file
+    saves = models.IntegerField(default=0)
+    # Sum of the time-decayed weights of the saves, see api.logic.trending_workshops
+    trending_score = models.FloatField(default=0, editable=False)
+    # Resolved from the location, see api.logic.places
+    place = models.ForeignKey(Place, null=True, blank=True, editable=False, db_index=False,
+                              on_delete=SET_NULL, related_name='+')
+
+    class Meta:
+        indexes = [
+            # Supports the keyset pagination of the workshop list
+            models.Index(fields=['updated_at', 'id'], name='workshop_updated_at_id_idx'),
+            # Supports the `location__in` filter of the workshop list
+            models.Index(fields=['location'], name='workshop_location_idx'),
+            # Supports the nearby search, most recent workshops of each place first
+            models.Index(fields=['place', 'updated_at', 'id'], name='workshop_place_updated_at_idx'),
+            # Supports the `ends_after` and `starts_before` filters: the workshops that have
+            # not ended yet are a range of the index, which also holds their start dates
+            models.Index(fields=['end_time', 'start_time', 'id'], name='workshop_end_start_idx'),
+            # Is the order of the workshop calendar, whose pages are read from it in order,
+            # filtering out the workshops that have ended
+            models.Index(fields=['start_time', 'id'], name='workshop_start_id_idx'),
+            # Is the trending workshops leaderboard, read from its start
+            models.Index(fields=['-trending_score', 'id'], name='workshop_trending_idx'),
+        ]
+
+class SavedWorkshop(models.Model):
+    """
+    Model to store the workshops saved by each user profile, and when they
+    were saved, which the trending scores are replayed from. The through
+    table of UserProfile.saved_workshops.
+    """
+    userprofile = models.ForeignKey(UserProfile, on_delete=CASCADE, related_name='+')
+    workshop = models.ForeignKey(Workshop, on_delete=CASCADE, related_name='+')
+    saved_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        # The table of the through model Django created before
+        db_table = 'api_userprofile_saved_workshops'
+        unique_together = [('userprofile', 'workshop')]
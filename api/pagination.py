@@ -1,6 +1,165 @@
-from rest_framework.pagination import PageNumberPagination
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import date, datetime
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+from rest_framework.utils.urls import replace_query_param
 
 class JobPagination(PageNumberPagination):
     page_size=12
     page_size_query_param = 'page_size'
     max_page_size = 100
+
+
+class KeysetPagination(CursorPagination):
+    """
+    Opaque cursor pagination over a composite key, newest first by default.
+
+    Unlike DRF's CursorPagination, which positions on the first ordering
+    field and falls back to OFFSET for ties, the cursor stores the values of
+    every ordering field of the boundary row. Each page is then a single
+    `WHERE (updated_at, id) < (...) ORDER BY ... LIMIT n` range scan over the
+    matching index, so page N costs the same as page 1 and no COUNT(*) is run.
+
+    Querysets annotated with a search `rank` are ordered by it first.
+
+    Pagination is opt-in: it is only applied when the request passes a
+    `cursor` or `page_size` query parameter, so existing clients keep
+    receiving the full list.
+    """
+    ordering = ('-updated_at', '-id')
+    page_size = 12
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+    def paginate_queryset(self, queryset, request, view=None):
+        queryset = self.get_page_queryset(queryset, request, view)
+        if queryset is None:
+            return None
+        return self.set_page(list(queryset))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """
+        Async counterpart of `paginate_queryset`, reading the page with the
+        async ORM.
+        """
+        queryset = self.get_page_queryset(queryset, request, view)
+        if queryset is None:
+            return None
+        return self.set_page([instance async for instance in queryset])
+
+    def get_page_queryset(self, queryset, request, view=None):
+        """
+        Returns the queryset of the requested page, plus one row telling
+        whether there is a next page, or None if pagination is not requested.
+        """
+        params = request.query_params
+        if self.cursor_query_param not in params and self.page_size_query_param not in params:
+            return None
+
+        self.page_size = self.get_page_size(request)
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+
+        cursor = self.decode_cursor(request)
+        self.position, self.reverse = cursor if cursor is not None else (None, False)
+        if self.position is not None and len(self.position) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+
+        ordering = [_invert(field) for field in self.ordering] if self.reverse else list(self.ordering)
+        queryset = queryset.order_by(*ordering)
+        if self.position is not None:
+            try:
+                queryset = queryset.filter(_keyset_filter(ordering, self.position))
+            except (ValidationError, TypeError, ValueError):
+                raise NotFound(self.invalid_cursor_message)
+        return queryset[:self.page_size + 1]
+
+    def set_page(self, results):
+        has_more = len(results) > self.page_size
+        self.page = results[:self.page_size]
+        if self.reverse:
+            self.page.reverse()
+            self.has_next, self.has_previous = self.position is not None, has_more
+        else:
+            self.has_next, self.has_previous = has_more, self.position is not None
+        return self.page
+
+    def get_ordering(self, request, queryset, view):
+        # Search results are ordered by relevance first
+        if 'rank' in queryset.query.annotations:
+            return ('-rank',) + tuple(self.ordering)
+        return tuple(self.ordering)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor((self._get_position(self.page[-1]), False))
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor((self._get_position(self.page[0]), True))
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+        try:
+            cursor = json.loads(urlsafe_b64decode(encoded.encode('ascii')))
+            position, reverse = cursor['p'], bool(cursor.get('r', 0))
+        except (TypeError, ValueError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(position, list):
+            raise NotFound(self.invalid_cursor_message)
+        return position, reverse
+
+    def encode_cursor(self, cursor):
+        position, reverse = cursor
+        tokens = {'p': position}
+        if reverse:
+            tokens['r'] = 1
+        encoded = urlsafe_b64encode(json.dumps(tokens, separators=(',', ':')).encode('ascii')).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def _get_position(self, instance):
+        position = []
+        for field in self.ordering:
+            name = field.lstrip('-')
+            value = instance[name] if isinstance(instance, dict) else getattr(instance, name)
+            if isinstance(value, (date, datetime)):
+                value = value.isoformat()
+            position.append(value)
+        return position
+
+
+class CalendarPagination(KeysetPagination):
+    """
+    Keyset pagination of the workshop calendar, the earliest workshop first.
+    """
+    ordering = ('start_time', 'id')
+
+
+def _invert(field):
+    return field[1:] if field.startswith('-') else '-' + field
+
+
+def _keyset_filter(ordering, position):
+    """
+    Builds the filter selecting the rows strictly after `position` in the
+    given ordering, i.e. the expanded form of a row-value comparison such as
+    `(updated_at, id) < (%s, %s)`. The leading field is also bounded on its
+    own so that the database can turn it into an index range scan.
+    """
+    names = [field.lstrip('-') for field in ordering]
+    lookups = ['lt' if field.startswith('-') else 'gt' for field in ordering]
+
+    after = Q()
+    for i in reversed(range(len(ordering))):
+        strict = Q(**{'{}__{}'.format(names[i], lookups[i]): position[i]})
+        after = strict if i == len(ordering) - 1 else strict | (Q(**{names[i]: position[i]}) & after)
+    bound = Q(**{'{}__{}e'.format(names[0], lookups[0]): position[0]})
+    return bound & after
@@ -0,0 +1,34 @@
+import json
+
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+
+
+class NDJSONParser(BaseParser):
+    """
+    Parses newline-delimited JSON lazily, one object per line.
+
+    The parsed data is a generator, so the request body is read from the
+    stream as it is consumed rather than loaded into memory at once. Lines
+    that are not valid JSON are yielded as `ParseError`s, so that the caller
+    can report them alongside the other rows.
+    """
+    media_type = 'application/x-ndjson'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        return self._parse_lines(stream, encoding)
+
+    def _parse_lines(self, stream, encoding):
+        if stream is None:
+            return
+        for line in stream:
+            line = line.decode(encoding).strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError as exc:
+                yield ParseError('JSON parse error - %s' % str(exc))
@@ -2,12 +2,20 @@ from rest_framework import serializers, exceptions
 from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 from django.contrib.auth.models import User
+from django.db.models import Prefetch
+from django.urls import reverse
 
-from api.logic.user_management import register_user, update_user
+from api.logic.saved_items import SAVED_ITEM_FIELDS
+from api.logic.user_management import find_login_user, login_details, register_user, update_user
+from api.pagination import KeysetPagination
+from api.utils.fast_serializers import FastListSerializer, FastReadSerializerMixin
+from api.utils.metrics import TimedSerializerMixin
 
 from api.models import (
     Company,
     Job,
+    JobCard,
+    Place,
     UserProfile,
     WorkExperience,
     Workshop,
@@ -21,19 +29,65 @@ class UserSerializer(serializers.ModelSerializer):
         fields = ['id', 'username', 'email']
 
 
-class UserProfileSerializer(serializers.ModelSerializer):
+class UserProfileSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     user = UserSerializer()
 
     class Meta:
         model = UserProfile
         fields = ['user', 'name', 'description', 'picture', 'saved_jobs', 'saved_experiences', 'saved_workshops', 'location']
+        select_related = ['user']
+        # Only the primary keys of the saved items are serialized
+        prefetch_related = [
+            Prefetch('saved_jobs', queryset=Job.objects.only('id')),
+            Prefetch('saved_experiences', queryset=WorkExperience.objects.only('id')),
+            Prefetch('saved_workshops', queryset=Workshop.objects.only('id')),
+        ]
+
+
+class CompactUserProfileSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    """
+    Represents each list of saved items by its size, and a link to the first
+    page of the matching saved items endpoint, instead of every primary key.
+    The profiles are expected to be annotated by `annotate_saved_counts`.
+    """
+    user = UserSerializer()
+    saved_jobs = serializers.SerializerMethodField()
+    saved_experiences = serializers.SerializerMethodField()
+    saved_workshops = serializers.SerializerMethodField()
+
+    class Meta:
+        model = UserProfile
+        fields = ['user', 'name', 'description', 'picture', 'saved_jobs', 'saved_experiences', 'saved_workshops', 'location']
+        select_related = ['user']
+
+    def get_saved_jobs(self, profile):
+        return self._get_saved_items(profile, 'saved_jobs', 'saved-jobs')
+
+    def get_saved_experiences(self, profile):
+        return self._get_saved_items(profile, 'saved_experiences', 'saved-experiences')
+
+    def get_saved_workshops(self, profile):
+        return self._get_saved_items(profile, 'saved_workshops', 'saved-workshops')
+
+    def _get_saved_items(self, profile, field_name, url_name):
+        url = '{}?{}={}'.format(
+            reverse(url_name, kwargs={'username': profile.user.username}),
+            KeysetPagination.page_size_query_param,
+            KeysetPagination.page_size,
+        )
+        request = self.context.get('request')
+        return {
+            'count': getattr(profile, '{}_count'.format(field_name)),
+            'url': request.build_absolute_uri(url) if request is not None else url,
+        }
 
 
-class CompanySerializer(serializers.ModelSerializer):
+class CompanySerializer(FastReadSerializerMixin, serializers.ModelSerializer):
 
     class Meta:
         model = Company
         fields = ['id', 'name', 'description', 'picture', 'website']
+        list_serializer_class = FastListSerializer
 
 
 class UserRegistrationSerializer(serializers.Serializer):
@@ -81,35 +135,17 @@ class JwtSerializer(TokenObtainPairSerializer):
         password = attrs.get("password")
         username = attrs.get("username")
 
-        # set user to None
-        user = None
+        # check if user exists with email addr / username, raises an
+        # authentication failed error if not
+        user = find_login_user(username)
 
-        # check if user exists with email addr / username
-        if "@" in username:
-            user = User.objects.filter(email=username).first()
+        if user.check_password(password):
+            return login_details(user)
         else:
-            user = User.objects.filter(username=username).first()
+            raise exceptions.AuthenticationFailed(detail="Wrong Password")
 
-        # raise an authentication faled error if user is None
-        if user is None:
-            raise exceptions.AuthenticationFailed(detail="User not found")
 
-        else:
-            if user.check_password(password):
-                refresh = RefreshToken.for_user(user)
-
-                return {
-                    'refresh': str(refresh),
-                    'access': str(refresh.access_token),
-                    'username': user.username,
-                    'email': user.email,
-                    'id': user.id,
-                }
-            else:
-                raise exceptions.AuthenticationFailed(detail="Wrong Password")
-
-
-class JobSerializer(serializers.ModelSerializer):
+class JobSerializer(FastReadSerializerMixin, serializers.ModelSerializer):
     company = CompanySerializer(read_only=True)
 
     class Meta:
@@ -117,9 +153,11 @@ class JobSerializer(serializers.ModelSerializer):
         fields = ['id', 'title', 'description', 'responsibilities', 'qualifications', 'company', 'salary',
                   'location', 'is_active', 'job_type', 'experience', 'updated_at']
         read_only_fields = ['company', 'is_active']
+        select_related = ['company']
+        list_serializer_class = FastListSerializer
 
 
-class JobListSerializer(serializers.ModelSerializer):
+class JobListSerializer(FastReadSerializerMixin, serializers.ModelSerializer):
     company = CompanySerializer(read_only=True)
 
     class Meta:
@@ -127,19 +165,101 @@ class JobListSerializer(serializers.ModelSerializer):
         fields = ['id', 'title', 'description', 'company',
                   'salary', 'location', 'is_active', 'job_type', 'experience', 'updated_at']
         read_only_fields = ['company', 'is_active']
+        select_related = ['company']
+        list_serializer_class = FastListSerializer
+
+
+class JobCardCompanySerializer(FastReadSerializerMixin, serializers.ModelSerializer):
+    """
+    The company of a job card, in the format of CompanySerializer.
+    """
+    id = serializers.IntegerField(source='company_id', read_only=True)
+    name = serializers.CharField(source='company_name', read_only=True)
+    description = serializers.CharField(source='company_description', read_only=True)
+    picture = serializers.URLField(source='company_picture', read_only=True)
+    website = serializers.URLField(source='company_website', read_only=True)
+
+    class Meta:
+        model = JobCard
+        fields = ['id', 'name', 'description', 'picture', 'website']
 
-class WorkExperienceSerializer(serializers.ModelSerializer):
+
+class JobCardSerializer(FastReadSerializerMixin, serializers.ModelSerializer):
+    """
+    Serializes the job cards in the format of JobListSerializer.
+    """
+    company = JobCardCompanySerializer(source='*', read_only=True)
+
+    class Meta:
+        model = JobCard
+        fields = ['id', 'title', 'description', 'company',
+                  'salary', 'location', 'is_active', 'job_type', 'experience', 'updated_at']
+        list_serializer_class = FastListSerializer
+
+class WorkExperienceSerializer(FastReadSerializerMixin, serializers.ModelSerializer):
     company = CompanySerializer(read_only=True)
 
     class Meta:
         model = WorkExperience
         fields = ['id', 'company', 'role', 'description', 'start_time', 'end_time']
         read_only_fields = ['company']
+        select_related = ['company']
+        list_serializer_class = FastListSerializer
 
-class WorkshopSerializer(serializers.ModelSerializer):
+class WorkshopSerializer(FastReadSerializerMixin, serializers.ModelSerializer):
     organizer = CompanySerializer(read_only=True)
 
     class Meta:
         model = Workshop
-        fields = "__all__"
+        # The trending score is only meaningful decayed, see TrendingWorkshopsView.
+        # The place is internal, as it is for jobs, and would keep the list off
+        # the fast serialization path
+        exclude = ['trending_score', 'place']
         read_only_fields = ['organizer']
+        select_related = ['organizer']
+        list_serializer_class = FastListSerializer
+
+
+class SavedItemSerializer(serializers.Serializer):
+    type = serializers.ChoiceField(choices=list(SAVED_ITEM_FIELDS))
+    id = serializers.IntegerField()
+    save = serializers.BooleanField(default=True)
+
+
+class PlaceSerializer(serializers.ModelSerializer):
+
+    class Meta:
+        model = Place
+        fields = ['id', 'name', 'country', 'latitude', 'longitude']
+
+
+class NearbyQuerySerializer(serializers.Serializer):
+    """
+    Query parameters of the nearby search: the center, as coordinates or as
+    the name of a place, the radius in kilometers, and the number of jobs
+    and of workshops.
+    """
+    lat = serializers.FloatField(min_value=-90, max_value=90, required=False)
+    lng = serializers.FloatField(min_value=-180, max_value=180, required=False)
+    near = serializers.CharField(max_length=155, required=False)
+    radius = serializers.FloatField(min_value=0, max_value=500, default=50)
+    limit = serializers.IntegerField(min_value=1, max_value=100, default=20)
+
+    def validate(self, attrs):
+        if ('lat' in attrs) != ('lng' in attrs):
+            raise serializers.ValidationError("Both lat and lng are required")
+        return attrs
+
+
+class RecommendedJobsQuerySerializer(serializers.Serializer):
+    """
+    Query parameters of the recommended jobs: the number of jobs.
+    """
+    limit = serializers.IntegerField(min_value=1, max_value=100, default=20)
+
+
+class TrendingWorkshopsQuerySerializer(serializers.Serializer):
+    """
+    Query parameters of the trending workshops: the number of workshops.
+    """
+    limit = serializers.IntegerField(min_value=1, max_value=100, default=20)
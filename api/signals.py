@@ -0,0 +1,110 @@
+from functools import partial
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from api.authentication import user_cache
+from api.logic.job_cards import delete_job_cards, refresh_company_cards, refresh_job_cards
+from api.logic.job_search import refresh_search_vectors
+from api.logic.job_similarity import delete_similar_jobs, schedule_similar_jobs_update
+from api.logic.places import resolve_place_id
+from api.logic.workshop_calendar import invalidate_saved_workshops
+from api.models import Company, Job, UserProfile, Workshop
+from api.utils.cache import invalidate_tags
+from api.utils.metrics import log_query
+
+
+@receiver(pre_save, sender=Job)
+@receiver(pre_save, sender=Workshop)
+@receiver(pre_save, sender=UserProfile)
+def resolve_place(sender, instance, raw=False, **kwargs):
+    # Before the job card is refreshed from the job
+    if not raw:
+        instance.place_id = resolve_place_id(instance.location)
+
+
+@receiver(post_save, sender=Job)
+def update_job_search_vector(sender, instance, raw=False, **kwargs):
+    if not raw:
+        refresh_search_vectors(Job.objects.filter(pk=instance.pk))
+
+
+@receiver(post_save, sender=Company)
+def update_company_jobs_search_vectors(sender, instance, raw=False, **kwargs):
+    # The company name is part of the search vector of each of its jobs
+    if not raw:
+        refresh_search_vectors(Job.objects.filter(company=instance))
+
+
+@receiver(post_save, sender=Job)
+def update_job_card(sender, instance, raw=False, **kwargs):
+    if not raw:
+        refresh_job_cards(Job.objects.filter(pk=instance.pk))
+
+
+@receiver(post_save, sender=Company)
+def update_company_job_cards(sender, instance, raw=False, **kwargs):
+    # The job cards embed the fields of their company
+    if not raw:
+        refresh_company_cards(instance)
+
+
+@receiver(post_delete, sender=Job)
+def delete_job_card(sender, instance, **kwargs):
+    delete_job_cards([instance.pk])
+
+
+@receiver(post_save, sender=Job)
+def update_job_similar_jobs(sender, instance, raw=False, **kwargs):
+    if not raw:
+        schedule_similar_jobs_update([instance.pk])
+
+
+@receiver(post_delete, sender=Job)
+def delete_job_similar_jobs(sender, instance, **kwargs):
+    delete_similar_jobs([instance.pk])
+
+
+@receiver(post_save, sender=Job)
+@receiver(post_delete, sender=Job)
+def invalidate_job_cache(sender, instance, **kwargs):
+    invalidate_tags('job', 'job:{}'.format(instance.pk))
+
+
+@receiver(post_save, sender=Company)
+@receiver(post_delete, sender=Company)
+def invalidate_company_cache(sender, instance, **kwargs):
+    # Evicts every cached job and workshop response embedding the company
+    invalidate_tags('company:{}'.format(instance.pk))
+
+
+@receiver(post_save, sender=Workshop)
+@receiver(post_delete, sender=Workshop)
+def invalidate_workshop_cache(sender, instance, **kwargs):
+    invalidate_tags('workshop', 'workshop:{}'.format(instance.pk))
+
+
+@receiver(m2m_changed, sender=UserProfile.saved_workshops.through)
+def invalidate_saved_workshops_calendar(sender, instance, action, reverse, pk_set, **kwargs):
+    # The save views write the through table directly, see api.logic.saved_items
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        profile_ids = (pk_set or ()) if reverse else [instance.pk]
+        invalidate_saved_workshops(*profile_ids)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_cached_user(sender, instance, **kwargs):
+    # Covers the account changes made by update_user, and deactivations. On
+    # commit, so that a concurrent request cannot cache the row being replaced
+    transaction.on_commit(partial(user_cache.invalidate, instance.pk))
+
+
+@receiver(connection_created)
+def install_query_metrics(sender, connection, **kwargs):
+    # Times the queries of the requests, see RequestMetricsMiddleware
+    if log_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(log_query)
@@ -1,3 +1,1485 @@
-from django.test import TestCase
+import contextlib
+import datetime
+import importlib
+import io
+import json
+import os
+import re
+import socket
+import tempfile
+import threading
+from base64 import urlsafe_b64encode
+from functools import partial
+from unittest import mock, skipUnless
 
-# Create your tests here.
+import numpy as np
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.handlers.asgi import ASGIHandler
+from django.core.management import call_command
+from django.core.signals import request_finished, request_started
+from django.db import IntegrityError, close_old_connections, connection, connections, transaction
+from django.db.models import Max
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import clear_url_caches
+from django.utils import timezone
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.mixins import ListModelMixin
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework_simplejwt.tokens import AccessToken
+
+from api.authentication import CachedJWTAuthentication, user_cache
+from api.benchmarks.runner import ScenarioRunner
+from api.benchmarks.scenarios import SCENARIOS
+from api.logic import password_hashing
+from api.logic.job_cards import rebuild_job_cards
+from api.logic.job_neighbors import SAVE_DTYPE, build_job_neighbors, compute_job_neighbors
+from api.logic.job_similarity import _candidate_ids, build_similar_jobs, get_executor, similar_jobs, update_similar_jobs
+from api.logic.places import haversine_km, places_within, resolve_place_id
+from api.logic.recommendations import recommended_jobs
+from api.logic.saved_items import apply_saved_items, save_workshop, unsave_workshop
+from api.logic.trending_workshops import decay, rebuild_trending_scores
+from api.logic.workshop_calendar import render_event, saved_workshops_calendar
+from api.models import (
+    Company, Job, JobCard, JobNeighbor, JobTerm, Place, SavedWorkshop, SimilarJob, UserProfile, WorkExperience,
+    Workshop,
+)
+from api.pagination import CalendarPagination
+from api.serializers import (
+    CompanySerializer, JobCardSerializer, JobListSerializer, JobSerializer, WorkExperienceSerializer,
+    WorkshopSerializer,
+)
+from api.utils.cache import cache_response
+from api.utils.conditional import conditional_response
+from api.utils.fast_serializers import drf_serialization, get_plan
+from api.utils.filters import JobCardFilter, JobFilter, WorkshopFilter
+from api.utils.metrics import RETIRED_FILE, MetricsRegistry, RequestTimings, current_timings
+from api.utils.prefetch import apply_prefetch_plan
+from api.utils.replicas import ReplicaRouter, RequestRouting, current_routing, pin_to_primary
+from api.views import WorkshopCalendarView
+
+
+class FastSerializerTests(TestCase):
+    """
+    Checks that the fast read serializers render the same JSON as the plain
+    DRF serializers, for querysets, lists of instances and single instances.
+    """
+
+    def setUp(self):
+        companies = [
+            Company.objects.create(name='Acme', description='Makes everything', picture='https://example.com/a.png',
+                                   website='https://example.com'),
+            Company.objects.create(name='Café ünïcode', description=''),
+        ]
+        for i, company in enumerate(companies):
+            Job.objects.create(title='Job {}'.format(i), description='Description', responsibilities='Build',
+                               company=company, salary=1000 * i, location='Singapore', job_type='Part-time',
+                               experience='B35', is_active=bool(i))
+            Job.objects.create(title='Blank choices {}'.format(i), description='', company=company, salary=0,
+                               job_type='', experience='')
+            WorkExperience.objects.create(company=company, role='Engineer', description='',
+                                          start_time=datetime.date(2023, 1, 1), end_time=datetime.date(2023, 6, 1))
+            Workshop.objects.create(title='Workshop {}'.format(i), organizer=company, location='Singapore',
+                                    start_time=datetime.date(2024, 2, 29), end_time=datetime.date(2024, 3, 1))
+
+    def assertSameJSON(self, serializer_class, data, many):
+        fast = JSONRenderer().render(serializer_class(data, many=many).data)
+        with drf_serialization():
+            drf = JSONRenderer().render(serializer_class(data, many=many).data)
+        self.assertEqual(fast, drf)
+
+    def test_fast_serializers_render_the_same_json_as_drf(self):
+        for serializer_class, model in [
+            (CompanySerializer, Company), (JobSerializer, Job), (JobListSerializer, Job),
+            (JobCardSerializer, JobCard), (WorkExperienceSerializer, WorkExperience),
+            (WorkshopSerializer, Workshop),
+        ]:
+            queryset = apply_prefetch_plan(model.objects.order_by('pk'), serializer_class)
+            with self.subTest(serializer=serializer_class.__name__):
+                # The fast path is taken, rather than falling back to DRF
+                self.assertIsNotNone(get_plan(serializer_class()))
+                self.assertSameJSON(serializer_class, queryset, many=True)
+                self.assertSameJSON(serializer_class, list(queryset), many=True)
+                self.assertSameJSON(serializer_class, queryset.first(), many=False)
+
+
+class QueryCountTests(TestCase):
+    """
+    Checks that the lists, the saved items and the profiles are read with a
+    number of queries that does not grow with the number of rows (see
+    api.utils.prefetch).
+    """
+    paths = [
+        '/api/job/', '/api/job/?page_size=10', '/api/company/', '/api/work_experience/', '/api/workshop/',
+        '/api/workshop/calendar/', '/api/user/ada/saved_jobs/', '/api/user/ada/saved_experiences/',
+        '/api/user/ada/saved_workshops/', '/api/user/ada/', '/api/user/ada/?compact=true',
+    ]
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        user = User.objects.create(username='ada')
+        self.profile = UserProfile.objects.create(user=user, name='Ada')
+        self.client = APIClient()
+        self.client.force_authenticate(user)
+        self.add_rows(1)
+
+    def add_rows(self, count):
+        start = timezone.localdate() + datetime.timedelta(days=1)
+        for i in range(count):
+            company = Company.objects.create(name='Company {}'.format(i), description='')
+            job = Job.objects.create(title='Job {}'.format(i), description='', company=company, salary=0)
+            experience = WorkExperience.objects.create(company=company, role='Role', description='',
+                                                       start_time=start, end_time=start)
+            workshop = Workshop.objects.create(title='Workshop {}'.format(i), organizer=company,
+                                               start_time=start, end_time=start)
+            self.profile.saved_jobs.add(job)
+            self.profile.saved_experiences.add(experience)
+            self.profile.saved_workshops.add(workshop)
+
+    def test_queries_do_not_grow_with_rows(self):
+        counts = {}
+        for path in self.paths:
+            # The responses are not cached between the requests
+            cache.clear()
+            with CaptureQueriesContext(connection) as queries:
+                self.assertEqual(self.client.get(path).status_code, 200)
+            counts[path] = len(queries)
+
+        self.add_rows(5)
+        for path in self.paths:
+            cache.clear()
+            with self.subTest(path=path), self.assertNumQueries(counts[path]):
+                self.assertEqual(self.client.get(path).status_code, 200)
+
+
+class FilterQueryPlanTests(TestCase):
+    """
+    Checks that every combination of the list filters is answered through
+    an index rather than by scanning the table, so that the filters keep
+    scaling as the tables grow, and that the workshop calendar is read in
+    its order from an index. On PostgreSQL, sequential scans and sorts are
+    disabled so that the plan does not depend on the size of the test
+    tables: they still show up when no index can serve the query.
+    """
+
+    # Filters, and the indexes that can serve them (any index for an empty tuple)
+    JOB_FILTERS = [
+        ({'job_type__in': 'Full-time,Internship'}, ('job_type_experience_idx',)),
+        ({'experience__in': 'B12,B26'}, ('job_experience_idx',)),
+        ({'job_type__in': 'Full-time', 'experience__in': 'B12'}, ('job_type_experience_idx', 'job_experience_idx')),
+        ({'is_active': 'true', 'job_type__in': 'Full-time'}, ('job_active_type_exp_idx', 'job_type_experience_idx')),
+        ({'is_active': 'true', 'experience__in': 'B12'}, ('job_active_type_exp_idx', 'job_experience_idx')),
+        ({'is_active': 'true', 'job_type__in': 'Full-time,Part-time', 'experience__in': 'B12,B26'},
+         ('job_active_type_exp_idx', 'job_type_experience_idx')),
+        ({'company_id__in': '1,2'}, ()),
+        ({'company__name__in': 'Acme,Globex'}, ('company_name_idx',)),
+    ]
+
+    JOB_CARD_FILTERS = [
+        ({'job_type__in': 'Full-time,Internship'}, ('jobcard_type_experience_idx',)),
+        ({'experience__in': 'B12,B26'}, ('jobcard_experience_idx',)),
+        ({'is_active': 'true', 'job_type__in': 'Full-time,Part-time', 'experience__in': 'B12,B26'},
+         ('jobcard_active_type_exp_idx', 'jobcard_type_experience_idx')),
+        ({'company_id__in': '1,2'}, ()),
+        ({'company__name__in': 'Acme,Globex'}, ('jobcard_company_name_idx',)),
+    ]
+
+    WORKSHOP_FILTERS = [
+        ({'organizer_id__in': '1,2'}, ()),
+        ({'organizer__name__in': 'Acme,Globex'}, ('company_name_idx',)),
+        ({'location__in': 'Singapore,Jakarta'}, ('workshop_location_idx',)),
+        ({'ends_after': '2023-01-01'}, ('workshop_end_start_idx',)),
+        ({'ends_after': '2023-01-01', 'starts_before': '2023-01-31'},
+         ('workshop_end_start_idx', 'workshop_start_id_idx')),
+    ]
+
+    @classmethod
+    def setUpTestData(cls):
+        companies = Company.objects.bulk_create(
+            Company(name='Company {}'.format(i), description='') for i in range(20)
+        )
+        Job.objects.bulk_create(
+            Job(title='Job {}'.format(i), description='', company=companies[i % 20], salary=0,
+                job_type=['Full-time', 'Part-time', 'Internship'][i % 3], experience=['LT1', 'B12', 'B26'][i % 3],
+                is_active=i % 4 != 0)
+            for i in range(200)
+        )
+        rebuild_job_cards()
+        Workshop.objects.bulk_create(
+            Workshop(title='Workshop {}'.format(i), organizer=companies[i % 20], start_time='2023-01-01',
+                     end_time='2023-01-02', location='City {}'.format(i % 10))
+            for i in range(200)
+        )
+
+    def explain(self, queryset):
+        with transaction.atomic():
+            if connection.vendor == 'postgresql':
+                with connection.cursor() as cursor:
+                    cursor.execute('SET LOCAL enable_seqscan = off')
+                    cursor.execute('SET LOCAL enable_sort = off')
+            return queryset.explain()
+
+    def assertUsesIndex(self, queryset, table, indexes):
+        plan = self.explain(queryset)
+        if connection.vendor == 'postgresql':
+            self.assertNotIn('Seq Scan on {}'.format(table), plan)
+        else:
+            self.assertIsNone(re.search(r'\bSCAN {}\b(?! USING)'.format(table), plan), plan)
+        if indexes:
+            self.assertTrue(any(index in plan for index in indexes), plan)
+
+    def test_job_filters_use_indexes(self):
+        for params, indexes in self.JOB_FILTERS:
+            with self.subTest(params=params):
+                filterset = JobFilter(params, queryset=Job.objects.all())
+                self.assertTrue(filterset.is_valid(), filterset.errors)
+                self.assertUsesIndex(filterset.qs.order_by(), 'api_job', indexes)
+
+    def test_job_card_filters_use_indexes(self):
+        for params, indexes in self.JOB_CARD_FILTERS:
+            with self.subTest(params=params):
+                filterset = JobCardFilter(params, queryset=JobCard.objects.all())
+                self.assertTrue(filterset.is_valid(), filterset.errors)
+                self.assertUsesIndex(filterset.qs.order_by(), 'api_jobcard', indexes)
+
+    def test_workshop_filters_use_indexes(self):
+        for params, indexes in self.WORKSHOP_FILTERS:
+            with self.subTest(params=params):
+                filterset = WorkshopFilter(params, queryset=Workshop.objects.all())
+                self.assertTrue(filterset.is_valid(), filterset.errors)
+                self.assertUsesIndex(filterset.qs.order_by(), 'api_workshop', indexes)
+
+    def test_workshop_calendar_is_read_in_order(self):
+        cursor = urlsafe_b64encode(json.dumps({'p': ['2023-01-01', 100]}).encode()).decode()
+        for params in [{}, {'page_size': 12}, {'cursor': cursor}, {'ends_after': '2023-01-01'},
+                       {'ends_after': '2023-01-01', 'starts_before': '2023-01-31', 'cursor': cursor}]:
+            with self.subTest(params=params):
+                request = Request(APIRequestFactory().get('/api/workshop/calendar/', params))
+                view = WorkshopCalendarView(request=request, format_kwarg=None, kwargs={})
+                queryset = view.filter_queryset(view.get_queryset())
+                page = CalendarPagination().get_page_queryset(queryset, request, view)
+                plan = self.explain(queryset if page is None else page)
+                self.assertIn('workshop_start_id_idx', plan)
+                self.assertIsNone(re.search(r'\bSort\b|TEMP B-TREE FOR ORDER BY', plan), plan)
+
+
+class JobCardTests(TestCase):
+    """
+    Checks that the job cards stay in sync with the jobs and their companies,
+    and serialize exactly as the jobs do.
+    """
+
+    def setUp(self):
+        self.company = Company.objects.create(name='Acme', description='Anvils', website='https://acme.example')
+        self.jobs = [
+            Job.objects.create(title='Job {}'.format(i), description='', company=self.company, salary=i)
+            for i in range(3)
+        ]
+
+    def assertCardsMatchJobs(self):
+        self.assertEqual(
+            JobCardSerializer(JobCard.objects.order_by('pk'), many=True).data,
+            JobListSerializer(Job.objects.order_by('pk'), many=True).data,
+        )
+
+    def test_cards_follow_changes(self):
+        self.assertCardsMatchJobs()
+        self.jobs[0].title = 'Renamed'
+        self.jobs[0].save()
+        self.company.name = 'Acme Corp'
+        self.company.save()
+        self.jobs[1].delete()
+        self.assertCardsMatchJobs()
+        self.company.delete()
+        self.assertFalse(JobCard.objects.exists())
+
+    def test_rebuild(self):
+        JobCard.objects.update(title='Stale')
+        self.assertEqual(rebuild_job_cards(), 3)
+        self.assertCardsMatchJobs()
+
+
+class PlaceTests(TestCase):
+    """
+    Checks the resolution of the locations to the places of the gazetteer,
+    which migration 0017 loads, and the nearby search over them.
+    """
+
+    def test_resolve_place_id(self):
+        kuala_lumpur = Place.objects.get(name='Kuala Lumpur').pk
+        for location in ['Kuala Lumpur', '  kuala   LUMPUR ', 'KL', 'Kuala Lumpur, Malaysia']:
+            with self.subTest(location=location):
+                self.assertEqual(resolve_place_id(location), kuala_lumpur)
+        for location in ['', 'Remote', 'Atlantis']:
+            with self.subTest(location=location):
+                self.assertIsNone(resolve_place_id(location))
+
+    def test_places_follow_locations(self):
+        company = Company.objects.create(name='Acme', description='')
+        job = Job.objects.create(title='Job', description='', company=company, salary=0, location='Jakarta')
+        jakarta = Place.objects.get(name='Jakarta')
+        self.assertEqual(JobCard.objects.get(pk=job.pk).place_id, jakarta.pk)
+        job.location = 'Remote'
+        job.save()
+        self.assertIsNone(JobCard.objects.get(pk=job.pk).place_id)
+
+    def test_places_within_radius(self):
+        places = list(Place.objects.all())
+        # Including circles across the antimeridian and around a pole
+        for latitude, longitude, radius in [(1.35, 103.8, 400), (-18.0, -179.9, 500), (21.0, 180.0, 300),
+                                            (89.0, 0.0, 500), (-33.9, 151.2, 0)]:
+            with self.subTest(latitude=latitude, longitude=longitude, radius=radius):
+                expected = {
+                    place.pk for place in places
+                    if haversine_km(latitude, longitude, place.latitude, place.longitude) <= radius
+                }
+                found = places_within(latitude, longitude, radius)
+                self.assertEqual({place.pk for place, _ in found}, expected)
+                distances = [distance for _, distance in found]
+                self.assertEqual(distances, sorted(distances))
+
+
+class RecommendationTests(TestCase):
+    """
+    Checks the job neighbours computed block by block against the dense
+    co-occurrence matrix, and the recommendations merged from them.
+    """
+
+    def test_neighbors_match_dense_cooccurrence(self):
+        rng = np.random.default_rng(0)
+        saved = rng.random((30, 40)) < 0.2
+        active = rng.random(40) < 0.8
+        users, jobs = np.nonzero(saved)
+        saves = np.array(list(zip(users, jobs + 1, active[jobs])), dtype=SAVE_DTYPE)
+
+        counts = saved.T.astype(float) @ saved
+        cosine = counts / np.sqrt(np.outer(saved.sum(axis=0), saved.sum(axis=0)).clip(1))
+        expected = {}
+        for job in range(40):
+            others = [other for other in range(40) if other != job and active[other] and counts[job, other]]
+            others.sort(key=lambda other: (-cosine[job, other], other))
+            if others:
+                expected[job + 1] = [(other + 1, cosine[job, other]) for other in others[:5]]
+
+        found = {}
+        for job_ids, neighbor_ids, scores in compute_job_neighbors(saves, top_k=5, block_size=7):
+            for job_id, neighbor_id, score in zip(job_ids.tolist(), neighbor_ids.tolist(), scores.tolist()):
+                found.setdefault(job_id, []).append((neighbor_id, score))
+        self.assertEqual(found.keys(), expected.keys())
+        for job_id, neighbors in expected.items():
+            self.assertEqual([id for id, _ in found[job_id]], [id for id, _ in neighbors])
+            np.testing.assert_allclose([score for _, score in found[job_id]], [score for _, score in neighbors])
+
+    def test_recommended_jobs(self):
+        company = Company.objects.create(name='Acme', description='')
+        jobs = [Job.objects.create(title='Job {}'.format(i), description='', company=company, salary=0)
+                for i in range(5)]
+        profiles = [UserProfile.objects.create(user=User.objects.create(username='user{}'.format(i)), name='')
+                    for i in range(3)]
+        profiles[0].saved_jobs.set([jobs[0], jobs[1]])
+        profiles[1].saved_jobs.set([jobs[0], jobs[1], jobs[2]])
+        profiles[2].saved_jobs.set([jobs[0], jobs[3], jobs[4]])
+        jobs[4].is_active = False
+        jobs[4].save()
+        build_job_neighbors()
+        self.assertFalse(JobNeighbor.objects.filter(neighbor=jobs[4]).exists())
+
+        recommended = recommended_jobs('user0', 10)
+        self.assertEqual([job['id'] for job in recommended], [jobs[2].pk, jobs[3].pk])
+        self.assertGreater(recommended[0]['score'], recommended[1]['score'])
+        self.assertEqual(recommended_jobs('nobody', 10), [])
+
+
+class SimilarJobTests(TestCase):
+    """
+    Checks the similar jobs index against the cosine similarities of the
+    stored vectors, and its incremental updates.
+    """
+
+    def setUp(self):
+        self.company = Company.objects.create(name='Acme', description='')
+        texts = [
+            ('Python Developer', 'Build Django web services in Python'),
+            ('Senior Python Engineer', 'Design Python and Django services'),
+            ('Data Analyst', 'Analyse sales data and build dashboards'),
+            ('Data Scientist', 'Train models on sales data in Python'),
+            ('Pastry Chef', 'Bake pastries and bread every morning'),
+        ]
+        self.jobs = [Job.objects.create(title=title, description=description, company=self.company, salary=0)
+                     for title, description in texts]
+
+    def vectors(self):
+        vectors = {}
+        for job_id, term_id, weight in JobTerm.objects.values_list('job_id', 'term_id', 'weight'):
+            vectors.setdefault(job_id, {})[term_id] = weight
+        return vectors
+
+    def test_build_matches_cosine_similarities(self):
+        build_similar_jobs(top_k=3)
+        vectors = self.vectors()
+        for job_id, vector in vectors.items():
+            scores = {
+                other: sum(weight * vectors[other].get(term, 0) for term, weight in vector.items())
+                for other in vectors if other != job_id
+            }
+            expected = sorted((other for other in scores if scores[other] > 0), key=lambda other: (-scores[other], other))
+            with self.subTest(job=job_id):
+                self.assertEqual([job['id'] for job in similar_jobs(job_id)], expected[:3])
+        self.assertEqual(similar_jobs(self.jobs[4].pk), [])
+
+    def test_incremental_updates(self):
+        build_similar_jobs()
+        with self.captureOnCommitCallbacks(execute=True):
+            job = Job.objects.create(title='Python Django Developer', description='Build Django services in Python',
+                                     company=self.company, salary=0)
+        self.assertEqual(similar_jobs(job.pk)[0]['id'], self.jobs[0].pk)
+        self.assertIn(job.pk, [job['id'] for job in similar_jobs(self.jobs[0].pk)])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            job.is_active = False
+            job.save()
+        self.assertFalse(SimilarJob.objects.filter(similar_id=job.pk).exists())
+        self.assertEqual(similar_jobs(job.pk), [])
+
+    def test_candidates(self):
+        build_similar_jobs()
+        term_ids = list(JobTerm.objects.filter(job=self.jobs[0]).values_list('term_id', flat=True))
+        sharing = set(JobTerm.objects.filter(term_id__in=term_ids).values_list('job_id', flat=True))
+        self.assertEqual(_candidate_ids(term_ids), sharing)
+
+        with mock.patch('api.logic.job_similarity.CANDIDATES_PER_TERM', 1):
+            candidates = _candidate_ids(term_ids)
+        self.assertLessEqual(len(candidates), len(term_ids))
+        for term_id in term_ids:
+            heaviest = JobTerm.objects.filter(term_id=term_id).aggregate(Max('weight'))['weight__max']
+            with self.subTest(term=term_id):
+                self.assertTrue(JobTerm.objects.filter(term_id=term_id, job_id__in=candidates, weight=heaviest).exists())
+
+    def test_update_queries_do_not_grow_with_terms(self):
+        build_similar_jobs()
+        with CaptureQueriesContext(connection) as one_job:
+            update_similar_jobs([self.jobs[0].pk])
+        with self.assertNumQueries(len(one_job)):
+            update_similar_jobs([job.pk for job in self.jobs[:4]])
+
+
+class WorkshopCalendarTests(TestCase):
+    """
+    Checks the workshop calendar, and that the iCalendar feed of the saved
+    workshops is cached and rebuilt incrementally.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.company = Company.objects.create(name='Acme', description='')
+        today = timezone.localdate()
+        self.workshops = [
+            Workshop.objects.create(title='Workshop {}'.format(i), organizer=self.company, start_time=today + delta,
+                                    end_time=today + delta + datetime.timedelta(days=1))
+            for i, delta in enumerate(datetime.timedelta(days=days) for days in (5, -10, 1, -1))
+        ]
+        user = User.objects.create(username='ada')
+        self.profile = UserProfile.objects.create(user=user, name='Ada')
+        self.client = APIClient()
+        self.client.force_authenticate(user)
+
+    def calendar_ids(self, params=None):
+        response = self.client.get('/api/workshop/calendar/', params or {})
+        self.assertEqual(response.status_code, 200)
+        return [workshop['id'] for workshop in response.data]
+
+    def test_calendar(self):
+        first, past, second, ending = self.workshops
+        self.assertEqual(self.calendar_ids(), [ending.pk, second.pk, first.pk])
+        start = timezone.localdate() - datetime.timedelta(days=10)
+        self.assertEqual(self.calendar_ids({'ends_after': start, 'starts_before': start}), [past.pk])
+
+    def test_saved_workshops_feed(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            for workshop in self.workshops[:3]:
+                save_workshop(self.profile.pk, workshop.pk)
+        feed = saved_workshops_calendar(self.profile.pk)
+        self.assertTrue(feed.startswith('BEGIN:VCALENDAR\r\n'))
+        self.assertEqual(re.findall(r'UID:workshop-(\d+)@', feed), [str(self.workshops[i].pk) for i in (1, 2, 0)])
+        with self.assertNumQueries(0):
+            self.assertEqual(saved_workshops_calendar(self.profile.pk), feed)
+
+        # Only the event of the workshop that changed is rendered again
+        with self.captureOnCommitCallbacks(execute=True):
+            self.workshops[0].title = 'Renamed, again'
+            self.workshops[0].save()
+        with mock.patch('api.logic.workshop_calendar.render_event', wraps=render_event) as render:
+            feed = saved_workshops_calendar(self.profile.pk)
+        self.assertEqual([call.args[0].pk for call in render.call_args_list], [self.workshops[0].pk])
+        self.assertIn('SUMMARY:Renamed\\, again\r\n', feed)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            unsave_workshop(self.profile.pk, self.workshops[1].pk)
+        self.assertNotIn('UID:workshop-{}@'.format(self.workshops[1].pk), saved_workshops_calendar(self.profile.pk))
+
+    def test_feed_token(self):
+        path = '/api/user/ada/saved_workshops/calendar_token/'
+        self.assertEqual(APIClient().get('/api/saved_workshops/calendar/unknown.ics').status_code, 404)
+        other = APIClient()
+        other.force_authenticate(User.objects.create(username='eve'))
+        self.assertEqual(other.post(path).status_code, 403)
+
+        url = self.client.post(path).data['url']
+        response = APIClient().get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/calendar; charset=utf-8')
+
+        # A new token revokes the previous one
+        new_url = self.client.post(path).data['url']
+        self.assertEqual(APIClient().get(url).status_code, 404)
+        self.assertEqual(APIClient().get(new_url).status_code, 200)
+        self.assertEqual(self.client.delete(path).status_code, 204)
+        self.assertEqual(APIClient().get(new_url).status_code, 404)
+
+
+@override_settings(TRENDING_HALF_LIFE_DAYS=7)
+class TrendingWorkshopTests(TestCase):
+    """
+    Checks that the trending scores maintained by the saves match a replay of
+    the saved workshops, and that older saves count less.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        company = Company.objects.create(name='Acme', description='')
+        self.workshops = [
+            Workshop.objects.create(title='Workshop {}'.format(i), organizer=company, start_time='2024-01-01',
+                                    end_time='2024-01-02')
+            for i in range(3)
+        ]
+        self.profiles = [
+            UserProfile.objects.create(user=User.objects.create(username='user{}'.format(i)), name='User')
+            for i in range(3)
+        ]
+
+    def scores(self):
+        return dict(Workshop.objects.values_list('pk', 'trending_score'))
+
+    def test_incremental_scores_match_rebuild(self):
+        first, second, third = self.workshops
+        for profile in self.profiles:
+            save_workshop(profile.pk, first.pk)
+        save_workshop(self.profiles[0].pk, second.pk)
+        unsave_workshop(self.profiles[1].pk, first.pk)
+        apply_saved_items(self.profiles[2], [
+            {'type': 'workshop', 'id': first.pk, 'save': False},
+            {'type': 'workshop', 'id': second.pk, 'save': True},
+            {'type': 'workshop', 'id': third.pk, 'save': True},
+        ])
+        scores = self.scores()
+        self.assertEqual(rebuild_trending_scores(), 4)
+        for id, score in self.scores().items():
+            with self.subTest(workshop=id):
+                self.assertAlmostEqual(scores[id] / score, 1)
+        self.assertAlmostEqual(decay(scores[second.pk]), 2, places=3)
+
+    def test_older_saves_count_less(self):
+        first, second, _ = self.workshops
+        month_ago = timezone.now() - datetime.timedelta(days=30)
+        SavedWorkshop.objects.bulk_create(
+            SavedWorkshop(userprofile=profile, workshop=first, saved_at=month_ago) for profile in self.profiles
+        )
+        SavedWorkshop.objects.create(userprofile=self.profiles[0], workshop=second)
+        rebuild_trending_scores()
+
+        client = APIClient()
+        client.force_authenticate(self.profiles[0].user)
+        response = client.get('/api/workshop/trending/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([workshop['id'] for workshop in response.data], [second.pk, first.pk])
+        self.assertAlmostEqual(response.data[0]['trending'], 1, places=3)
+        self.assertAlmostEqual(response.data[1]['trending'], 3 * 2 ** (-30 / 7), places=3)
+
+
+@override_settings(DATABASE_REPLICAS=['replica_0'])
+class ReplicaRouterTests(SimpleTestCase):
+    """
+    Checks which reads the router sends to the replicas.
+    """
+
+    def setUp(self):
+        self.router = ReplicaRouter()
+        self.routing = RequestRouting()
+        token = current_routing.set(self.routing)
+        self.addCleanup(current_routing.reset, token)
+
+    def test_reads_go_to_primary_by_default(self):
+        self.assertIsNone(self.router.db_for_read(Job))
+
+    def test_reads_of_read_only_views_go_to_replicas(self):
+        self.routing.replica_reads = True
+        self.assertEqual(self.router.db_for_read(Job), 'replica_0')
+
+    def test_reads_after_write_go_to_primary(self):
+        self.routing.replica_reads = True
+        self.assertEqual(self.router.db_for_write(Job), 'default')
+        self.assertIsNone(self.router.db_for_read(Job))
+
+    def test_pinned_users_read_from_primary(self):
+        pin_to_primary(1)
+        self.addCleanup(cache.clear)
+        self.routing.replica_reads = True
+        self.routing.user_id = 1
+        self.assertIsNone(self.router.db_for_read(Job))
+        other = RequestRouting()
+        other.replica_reads = True
+        other.user_id = 2
+        current_routing.set(other)
+        self.assertEqual(self.router.db_for_read(Job), 'replica_0')
+
+    def test_cached_responses_are_read_from_primary(self):
+        self.addCleanup(cache.clear)
+        self.routing.replica_reads = True
+        reads = []
+
+        @conditional_response(lambda view, request, **kwargs: reads.append(self.router.db_for_read(Job)))
+        @cache_response('replica-test')
+        def get(view, request):
+            reads.append(self.router.db_for_read(Job))
+            return Response({})
+
+        get(None, Request(APIRequestFactory().get('/')))
+        self.assertEqual(reads, [None, None])
+
+
+class KeysetPaginationTests(TestCase):
+    """
+    Checks that following the cursors of the job and workshop lists, forwards
+    or backwards, visits every row exactly once, including rows tied on
+    `updated_at`.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        company = Company.objects.create(name='Acme', description='')
+        for i in range(11):
+            Job.objects.create(title='Job {}'.format(i), description='', company=company, salary=0)
+            Workshop.objects.create(title='Workshop {}'.format(i), organizer=company, start_time=timezone.localdate(),
+                                    end_time=timezone.localdate())
+        # Ties on the first ordering field
+        tied = timezone.now()
+        for model in (Job, Workshop):
+            model.objects.filter(pk__in=model.objects.order_by('pk').values('pk')[3:8]).update(updated_at=tied)
+        rebuild_job_cards()
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create(username='ada'))
+
+    def follow(self, url, link):
+        ids = []
+        while url is not None:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            page_ids = [row['id'] for row in response.data['results']]
+            ids.extend(page_ids if link == 'next' else reversed(page_ids))
+            url = response.data[link]
+        return ids
+
+    def test_pages_cover_every_row_once(self):
+        for path, model in [('/api/job/', Job), ('/api/workshop/', Workshop)]:
+            expected = list(model.objects.order_by('-updated_at', '-id').values_list('pk', flat=True))
+            with self.subTest(path=path):
+                self.assertEqual(self.follow(path + '?page_size=3', 'next'), expected)
+                # Back from the last page
+                response = self.client.get(path + '?page_size=3')
+                while response.data['next'] is not None:
+                    response = self.client.get(response.data['next'])
+                backwards = [row['id'] for row in reversed(response.data['results'])]
+                backwards += self.follow(response.data['previous'], 'previous')
+                self.assertEqual(backwards, expected[::-1])
+
+
+class JobSearchTests(TestCase):
+    """
+    Checks the job search through `?q=`: the matches, their ranking, and the
+    cursor pages over them. The tests run the search of the database, and
+    the fallback of the databases without full-text search.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        company = Company.objects.create(name='Acme', description='')
+        # The word in the title, then in the description, then in the responsibilities
+        self.tiers = [[], [], []]
+        for i in range(12):
+            fields = [{'title': 'Python Developer'}, {'title': 'Data Analyst', 'description': 'Dashboards in Python'},
+                      {'title': 'Backend Engineer', 'responsibilities': 'Maintain Python services'}][i % 3]
+            job = Job.objects.create(**{'description': '', **fields}, company=company, salary=0)
+            self.tiers[i % 3].append(job.pk)
+        Job.objects.create(title='Pastry Chef', description='Bake the bread', company=company, salary=0)
+        # Ties on the rank and on the first ordering field
+        Job.objects.filter(pk__in=self.tiers[0][:3]).update(updated_at=timezone.now())
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create(username='ada'))
+
+    def search(self, query):
+        response = self.client.get('/api/job/', {'q': query})
+        self.assertEqual(response.status_code, 200)
+        return [row['id'] for row in response.data]
+
+    def fallback(self):
+        return mock.patch('api.logic.job_search.is_postgresql', return_value=False)
+
+    def backends(self):
+        # The search of the database, then the fallback (the same on SQLite)
+        return [('database', contextlib.nullcontext()), ('fallback', self.fallback())]
+
+    def test_ranking(self):
+        for backend, context in self.backends():
+            cache.clear()
+            with self.subTest(backend=backend), context:
+                ids = self.search('python')
+                self.assertEqual([set(ids[:4]), set(ids[4:8]), set(ids[8:])], [set(tier) for tier in self.tiers])
+                self.assertEqual(self.search('PYTHON'), ids)
+                # Every term has to match
+                self.assertEqual(set(self.search('python dashboards')), set(self.tiers[1]))
+                self.assertEqual(self.search('python bread'), [])
+
+    def test_fallback_matches_parts_of_words(self):
+        with self.fallback():
+            self.assertEqual(set(self.search('dashboard')), set(self.tiers[1]))
+            self.assertEqual(set(self.search('acme pyth')), {pk for tier in self.tiers for pk in tier})
+
+    def test_empty_queries_list_every_job(self):
+        every_job = self.client.get('/api/job/').data
+        for query in ('', '   '):
+            with self.subTest(query=query):
+                self.assertEqual(self.client.get('/api/job/', {'q': query}).data, every_job)
+
+    @skipUnless(connection.vendor == 'postgresql', "Stop words are only dropped by the full-text search")
+    def test_stop_words(self):
+        self.assertEqual(self.search('the'), [])
+        self.assertEqual(self.search('the python'), self.search('python'))
+
+    def test_pages_cover_every_match_once(self):
+        for backend, context in self.backends():
+            cache.clear()
+            with self.subTest(backend=backend), context:
+                expected = self.search('python')
+                ids = []
+                url = '/api/job/?q=python&page_size=5'
+                while url is not None:
+                    response = self.client.get(url)
+                    self.assertEqual(response.status_code, 200)
+                    ids.extend(row['id'] for row in response.data['results'])
+                    url = response.data['next']
+                self.assertEqual(ids, expected)
+
+
+class JobFacetsTests(TestCase):
+    """
+    Checks the counts of the job board sidebar: each facet ignores its own
+    filters but applies the others, and the cached counts follow the changes
+    to the jobs and to the names of their companies.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.acme = Company.objects.create(name='Acme', description='')
+        beta = Company.objects.create(name='Beta', description='')
+        self.jobs = [
+            Job.objects.create(title=title, description='', company=company, salary=0, job_type=job_type,
+                               experience=experience, is_active=is_active)
+            for title, company, job_type, experience, is_active in [
+                ('Developer', self.acme, 'Full-time', 'LT1', True),
+                ('Designer', self.acme, 'Part-time', 'LT1', True),
+                ('Analyst', self.acme, 'Full-time', 'B12', False),
+                ('Engineer', beta, 'Full-time', 'B12', True),
+                ('Intern', beta, 'Internship', 'GT6', True),
+            ]
+        ]
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create(username='ada'))
+
+    def facets(self, **params):
+        response = self.client.get('/api/job/facets/', params)
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        return {
+            'total': data['total'],
+            'job_type': {row['value']: row['count'] for row in data['job_type'] if row['count']},
+            'experience': {row['value']: row['count'] for row in data['experience'] if row['count']},
+            'company': {row['name']: row['count'] for row in data['company']},
+        }
+
+    def test_facets_ignore_their_own_filters(self):
+        self.assertEqual(self.facets(job_type__in='Full-time', experience__in='B12'), {
+            'total': 2,
+            'job_type': {'Full-time': 2},
+            'experience': {'LT1': 1, 'B12': 2},
+            'company': {'Acme': 1, 'Beta': 1},
+        })
+        self.assertEqual(self.facets(company__name__in='Beta', job_type__in='Full-time,Part-time'), {
+            'total': 1,
+            'job_type': {'Full-time': 1, 'Internship': 1},
+            'experience': {'B12': 1},
+            'company': {'Acme': 3, 'Beta': 1},
+        })
+
+    def test_inactive_jobs(self):
+        self.assertEqual(self.facets()['total'], 5)
+        self.assertEqual(self.facets(is_active='true'), {
+            'total': 4,
+            'job_type': {'Full-time': 2, 'Part-time': 1, 'Internship': 1},
+            'experience': {'LT1': 2, 'B12': 1, 'GT6': 1},
+            'company': {'Acme': 2, 'Beta': 2},
+        })
+
+    def test_invalidation(self):
+        self.assertEqual(self.facets()['job_type'], {'Full-time': 3, 'Part-time': 1, 'Internship': 1})
+        with self.captureOnCommitCallbacks(execute=True):
+            self.jobs[1].job_type = 'Other'
+            self.jobs[1].save()
+        self.assertEqual(self.facets()['job_type'], {'Full-time': 3, 'Other': 1, 'Internship': 1})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.acme.name = 'Acme Corp'
+            self.acme.save()
+        self.assertEqual(self.facets()['company'], {'Acme Corp': 3, 'Beta': 2})
+
+
+class ResponseCacheTests(TestCase):
+    """
+    Checks that the cached lists and details are served from the cache until
+    a write to the objects they show, or to the objects nested in them.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.company = Company.objects.create(name='Acme', description='')
+        self.job = Job.objects.create(title='Job', description='', company=self.company, salary=0)
+        self.workshop = Workshop.objects.create(title='Workshop', organizer=self.company,
+                                                start_time=timezone.localdate(), end_time=timezone.localdate())
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create(username='ada'))
+
+    def test_write_invalidates_cached_list(self):
+        self.client.get('/api/job/')
+        with mock.patch('api.views.JobListView.get_serializer', side_effect=AssertionError('not cached')):
+            self.assertEqual(self.client.get('/api/job/').data[0]['title'], 'Job')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.job.title = 'Renamed'
+            self.job.save()
+        self.assertEqual(self.client.get('/api/job/').data[0]['title'], 'Renamed')
+
+    def test_nested_write_invalidates_cached_responses(self):
+        paths = ['/api/job/', '/api/job/{}/'.format(self.job.pk), '/api/workshop/',
+                 '/api/workshop/{}/'.format(self.workshop.pk)]
+        for path in paths:
+            self.client.get(path)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.company.name = 'Renamed'
+            self.company.save()
+        for path in paths:
+            data = self.client.get(path).data
+            item = data[0] if isinstance(data, list) else data
+            with self.subTest(path=path):
+                self.assertEqual((item.get('company') or item.get('organizer'))['name'], 'Renamed')
+
+    def test_write_during_build_is_not_cached(self):
+        list_rows = ListModelMixin.list
+
+        def list_then_rename(view, request, *args, **kwargs):
+            response = list_rows(view, request, *args, **kwargs)
+            # Committed after the rows were read, before the response is cached
+            with self.captureOnCommitCallbacks(execute=True):
+                self.company.name = 'Renamed'
+                self.company.save()
+            return response
+
+        with mock.patch.object(ListModelMixin, 'list', list_then_rename):
+            self.assertEqual(self.client.get('/api/job/').data[0]['company']['name'], 'Acme')
+        self.assertEqual(self.client.get('/api/job/').data[0]['company']['name'], 'Renamed')
+
+
+class ConditionalResponseTests(TestCase):
+    """
+    Checks that the job list and details answer conditional requests with
+    304 until they change.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.company = Company.objects.create(name='Acme', description='')
+        self.jobs = [Job.objects.create(title='Job {}'.format(i), description='', company=self.company, salary=0)
+                     for i in range(2)]
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create(username='ada'))
+
+    def test_list(self):
+        response = self.client.get('/api/job/')
+        etag = response.headers['ETag']
+        self.assertNotIn('Last-Modified', response.headers)
+        self.assertEqual(self.client.get('/api/job/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.jobs[0].title = 'Renamed'
+            self.jobs[0].save()
+        self.assertEqual(self.client.get('/api/job/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_list_after_deletion(self):
+        etag = self.client.get('/api/job/').headers['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            self.jobs[0].delete()
+        response = self.client.get('/api/job/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), 1)
+
+    def test_list_from_cache(self):
+        etag = self.client.get('/api/job/').headers['ETag']
+        # Answered from the cached response, without reading the jobs
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get('/api/job/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        # Rebuilding the same response gives the same ETag
+        cache.clear()
+        self.assertEqual(self.client.get('/api/job/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+    def test_detail(self):
+        path = '/api/job/{}/'.format(self.jobs[0].pk)
+        response = self.client.get(path)
+        self.assertEqual(self.client.get(path, HTTP_IF_NONE_MATCH=response.headers['ETag']).status_code, 304)
+        self.assertEqual(
+            self.client.get(path, HTTP_IF_MODIFIED_SINCE=response.headers['Last-Modified']).status_code, 304
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            self.jobs[0].save()
+        self.assertEqual(self.client.get(path, HTTP_IF_NONE_MATCH=response.headers['ETag']).status_code, 200)
+
+
+class MetricsTests(TestCase):
+    """
+    Checks that the requests are measured, that the metrics are restricted to
+    staff users, and that the files of the exited workers are retired once.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings = override_settings(METRICS_DIR=directory.name)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.directory = directory.name
+        self.registry = MetricsRegistry()
+        for target in ('api.middleware.registry', 'api.views.registry'):
+            patcher = mock.patch(target, self.registry)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        company = Company.objects.create(name='Acme', description='')
+        Job.objects.create(title='Job', description='', company=company, salary=0)
+        self.user = User.objects.create(username='ada')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_request_is_measured(self):
+        response = self.client.get('/api/job/')
+        queries = int(re.search(r'db;dur=[0-9.]+;desc="(\d+) queries"', response.headers['Server-Timing']).group(1))
+        self.assertGreater(queries, 0)
+        for phase in ('serialize', 'render', 'total'):
+            self.assertIn(phase + ';dur=', response.headers['Server-Timing'])
+        [series] = self.registry.collect()
+        self.assertEqual((series['route'], series['method'], series['status']), ('api/job/', 'GET', 200))
+        self.assertEqual((series['count'], series['queries']), (1, queries))
+
+    def test_log_query(self):
+        timings = RequestTimings()
+        token = current_timings.set(timings)
+        try:
+            Job.objects.count()
+        finally:
+            current_timings.reset(token)
+        self.assertEqual(timings.queries, 1)
+        self.assertGreater(timings.db, 0)
+        # Outside of a request
+        self.assertEqual(Job.objects.count(), 1)
+
+    def test_restricted_to_staff(self):
+        self.assertEqual(APIClient().get('/api/metrics/').status_code, 401)
+        self.assertEqual(self.client.get('/api/metrics/').status_code, 403)
+        self.user.is_staff = True
+        self.client.force_authenticate(self.user)
+        response = self.client.get('/api/metrics/')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('api_request_duration_seconds_count{route="api/metrics/",method="GET",status="403"} 1',
+                      response.content.decode())
+
+    def test_exited_workers_are_retired(self):
+        self.client.get('/api/job/')
+        [series] = self.registry.collect()
+        exited, other_host = 'worker-{}-1-1.json'.format(socket.gethostname()), 'worker-other-1-1.json'
+        for name, host in [(exited, socket.gethostname()), (other_host, 'other')]:
+            with open(os.path.join(self.directory, name), 'w') as file:
+                json.dump({'host': host, 'pid': 1, 'series': {'GET 200 api/job/': series}}, file)
+
+        with mock.patch('api.utils.metrics._is_running', side_effect=lambda pid: pid == os.getpid()):
+            for _ in range(2):
+                [total] = self.registry.collect()
+                self.assertEqual(total['count'], 3)
+        self.assertEqual(sorted(os.listdir(self.directory)), sorted([
+            '.lock', RETIRED_FILE, other_host, self.registry.file,
+        ]))
+
+
+class AsyncViewTests(TestCase):
+    """
+    Checks that the async views answer with the same status codes and bodies
+    as the sync views they replace under ASGI, and that the async login and
+    registration hash the passwords in the password hashing pool.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        company = Company.objects.create(name='Acme', description='Makes everything')
+        user = User.objects.create(username='ada')
+        profile = UserProfile.objects.create(user=user, name='Ada')
+        for i in range(3):
+            job = Job.objects.create(title='Job {}'.format(i), description='', company=company, salary=i)
+            experience = WorkExperience.objects.create(company=company, role='Role {}'.format(i), description='',
+                                                       start_time=datetime.date(2023, 1, 1),
+                                                       end_time=datetime.date(2023, 6, 1))
+            workshop = Workshop.objects.create(title='Workshop {}'.format(i), organizer=company,
+                                               start_time=datetime.date(2024, 1, 1), end_time=datetime.date(2024, 1, 2))
+            profile.saved_jobs.add(job)
+            profile.saved_experiences.add(experience)
+            save_workshop(profile.pk, workshop.pk)
+        self.paths = [
+            '/api/company/{}/'.format(company.pk), '/api/company/0/', '/api/job/', '/api/job/?page_size=2',
+            '/api/job/{}/'.format(job.pk), '/api/job/0/', '/api/workshop/{}/'.format(workshop.pk),
+            '/api/user/ada/saved_jobs/', '/api/user/ada/saved_experiences/', '/api/user/ada/saved_workshops/',
+            '/api/user/ada/saved_workshops/?page_size=2',
+        ]
+        self.headers = {'HTTP_AUTHORIZATION': 'Bearer {}'.format(AccessToken.for_user(user))}
+
+    @contextlib.contextmanager
+    def views(self, async_views):
+        import api.urls
+        import feminnovate_backend.urls
+
+        def reload():
+            clear_url_caches()
+            importlib.reload(api.urls)
+            importlib.reload(feminnovate_backend.urls)
+
+        try:
+            with override_settings(ASYNC_VIEWS=async_views):
+                reload()
+                yield
+        finally:
+            reload()
+
+    def serve(self, async_views):
+        responses = {}
+        with self.views(async_views):
+            for path in self.paths:
+                cache.clear()
+                response = self.client.get(path, **self.headers)
+                responses[path] = (response.status_code, response.json())
+        return responses
+
+    def test_async_views_match_sync_views(self):
+        sync_responses = self.serve(async_views=False)
+        async_responses = self.serve(async_views=True)
+        for path in self.paths:
+            with self.subTest(path=path):
+                self.assertEqual(async_responses[path], sync_responses[path])
+
+    def hashing_pool(self):
+        return mock.patch('api.logic.password_hashing.get_executor', wraps=password_hashing.get_executor)
+
+    def test_login(self):
+        user = User.objects.get(username='ada')
+        user.set_password('secret')
+        user.save()
+        with self.views(async_views=True):
+            with self.hashing_pool() as executor:
+                response = self.client.post('/api/auth/login/', {'username': 'ada', 'password': 'secret'})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(AccessToken(response.json()['access'])['user_id'], user.pk)
+            self.assertTrue(executor.called)
+
+            for username, password in [('ada', 'wrong'), ('grace', 'secret')]:
+                with self.subTest(username=username, password=password):
+                    response = self.client.post('/api/auth/login/', {'username': username, 'password': password})
+                    self.assertEqual(response.status_code, 401)
+                    self.assertIn('WWW-Authenticate', response.headers)
+
+    def test_register(self):
+        data = {'name': 'Grace', 'username': 'grace', 'email': 'grace@example.com', 'password': 'secret'}
+        with self.views(async_views=True):
+            with self.hashing_pool() as executor:
+                response = self.client.post('/api/auth/register/', data)
+            self.assertEqual(response.status_code, 201)
+            self.assertTrue(executor.called)
+            self.assertTrue(User.objects.get(username='grace').check_password('secret'))
+            self.assertTrue(UserProfile.objects.filter(user__username='grace', name='Grace').exists())
+
+            response = self.client.post('/api/auth/register/', dict(data, email='other@example.com'))
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(User.objects.filter(username='grace').count(), 1)
+
+
+class StreamingListTests(TestCase):
+    """
+    Checks that streamed lists have the same objects as the unstreamed ones,
+    and that lists are not streamed over ASGI, whose handler would read the
+    queryset on the event loop.
+    """
+
+    def setUp(self):
+        company = Company.objects.create(name='Acme', description='')
+        for i in range(3):
+            WorkExperience.objects.create(company=company, role='Role {}'.format(i), description='',
+                                          start_time=datetime.date(2024, 1, 1), end_time=datetime.date(2024, 6, 1))
+
+    def test_stream(self):
+        expected = self.client.get('/api/work_experience/').json()
+        response = self.client.get('/api/work_experience/', {'stream': 'json'})
+        self.assertTrue(response.streaming)
+        self.assertEqual(json.loads(b''.join(response.streaming_content)), expected)
+        response = self.client.get('/api/work_experience/', {'stream': 'ndjson'})
+        self.assertEqual([json.loads(line) for line in b''.join(response.streaming_content).splitlines()], expected)
+
+    async def test_asgi(self):
+        expected = (await self.async_client.get('/api/work_experience/')).json()
+        messages = await self.asgi_get('/api/work_experience/', 'stream=json')
+        self.assertEqual(messages[0]['status'], 200)
+        self.assertEqual(json.loads(b''.join(message.get('body', b'') for message in messages[1:])), expected)
+
+    async def asgi_get(self, path, query_string):
+        """
+        Serves the request with Django's ASGI handler, which iterates
+        streamed responses on the event loop, unlike the test client.
+        """
+        scope = {'type': 'http', 'method': 'GET', 'path': path, 'query_string': query_string.encode(),
+                 'headers': [], 'server': ('testserver', 80)}
+        messages = []
+
+        async def receive():
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+        async def send(message):
+            messages.append(message)
+
+        # As the test client does, so that the test transaction is kept
+        request_started.disconnect(close_old_connections)
+        request_finished.disconnect(close_old_connections)
+        try:
+            await ASGIHandler()(scope, receive, send)
+        finally:
+            request_started.connect(close_old_connections)
+            request_finished.connect(close_old_connections)
+        return messages
+
+
+class UserCacheTests(TestCase):
+    """
+    Checks that the authenticated users are loaded from the user cache, and
+    evicted from it once their changes are committed.
+    """
+
+    def setUp(self):
+        user_cache.clear()
+        self.addCleanup(user_cache.clear)
+        self.user = User.objects.create(username='ada')
+        self.token = AccessToken.for_user(self.user)
+        self.authentication = CachedJWTAuthentication()
+
+    def test_cache_hit(self):
+        self.assertEqual(self.authentication.get_user(self.token), self.user)
+        with self.assertNumQueries(0):
+            user = self.authentication.get_user(self.token)
+        self.assertEqual((user.pk, user.username), (self.user.pk, 'ada'))
+
+    def test_invalidation(self):
+        self.authentication.get_user(self.token)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.is_active = False
+            self.user.save()
+            # Until the change is committed
+            self.assertIsNotNone(user_cache.get(str(self.user.pk)))
+        self.assertIsNone(user_cache.get(str(self.user.pk)))
+        with self.assertRaises(AuthenticationFailed):
+            self.authentication.get_user(self.token)
+
+
+class WorkExperienceTests(TestCase):
+    """
+    Checks the creation and saving of work experiences, which the benchmark
+    scenarios exercise.
+    """
+
+    def setUp(self):
+        self.company = Company.objects.create(name='Acme', description='')
+        self.user = User.objects.create(username='ada')
+        UserProfile.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_create_and_save(self):
+        response = self.client.post('/api/work_experience/', {
+            'role': 'Engineer', 'description': 'An experience', 'start_time': '2023-01-01',
+            'end_time': '2023-06-01', 'company_id': self.company.pk,
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['company']['id'], self.company.pk)
+
+        response = self.client.post('/api/save/work_experience/', {'work_experience_id': response.data['id'],
+                                                                   'save': True}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(self.user.userprofile.saved_experiences.values_list('role', flat=True)), ['Engineer'])
+
+
+class BenchmarkRunnerTests(TestCase):
+    """
+    Checks that the benchmark scenarios writing data are rolled back after
+    each run, once their on-commit callbacks have run.
+    """
+
+    def test_write_scenarios_run_their_on_commit_callbacks(self):
+        company = Company.objects.create(name='Acme', description='')
+        user = User.objects.create(username='ada')
+        context = {'access': str(AccessToken.for_user(user)), 'company': company.pk}
+        [scenario] = [scenario for scenario in SCENARIOS if scenario.name == 'job create']
+        with mock.patch('api.logic.job_similarity.update_similar_jobs') as update:
+            response = ScenarioRunner(context).request(scenario)
+        self.assertEqual(response.status_code, 201)
+        update.assert_called_once_with([response.data['id']])
+        self.assertFalse(Job.objects.exists())
+
+
+class JobIngestionTests(TestCase):
+    """
+    Checks the responses of the bulk job ingestion to valid and invalid
+    bodies.
+    """
+
+    def setUp(self):
+        self.company = Company.objects.create(name='Acme', description='')
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create(username='ada'))
+
+    def post(self, body, content_type='application/json'):
+        return self.client.post('/api/job/bulk/', body, content_type=content_type)
+
+    def test_rejects_bodies_that_are_not_lists(self):
+        for body in ('42', 'null', '{"title": "Job"}', '"jobs"'):
+            with self.subTest(body=body):
+                self.assertEqual(self.post(body).status_code, 400)
+
+    def test_created_and_rejected_rows(self):
+        job = {'title': 'Job', 'description': 'Build things', 'salary': 0, 'company_id': self.company.pk}
+        response = self.post(json.dumps([job, {'title': 'No company'}]))
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['created'], 1)
+        self.assertEqual([error['index'] for error in response.data['errors']], [1])
+
+        response = self.post('\n'.join(json.dumps(row) for row in [job, job]), 'application/x-ndjson')
+        self.assertEqual((response.status_code, response.data['created']), (201, 2))
+
+        response = self.post(json.dumps([{'title': 'No company'}]))
+        self.assertEqual((response.status_code, response.data['created']), (400, 0))
+
+
+class SavedItemTests(TestCase):
+    """
+    Checks that the batch saves count each workshop save once, and that the
+    saves refresh the details of the workshops but not the cached lists.
+    """
+
+    def setUp(self):
+        company = Company.objects.create(name='Acme', description='')
+        self.workshops = [
+            Workshop.objects.create(title='Workshop {}'.format(i), organizer=company, start_time='2024-01-01',
+                                    end_time='2024-01-02')
+            for i in range(2)
+        ]
+        self.user = User.objects.create(username='ada')
+        self.profile = UserProfile.objects.create(user=self.user, name='Ada')
+
+    def test_batch(self):
+        first, second = self.workshops
+        save_workshop(self.profile.pk, first.pk)
+        items = [{'type': 'workshop', 'id': id, 'save': True} for id in (first.pk, second.pk, 0)]
+        result = apply_saved_items(self.profile, items)
+        self.assertEqual(result['saved'], {'workshop': [second.pk]})
+        self.assertEqual(result['not_found'], {'workshop': [0]})
+        apply_saved_items(self.profile, items)
+        apply_saved_items(self.profile, [{'type': 'workshop', 'id': first.pk, 'save': False}] * 2)
+        self.assertEqual(dict(Workshop.objects.values_list('pk', 'saves')), {first.pk: 0, second.pk: 1})
+
+    def test_batch_view_rejects_bodies_that_are_not_objects(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        response = client.post('/api/save/batch/', json.dumps([{'type': 'workshop', 'id': 1}]),
+                               content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_batch_view_without_profile(self):
+        client = APIClient()
+        client.force_authenticate(User.objects.create(username='grace'))
+        response = client.post('/api/save/batch/', {'items': [{'type': 'workshop', 'id': self.workshops[0].pk}]},
+                               format='json')
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(SavedWorkshop.objects.exists())
+
+    def test_saves_do_not_move_or_evict_the_lists(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        client = APIClient()
+        client.force_authenticate(self.user)
+        workshop = self.workshops[0]
+        path = '/api/workshop/{}/'.format(workshop.pk)
+        page = client.get('/api/workshop/?page_size=1').data
+        etag = client.get(path).headers['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            save_workshop(self.profile.pk, workshop.pk)
+
+        self.assertEqual(Workshop.objects.get(pk=workshop.pk).updated_at, workshop.updated_at)
+        with self.assertNumQueries(0):
+            self.assertEqual(client.get('/api/workshop/?page_size=1').data, page)
+        # The details show the new counter
+        response = client.get(path, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual((response.status_code, response.data['saves']), (200, 1))
+        self.assertNotIn('Last-Modified', response.headers)
+
+    def test_reconcile_workshop_saves(self):
+        save_workshop(self.profile.pk, self.workshops[0].pk)
+        Workshop.objects.update(saves=5)
+        call_command('reconcile_workshop_saves', stdout=io.StringIO())
+        self.assertEqual(list(Workshop.objects.order_by('pk').values_list('saves', flat=True)), [1, 0])
+
+
+def run_concurrently(*functions):
+    """
+    Runs each of the functions from its own thread, all at once, and returns
+    the exceptions they raised.
+    """
+    barrier = threading.Barrier(len(functions))
+    errors = []
+
+    def run(function):
+        try:
+            barrier.wait()
+            function()
+        except Exception as error:
+            errors.append(error)
+        finally:
+            connections.close_all()
+
+    threads = [threading.Thread(target=run, args=(function,)) for function in functions]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return errors
+
+
+@skipUnless(connection.vendor == 'postgresql', "SQLite does not lock rows")
+class ConcurrentSaveTests(TransactionTestCase):
+    """
+    Checks that the workshop save counters and trending scores stay in sync
+    with the saved workshops when users save and unsave a workshop from
+    concurrent requests.
+    """
+
+    def setUp(self):
+        company = Company.objects.create(name='Acme', description='')
+        self.workshop = Workshop.objects.create(title='Workshop', organizer=company, start_time='2024-01-01',
+                                                end_time='2024-01-02')
+        self.profile = UserProfile.objects.create(user=User.objects.create(username='ada'), name='Ada')
+
+    def run_concurrently(self, *functions):
+        self.assertEqual(run_concurrently(*functions), [])
+
+    def assertCountersMatchSaves(self):
+        self.workshop.refresh_from_db()
+        saves = SavedWorkshop.objects.filter(workshop=self.workshop)
+        self.assertEqual(self.workshop.saves, saves.count())
+        self.assertAlmostEqual(decay(self.workshop.trending_score), saves.count(), places=3)
+
+    def test_concurrent_saves_by_many_users(self):
+        profiles = [self.profile] + [
+            UserProfile.objects.create(user=User.objects.create(username='user{}'.format(i)), name='User')
+            for i in range(3)
+        ]
+        self.run_concurrently(*(partial(save_workshop, profile.pk, self.workshop.pk) for profile in profiles))
+        self.assertCountersMatchSaves()
+        self.assertEqual(self.workshop.saves, 4)
+        self.run_concurrently(*(partial(unsave_workshop, profile.pk, self.workshop.pk) for profile in profiles[:2]))
+        self.assertCountersMatchSaves()
+        self.assertEqual(self.workshop.saves, 2)
+
+    def test_concurrent_saves(self):
+        item = {'type': 'workshop', 'id': self.workshop.pk, 'save': True}
+        for _ in range(5):
+            self.run_concurrently(
+                lambda: apply_saved_items(self.profile, [item]),
+                lambda: apply_saved_items(self.profile, [item]),
+                lambda: save_workshop(self.profile.pk, self.workshop.pk),
+            )
+            self.assertCountersMatchSaves()
+            self.run_concurrently(
+                lambda: apply_saved_items(self.profile, [dict(item, save=False)]),
+                lambda: unsave_workshop(self.profile.pk, self.workshop.pk),
+            )
+            self.assertCountersMatchSaves()
+
+
+@skipUnless(connection.vendor == 'postgresql', "SQLite does not lock rows")
+class ConcurrentSimilarJobTests(TransactionTestCase):
+    """
+    Checks that concurrent updates of the similar jobs, which rewrite the
+    similar jobs of the neighbours they share, neither fail nor lose rows,
+    and that the updates run after the response of the request saving jobs.
+    """
+
+    def setUp(self):
+        self.addCleanup(self.wait_for_updates)
+        self.company = Company.objects.create(name='Acme', description='')
+        self.jobs = [
+            Job.objects.create(title='Python Developer {}'.format(i), description='Build Django services in Python',
+                               company=self.company, salary=0)
+            for i in range(6)
+        ]
+        self.wait_for_updates()
+        build_similar_jobs()
+
+    def wait_for_updates(self):
+        get_executor().submit(lambda: None).result()
+
+    def test_concurrent_updates(self):
+        terms = {job.pk: JobTerm.objects.filter(job=job).count() for job in self.jobs}
+        self.assertEqual(run_concurrently(*(partial(update_similar_jobs, [job.pk]) for job in self.jobs)), [])
+        for job in self.jobs:
+            with self.subTest(job=job.pk):
+                self.assertEqual(JobTerm.objects.filter(job=job).count(), terms[job.pk])
+                self.assertEqual(len(similar_jobs(job.pk)), len(self.jobs) - 1)
+
+    def test_failed_updates_are_logged(self):
+        client = APIClient()
+        client.force_authenticate(User.objects.create(username='ada'))
+        job = {'title': 'Job', 'description': 'Build things', 'salary': 0, 'company_id': self.company.pk}
+        with mock.patch('api.logic.job_similarity.update_similar_jobs', side_effect=IntegrityError), \
+                self.assertLogs('api.logic.job_similarity', 'ERROR'):
+            response = client.post('/api/job/bulk/', json.dumps([job]), content_type='application/json')
+            self.wait_for_updates()
+        self.assertEqual(response.status_code, 201)
@@ -1,16 +1,28 @@
+from django.conf import settings
 from django.urls import path
-from . import views
+from . import async_views, views
 from rest_framework_simplejwt import views as jwt_views
 
+
+def sync_or_async(view, async_view):
+    # The async views are served over ASGI, see api.async_views
+    return (async_view if settings.ASYNC_VIEWS else view).as_view()
+
+
 urlpatterns = [
-    path('auth/login/', views.JwtView.as_view()),
-    path('auth/register/', views.RegisterUserView.as_view()),
+    path('auth/login/', sync_or_async(views.JwtView, async_views.AsyncJwtView)),
+    path('auth/register/', sync_or_async(views.RegisterUserView, async_views.AsyncRegisterUserView)),
     path('auth/token/refresh/', jwt_views.TokenRefreshView.as_view(), name='token_refresh'),
     path('company/', views.CompanyRegisterView.as_view()),
-    path('company/<int:id>/', views.CompanyRetrieveView.as_view()),
-    path('job/', views.JobListView.as_view()),
-    path('job/<int:id>/', views.JobDetailView.as_view()),
+    path('company/<int:id>/', sync_or_async(views.CompanyRetrieveView, async_views.AsyncCompanyRetrieveView)),
+    path('job/', sync_or_async(views.JobListView, async_views.AsyncJobListView)),
+    path('job/bulk/', views.JobBulkCreateView.as_view()),
+    path('job/facets/', views.JobFacetsView.as_view()),
+    path('job/<int:id>/', sync_or_async(views.JobDetailView, async_views.AsyncJobDetailView)),
+    path('job/<int:id>/similar/', views.SimilarJobsView.as_view()),
+    path('nearby/', views.NearbyView.as_view()),
     path('public/', views.PublicView.as_view()),
+    path('metrics/', views.MetricsView.as_view()),
     path('user/', views.UserView.as_view()),
     path('user/<str:username>/', views.UserView.as_view()),
     path('save/job/', views.SaveJobView.as_view()),
@@ -18,8 +30,15 @@ urlpatterns = [
     path('work_experience/<int:id>/', views.WorkExperienceRetrieveView.as_view()),
     path('save/work_experience/', views.SaveWorkExperienceView.as_view()),
     path('workshop/', views.WorkshopRegisterView.as_view()),
-    path('workshop/<int:id>/', views.WorkshopRetrieveView.as_view()),
+    path('workshop/calendar/', views.WorkshopCalendarView.as_view()),
+    path('workshop/trending/', views.TrendingWorkshopsView.as_view()),
+    path('workshop/<int:id>/', sync_or_async(views.WorkshopRetrieveView, async_views.AsyncWorkshopRetrieveView)),
     path('save/workshop/', views.SaveWorkshopView.as_view()),
-    path('user/<str:username>/saved_jobs/', views.RetrieveSavedJobsView.as_view()),
-    path('user/<str:username>/saved_workshops/', views.RetrievedSavedWorkshopsView.as_view()),
+    path('save/batch/', views.SaveBatchView.as_view()),
+    path('user/<str:username>/saved_jobs/', sync_or_async(views.RetrieveSavedJobsView, async_views.AsyncRetrieveSavedJobsView), name='saved-jobs'),
+    path('user/<str:username>/recommended_jobs/', views.RecommendedJobsView.as_view(), name='recommended-jobs'),
+    path('user/<str:username>/saved_experiences/', sync_or_async(views.RetrieveSavedExperiencesView, async_views.AsyncRetrieveSavedExperiencesView), name='saved-experiences'),
+    path('user/<str:username>/saved_workshops/', sync_or_async(views.RetrievedSavedWorkshopsView, async_views.AsyncRetrieveSavedWorkshopsView), name='saved-workshops'),
+    path('user/<str:username>/saved_workshops/calendar_token/', views.CalendarTokenView.as_view(), name='saved-workshops-calendar-token'),
+    path('saved_workshops/calendar/<str:token>.ics', views.SavedWorkshopsCalendarView.as_view(), name='saved-workshops-calendar'),
 ]
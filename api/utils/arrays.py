@@ -0,0 +1,24 @@
+import numpy as np
+
+
+def concatenated_ranges(starts, lengths):
+    """
+    Returns the concatenation of range(start, start + length) for each pair,
+    without a Python loop.
+    """
+    offsets = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    return np.repeat(starts, lengths) + offsets
+
+
+def top_k_per_row(rows, columns, scores, top_k):
+    """
+    Keeps the `top_k` best scores of each row of a sparse matrix given as
+    (row, column, score) arrays, the lowest column first on ties, and returns
+    them sorted by row, then by score.
+    """
+    order = np.lexsort((columns, -scores, rows))
+    rows, columns, scores = rows[order], columns[order], scores[order]
+    firsts = np.flatnonzero(np.r_[True, rows[1:] != rows[:-1]])
+    ranks = np.arange(len(rows)) - np.repeat(firsts, np.diff(np.r_[firsts, len(rows)]))
+    keep = ranks < top_k
+    return rows[keep], columns[keep], scores[keep]
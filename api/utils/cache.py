@@ -0,0 +1,185 @@
+import asyncio
+import hashlib
+import uuid
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from rest_framework import status
+from rest_framework.response import Response
+
+from api.utils.conditional import data_etag
+from api.utils.replicas import read_from_primary
+
+TAG_KEY_PREFIX = 'api:tag:'
+RESPONSE_KEY_PREFIX = 'api:response:'
+# Invalidated along with any other tag, see cache_response
+ANY_TAG = '*'
+
+
+def get_cache():
+    return caches[settings.API_CACHE_ALIAS]
+
+
+def request_cache_key(request, prefix):
+    """
+    Returns the cache key of a GET request. The query parameters are
+    normalized, so that the order of the parameters and of the values of
+    comma-separated `__in` filters does not matter.
+    """
+    params = []
+    for name in sorted(request.query_params):
+        values = []
+        for value in request.query_params.getlist(name):
+            if name.endswith('__in'):
+                value = ','.join(sorted(set(value.split(','))))
+            values.append(value)
+        params.append((name, sorted(values)))
+    # The host is part of the key, as paginated responses embed absolute links
+    raw = repr((request.get_host(), request.path, params))
+    return RESPONSE_KEY_PREFIX + prefix + ':' + hashlib.md5(raw.encode()).hexdigest()
+
+
+def get_tag_versions(tags):
+    """
+    Returns the current version of each of the tags, creating the missing ones.
+    """
+    cache = get_cache()
+    keys = {TAG_KEY_PREFIX + tag: tag for tag in tags}
+    found = cache.get_many(keys.keys())
+    missing = {key: uuid.uuid4().hex for key in keys if key not in found}
+    if missing:
+        cache.set_many(missing, None)
+        found.update(missing)
+    return {tag: found[key] for key, tag in keys.items()}
+
+
+def invalidate_tags(*tags):
+    """
+    Invalidates every cached response that depends on any of the tags, once
+    the current transaction (if any) is committed. Invalidating earlier would
+    let a concurrent request cache the data from before the commit again.
+    """
+    def invalidate():
+        get_cache().set_many({TAG_KEY_PREFIX + tag: uuid.uuid4().hex for tag in (*tags, ANY_TAG)}, None)
+    transaction.on_commit(invalidate)
+
+
+def get_cached_data(key):
+    """
+    Returns the cached data under the key, or None if there is none or if
+    any of the tags it depends on has been invalidated since it was cached.
+    """
+    entry = get_cached_entry(key)
+    return None if entry is None else entry['data']
+
+
+def get_cached_entry(key):
+    """
+    Returns the entry cached under the key, see get_cached_data.
+    """
+    cache = get_cache()
+    entry = cache.get(key)
+    if entry is None:
+        return None
+    versions = entry['versions']
+    current = cache.get_many([TAG_KEY_PREFIX + tag for tag in versions])
+    for tag, version in versions.items():
+        if current.get(TAG_KEY_PREFIX + tag) != version:
+            return None
+    return entry
+
+
+def set_cached_data(key, data, versions, etag=None):
+    entry = {'versions': versions, 'data': data, 'etag': etag}
+    get_cache().set(key, entry, settings.API_CACHE_TIMEOUT)
+
+
+def nested_tags(field, name=None):
+    """
+    Returns a function listing the tags of the objects nested under `field`
+    in serialized data, such as `company:3` for the companies of a job list.
+    """
+    name = name or field
+
+    def get_tags(data):
+        if isinstance(data, dict):
+            rows = data['results'] if 'results' in data else [data]
+        else:
+            rows = data
+        return sorted({'{}:{}'.format(name, row[field]['id']) for row in rows if row.get(field)})
+
+    return get_tags
+
+
+def cache_response(prefix, tags=(), data_tags=None):
+    """
+    Caches the successful responses of a GET view method.
+
+    `tags` are formatted with the URL keyword arguments, e.g. `'job:{id}'`,
+    and their versions are read before the response is built, so that a
+    write racing with the request invalidates the new entry instead of
+    leaving stale data in the cache.
+    `data_tags` derives further tags from the response data, such as the
+    companies embedded in it. Their versions can only be read once the
+    response is built, so it is not cached if any tag has been invalidated
+    meanwhile: it could predate a write they already reflect.
+    A cached response is served until any of its tags is invalidated, or
+    until API_CACHE_TIMEOUT runs out. Responses are only built from the
+    primary, never from a lagging replica.
+    The data_etag of the responses is cached with them, for
+    conditional_response.
+    Async view methods are supported too, in which case the cache is read
+    and written from a thread.
+    """
+    def decorator(method):
+        if asyncio.iscoroutinefunction(method):
+            @wraps(method)
+            async def async_wrapper(view, request, *args, **kwargs):
+                key = request_cache_key(request, prefix)
+                entry = await sync_to_async(get_cached_entry)(key)
+                if entry is not None:
+                    return _cached_response(entry)
+
+                read_from_primary()
+                versions = await sync_to_async(get_tag_versions)([tag.format(**kwargs) for tag in tags] + [ANY_TAG])
+                response = await method(view, request, *args, **kwargs)
+                if response.status_code == status.HTTP_200_OK:
+                    await sync_to_async(_store_response)(key, response, versions, data_tags)
+                return response
+            return async_wrapper
+
+        @wraps(method)
+        def wrapper(view, request, *args, **kwargs):
+            key = request_cache_key(request, prefix)
+            entry = get_cached_entry(key)
+            if entry is not None:
+                return _cached_response(entry)
+
+            read_from_primary()
+            versions = get_tag_versions([tag.format(**kwargs) for tag in tags] + [ANY_TAG])
+            response = method(view, request, *args, **kwargs)
+            if response.status_code == status.HTTP_200_OK:
+                _store_response(key, response, versions, data_tags)
+            return response
+        return wrapper
+    return decorator
+
+
+def _store_response(key, response, versions, data_tags):
+    response.data_etag = data_etag(response.data)
+    written = versions.pop(ANY_TAG)
+    if data_tags is not None:
+        data_versions = get_tag_versions([*data_tags(response.data), ANY_TAG])
+        if data_versions.pop(ANY_TAG) != written:
+            return
+        versions.update(data_versions)
+    set_cached_data(key, response.data, versions, response.data_etag)
+
+
+def _cached_response(entry):
+    response = Response(entry['data'], status=status.HTTP_200_OK)
+    response.data_etag = entry.get('etag')
+    return response
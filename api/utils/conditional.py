@@ -0,0 +1,112 @@
+import asyncio
+import hashlib
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+from rest_framework.renderers import JSONRenderer
+
+from api.utils.replicas import read_from_primary
+
+
+def data_etag(data):
+    """
+    Returns the ETag of serialized data, a digest of its JSON rendering. It
+    changes with any row, and with the rows added to or deleted from a list.
+    """
+    digest = hashlib.md5(JSONRenderer().render(data)).hexdigest()
+    return 'W/' + quote_etag(digest)
+
+
+def object_validators(model, *fields, counters=(), lookup='id'):
+    """
+    Returns a function computing the validators of a detail view from the
+    given `updated_at` fields of the object, and of the objects nested in it.
+    `counters` are fields changing without `updated_at`, such as the saves
+    of a workshop. They are part of the ETag, and no Last-Modified is given:
+    clients only sending If-Modified-Since would miss their changes.
+    """
+    def get_validators(view, request, **kwargs):
+        row = model.objects.filter(pk=kwargs[lookup]).values_list(*fields, *counters).first()
+        if row is None:
+            return None
+        return _validators(list(row), [] if counters else list(row))
+    return get_validators
+
+
+def _validators(parts, timestamps):
+    timestamps = [timestamp for timestamp in timestamps if timestamp is not None]
+    # HTTP dates have a precision of one second
+    last_modified = int(max(timestamps).timestamp()) if timestamps else None
+    digest = hashlib.md5(repr(parts).encode()).hexdigest()
+    return 'W/' + quote_etag(digest), last_modified
+
+
+def conditional_response(validators=None):
+    """
+    Answers conditional GET requests to a view method with 304 Not Modified
+    when the client's copy is still current, without building the response.
+    The ETag (and Last-Modified, if any) headers are set on every successful
+    response, and clients are asked to revalidate before reusing their copy.
+    The validators, and the responses, are read from the primary, so that a
+    lagging replica cannot hand out the ETag of stale data.
+    Without `validators`, as for the lists, the ETag is the data_etag of the
+    response, which is only computed when cache_response builds it: the
+    conditional requests answered from the cache need no query at all.
+    Async view methods are supported too, in which case the validators are
+    computed from a thread.
+    """
+    def decorator(method):
+        if asyncio.iscoroutinefunction(method):
+            @wraps(method)
+            async def async_wrapper(view, request, *args, **kwargs):
+                read_from_primary()
+                if validators is None:
+                    return _data_conditional_response(request, await method(view, request, *args, **kwargs))
+                result = await sync_to_async(validators)(view, request, **kwargs)
+                if result is None:
+                    return await method(view, request, *args, **kwargs)
+
+                etag, last_modified = result
+                response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+                if response is None:
+                    response = await method(view, request, *args, **kwargs)
+                    if response.status_code != 200:
+                        return response
+                return _set_validators(response, etag, last_modified)
+            return async_wrapper
+
+        @wraps(method)
+        def wrapper(view, request, *args, **kwargs):
+            read_from_primary()
+            if validators is None:
+                return _data_conditional_response(request, method(view, request, *args, **kwargs))
+            result = validators(view, request, **kwargs)
+            if result is None:
+                return method(view, request, *args, **kwargs)
+
+            etag, last_modified = result
+            response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+            if response is None:
+                response = method(view, request, *args, **kwargs)
+                if response.status_code != 200:
+                    return response
+            return _set_validators(response, etag, last_modified)
+        return wrapper
+    return decorator
+
+
+def _data_conditional_response(request, response):
+    if response.status_code != 200:
+        return response
+    etag = getattr(response, 'data_etag', None) or data_etag(response.data)
+    return _set_validators(get_conditional_response(request, etag=etag) or response, etag, None)
+
+
+def _set_validators(response, etag, last_modified):
+    response.headers['ETag'] = etag
+    if last_modified is not None:
+        response.headers['Last-Modified'] = http_date(last_modified)
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
@@ -0,0 +1,269 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from operator import attrgetter
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Manager, QuerySet
+from rest_framework import ISO_8601, serializers
+from rest_framework.settings import api_settings
+
+from api.utils.metrics import TimedSerializerMixin, timed
+
+_enabled = ContextVar('fast_serialization', default=True)
+
+
+@contextmanager
+def drf_serialization():
+    """
+    Serializes with the plain DRF code path within the block, e.g. to compare
+    it with the fast path in benchmarks.
+    """
+    token = _enabled.set(False)
+    try:
+        yield
+    finally:
+        _enabled.reset(token)
+
+
+class Unsupported(Exception):
+    """
+    Raised when a serializer has a field that the fast path cannot reproduce
+    exactly, in which case DRF is used instead.
+    """
+
+
+def _datetime_converter(field):
+    output_format = getattr(field, 'format', api_settings.DATETIME_FORMAT)
+    if output_format is None or output_format.lower() != ISO_8601:
+        return field.to_representation
+
+    def convert(value):
+        if isinstance(value, str):
+            return value
+        value = field.enforce_timezone(value).isoformat()
+        if value.endswith('+00:00'):
+            value = value[:-6] + 'Z'
+        return value
+    return convert
+
+
+def _date_converter(field):
+    output_format = getattr(field, 'format', api_settings.DATE_FORMAT)
+    if output_format is None or output_format.lower() != ISO_8601:
+        return field.to_representation
+
+    def convert(value):
+        if isinstance(value, str):
+            return value
+        return value.isoformat()
+    return convert
+
+
+def _choice_converter(field):
+    choices = field.choice_strings_to_values
+
+    def convert(value):
+        if value == '':
+            return value
+        return choices.get(str(value), value)
+    return convert
+
+
+def _get_converter(field):
+    """
+    Returns the function converting a non-null database value to the
+    representation of the field, or None if the value is used as is.
+    Mirrors the `to_representation` of the DRF fields.
+    """
+    if isinstance(field, serializers.ChoiceField):
+        return _choice_converter(field)
+    if isinstance(field, serializers.DateTimeField):
+        return _datetime_converter(field)
+    if isinstance(field, serializers.DateField):
+        return _date_converter(field)
+    if isinstance(field, serializers.CharField):
+        return lambda value: value if isinstance(value, str) else str(value)
+    if isinstance(field, serializers.BooleanField):
+        return bool
+    if isinstance(field, serializers.IntegerField):
+        return int
+    if isinstance(field, (serializers.RelatedField, serializers.ManyRelatedField,
+                          serializers.SerializerMethodField, serializers.BaseSerializer)):
+        raise Unsupported(field.field_name)
+    return field.to_representation
+
+
+class SerializationPlan:
+    """
+    The readable fields of a serializer, compiled once into flat lists of
+    (name, accessor, converter) entries, so that a representation is built
+    without going through the DRF field machinery for every value.
+
+    Representations can be built from model instances, through precompiled
+    attribute getters, or from the rows of `values_list()`, which skips
+    instantiating the models altogether.
+    """
+
+    def __init__(self, serializer):
+        self.model = serializer.Meta.model
+        self.entries = []
+        for field in serializer._readable_fields:
+            attrs = tuple(field.source_attrs)
+            if isinstance(field, serializers.Serializer) and not isinstance(field, serializers.ListSerializer):
+                self.entries.append((field.field_name, attrs, None, SerializationPlan(field)))
+            else:
+                self.entries.append((field.field_name, attrs, _get_converter(field), None))
+        self.lookups = self._get_lookups()
+
+    def _get_lookups(self):
+        """
+        Returns the `values_list()` lookups of every field, or None if a
+        field is not backed by a model field, e.g. a property.
+        """
+        try:
+            lookups = []
+            self._collect_lookups(self.model, (), lookups)
+            return lookups
+        except (FieldDoesNotExist, Unsupported):
+            return None
+
+    def _collect_lookups(self, model, prefix, lookups):
+        for name, attrs, converter, nested in self.entries:
+            path = prefix + attrs
+            target = model
+            for attr in attrs:
+                model_field = target._meta.get_field(attr)
+                if model_field.many_to_many or model_field.one_to_many:
+                    raise Unsupported(attr)
+                if model_field.is_relation:
+                    target = model_field.related_model
+            if nested is not None:
+                # The relation itself tells whether the nested object is null
+                if attrs:
+                    lookups.append('__'.join(path))
+                nested._collect_lookups(target, path, lookups)
+            else:
+                lookups.append('__'.join(path))
+
+    def from_instance(self, instance):
+        if not hasattr(self, '_getters'):
+            self._getters = [
+                (name, attrgetter('.'.join(attrs)) if attrs else None, converter, nested)
+                for name, attrs, converter, nested in self.entries
+            ]
+        ret = {}
+        for name, getter, converter, nested in self._getters:
+            value = getter(instance) if getter is not None else instance
+            if value is None:
+                ret[name] = None
+            elif nested is not None:
+                ret[name] = nested.from_instance(value)
+            else:
+                ret[name] = converter(value) if converter is not None else value
+        return ret
+
+    def from_queryset(self, queryset):
+        return self.from_rows(queryset.values_list(*self.lookups))
+
+    def from_rows(self, rows):
+        build = self._row_builder(iter(range(len(self.lookups))))
+        return [build(row) for row in rows]
+
+    def iter_queryset(self, queryset, chunk_size):
+        """
+        Yields the representations of the queryset one at a time, fetching
+        the rows `chunk_size` at a time (with a server-side cursor where the
+        database supports it), so that memory use does not grow with the
+        number of rows.
+        """
+        build = self._row_builder(iter(range(len(self.lookups))))
+        for row in queryset.values_list(*self.lookups).iterator(chunk_size=chunk_size):
+            yield build(row)
+
+    def _row_builder(self, indexes):
+        fields = []
+        for name, attrs, converter, nested in self.entries:
+            if nested is not None:
+                null_index = next(indexes) if attrs else None
+                fields.append((name, null_index, None, nested._row_builder(indexes)))
+            else:
+                fields.append((name, next(indexes), converter, None))
+
+        def build(row):
+            ret = {}
+            for name, index, converter, nested in fields:
+                if nested is not None:
+                    ret[name] = None if index is not None and row[index] is None else nested(row)
+                else:
+                    value = row[index]
+                    if value is None or converter is None:
+                        ret[name] = value
+                    else:
+                        ret[name] = converter(value)
+            return ret
+        return build
+
+
+_plans = {}
+
+
+def get_plan(serializer):
+    """
+    Returns the compiled plan of the serializer's class, or None if it has
+    fields that are not supported by the fast path.
+    """
+    serializer_class = type(serializer)
+    if serializer_class not in _plans:
+        try:
+            _plans[serializer_class] = SerializationPlan(serializer)
+        except Unsupported:
+            _plans[serializer_class] = None
+    return _plans[serializer_class]
+
+
+class FastListSerializer(TimedSerializerMixin, serializers.ListSerializer):
+    """
+    List serializer building the representations through the compiled plan
+    of its child serializer. Querysets are read with `values_list()`, and
+    lists of instances (e.g. a page) through precompiled attribute getters.
+    The output is identical to that of DRF.
+    """
+
+    def to_representation(self, data):
+        plan = get_plan(self.child) if _enabled.get() else None
+        if plan is None:
+            return super().to_representation(data)
+        if isinstance(data, Manager):
+            data = data.all()
+        if isinstance(data, QuerySet) and plan.lookups is not None:
+            return plan.from_queryset(data)
+        return [plan.from_instance(instance) for instance in data]
+
+
+class FastReadSerializerMixin(TimedSerializerMixin):
+    """
+    Mixin for model serializers, using the compiled plan for their
+    representation. Pair it with `list_serializer_class = FastListSerializer`
+    in the Meta of the serializer for lists.
+    """
+
+    def to_representation(self, instance):
+        plan = get_plan(self) if _enabled.get() else None
+        if plan is None:
+            return super().to_representation(instance)
+        return plan.from_instance(instance)
+
+
+async def alist_data(serializer, queryset):
+    """
+    Async counterpart of `serializer.data` for a list serializer over a
+    queryset: the rows are read with the async ORM, and then serialized
+    without querying the database.
+    """
+    plan = get_plan(serializer.child) if _enabled.get() else None
+    if plan is not None and plan.lookups is not None:
+        rows = [row async for row in queryset.values_list(*plan.lookups)]
+        with timed('serialize'):
+            return plan.from_rows(rows)
+    instances = [instance async for instance in queryset]
+    return type(serializer.child)(instances, many=True, context=serializer.context).data
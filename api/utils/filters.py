@@ -0,0 +1,87 @@
+from django_filters import rest_framework as filters
+from rest_framework.filters import BaseFilterBackend
+
+from api.logic.job_search import search_jobs
+from api.models import Job, JobCard, Workshop
+
+
+class NumberInFilter(filters.BaseInFilter, filters.NumberFilter):
+    """
+    Filters on a comma-separated list of numbers, e.g. `?company_id__in=1,2`.
+    """
+
+
+class CharInFilter(filters.BaseInFilter, filters.CharFilter):
+    """
+    Filters on a comma-separated list of strings, e.g. `?company__name__in=A,B`.
+    """
+
+
+class JobFilter(filters.FilterSet):
+    """
+    Filters of the job list. Filtering by company ID reads the jobs through
+    the index of their company, without joining the companies.
+    """
+    company_id__in = NumberInFilter(field_name='company_id', lookup_expr='in')
+
+    class Meta:
+        model = Job
+        fields = {
+            'company__name': ["in"],
+            'job_type': ["in"],
+            'experience': ["in"],
+            'is_active': ["exact"],
+        }
+
+
+class JobCardFilter(filters.FilterSet):
+    """
+    Filters of the job list over the job cards, with the same query
+    parameters as JobFilter. The company name is a column of the cards.
+    """
+    company_id__in = NumberInFilter(field_name='company_id', lookup_expr='in')
+    company__name__in = CharInFilter(field_name='company_name', lookup_expr='in')
+
+    class Meta:
+        model = JobCard
+        fields = {
+            'job_type': ["in"],
+            'experience': ["in"],
+            'is_active': ["exact"],
+        }
+
+
+class WorkshopFilter(filters.FilterSet):
+    """
+    Filters of the workshop list. `ends_after` and `starts_before` select the
+    workshops overlapping a range of dates, e.g.
+    `?ends_after=2024-03-01&starts_before=2024-03-31` for those of March.
+    """
+    organizer_id__in = NumberInFilter(field_name='organizer_id', lookup_expr='in')
+    ends_after = filters.DateFilter(field_name='end_time', lookup_expr='gte')
+    starts_before = filters.DateFilter(field_name='start_time', lookup_expr='lte')
+
+    class Meta:
+        model = Workshop
+        fields = {
+            'organizer__name': ["in"],
+            'location': ["in"],
+        }
+
+
+class JobSearchFilter(BaseFilterBackend):
+    """
+    Full-text search over the jobs through the `q` query parameter.
+    Matching jobs are ordered by relevance, most relevant first.
+    """
+    search_param = 'q'
+
+    @classmethod
+    def get_search_terms(cls, request):
+        return request.query_params.get(cls.search_param, '').strip()
+
+    def filter_queryset(self, request, queryset, view):
+        terms = self.get_search_terms(request)
+        if not terms:
+            return queryset
+        return search_jobs(queryset, terms).order_by('-rank', '-updated_at', '-id')
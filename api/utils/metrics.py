@@ -0,0 +1,270 @@
+import fcntl
+import json
+import os
+import socket
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+
+# Upper bounds (in seconds) of the request latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# File of the totals of the workers that have exited, in METRICS_DIR
+RETIRED_FILE = 'retired.json'
+
+# The timings of the request being handled, if any
+current_timings = ContextVar('request_timings', default=None)
+
+
+class RequestTimings:
+    """
+    Time spent by a request in each phase, in seconds, and its query count.
+    """
+
+    def __init__(self):
+        self.db = 0.0
+        self.queries = 0
+        self.serialize = 0.0
+        self.render = 0.0
+
+
+def log_query(execute, sql, params, many, context):
+    """
+    Database execute wrapper, installed on every connection (see api.signals),
+    adding the time of each query to the current request. The timings are
+    found through a context variable, which is also set in the threads that
+    run the queries of async views.
+    """
+    timings = current_timings.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timings.db += time.perf_counter() - started
+        timings.queries += 1
+
+
+@contextmanager
+def timed(phase):
+    """
+    Adds the time spent in the block to the given phase (e.g. 'serialize')
+    of the current request. Does nothing outside of a request.
+    """
+    timings = current_timings.get()
+    if timings is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        setattr(timings, phase, getattr(timings, phase) + time.perf_counter() - started)
+
+
+class TimedSerializerMixin:
+    """
+    Mixin for serializers, adding the time spent building their data to the
+    serialization time of the request.
+    """
+
+    @property
+    def data(self):
+        with timed('serialize'):
+            return super().data
+
+
+class MetricsRegistry:
+    """
+    Aggregates the metrics of the requests handled by this process, per
+    route, method and status code. Each process periodically writes its
+    aggregates to its own file in METRICS_DIR, where they are merged with
+    those of the other workers when the metrics are served.
+    """
+
+    def __init__(self):
+        self.last_flush = time.monotonic()
+        self.reset()
+        os.register_at_fork(after_in_child=self.reset)
+
+    def reset(self):
+        """
+        Starts the aggregates of a new process, e.g. of a worker forked after
+        the registry was created, which must not count the requests of its
+        parent again. The file of the process holds its start time along with
+        its PID, so that a process reusing the PID of an exited worker does
+        not overwrite its file.
+        """
+        self.lock = threading.Lock()
+        self.series = {}
+        self.file = 'worker-{}-{}-{}.json'.format(socket.gethostname(), os.getpid(), time.time_ns())
+
+    def record(self, route, method, status, duration, timings):
+        key = '{} {} {}'.format(method, status, route)
+        with self.lock:
+            series = self.series.get(key)
+            if series is None:
+                series = self.series[key] = {
+                    'route': route, 'method': method, 'status': status, 'count': 0, 'duration': 0.0,
+                    'buckets': [0] * len(LATENCY_BUCKETS), 'queries': 0, 'db': 0.0, 'serialize': 0.0,
+                    'render': 0.0,
+                }
+            series['count'] += 1
+            series['duration'] += duration
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if duration <= bound:
+                    series['buckets'][i] += 1
+            series['queries'] += timings.queries
+            series['db'] += timings.db
+            series['serialize'] += timings.serialize
+            series['render'] += timings.render
+
+        if time.monotonic() - self.last_flush >= settings.METRICS_FLUSH_INTERVAL:
+            self.flush()
+
+    def flush(self):
+        """
+        Writes the aggregates of this process to its file, atomically, so
+        that readers never see a partial file.
+        """
+        with self.lock:
+            data = json.dumps({'host': socket.gethostname(), 'pid': os.getpid(), 'series': self.series})
+            self.last_flush = time.monotonic()
+        os.makedirs(settings.METRICS_DIR, exist_ok=True)
+        _write_atomically(os.path.join(settings.METRICS_DIR, self.file), data)
+
+    def collect(self):
+        """
+        Returns the aggregates of every worker, merged per series. The files
+        of the workers of this host that have exited are folded into a
+        single file of retired totals, then removed, so that the totals never
+        go down while the number of files stays bounded.
+        """
+        self.flush()
+        with _locked(os.path.join(settings.METRICS_DIR, '.lock')):
+            retired = _read(os.path.join(settings.METRICS_DIR, RETIRED_FILE)) or {'series': {}, 'workers': []}
+            workers = {}
+            for name in sorted(os.listdir(settings.METRICS_DIR)):
+                if name.startswith('worker-') and name.endswith('.json'):
+                    data = _read(os.path.join(settings.METRICS_DIR, name))
+                    if data is not None:
+                        workers[name] = data
+
+            # Files listed in the retired totals are already counted there,
+            # even if they could not be removed
+            retired_workers = set(retired['workers']) & set(workers)
+            dead = [
+                name for name, data in workers.items()
+                if name not in retired_workers and data['host'] == socket.gethostname()
+                and not _is_running(data['pid'])
+            ]
+            if dead:
+                for name in dead:
+                    _merge(retired['series'], workers[name]['series'])
+                retired['workers'] = sorted(retired_workers | set(dead))
+                _write_atomically(os.path.join(settings.METRICS_DIR, RETIRED_FILE), json.dumps(retired))
+                retired_workers.update(dead)
+            for name in retired_workers:
+                try:
+                    os.remove(os.path.join(settings.METRICS_DIR, name))
+                except OSError:
+                    pass
+
+        merged = {}
+        _merge(merged, retired['series'])
+        for name, data in workers.items():
+            if name not in retired_workers:
+                _merge(merged, data['series'])
+        return [merged[key] for key in sorted(merged)]
+
+
+def _read(path):
+    try:
+        with open(path) as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_atomically(path, data):
+    with open(path + '.tmp', 'w') as file:
+        file.write(data)
+    os.replace(path + '.tmp', path)
+
+
+@contextmanager
+def _locked(path):
+    # Serializes the collections of the workers, so that the series of an
+    # exited worker are retired only once
+    with open(path, 'a') as file:
+        fcntl.flock(file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(file, fcntl.LOCK_UN)
+
+
+def _is_running(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _merge(totals, worker_series):
+    for key, series in worker_series.items():
+        if key not in totals:
+            totals[key] = dict(series, buckets=list(series['buckets']))
+            continue
+        total = totals[key]
+        for field in ('count', 'duration', 'queries', 'db', 'serialize', 'render'):
+            total[field] += series[field]
+        total['buckets'] = [a + b for a, b in zip(total['buckets'], series['buckets'])]
+
+
+registry = MetricsRegistry()
+
+
+def _labels(series, **extra):
+    labels = {'route': series['route'], 'method': series['method'], 'status': series['status']}
+    labels.update(extra)
+    return '{' + ','.join('{}="{}"'.format(name, _escape(value)) for name, value in labels.items()) + '}'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def render_prometheus(all_series):
+    """
+    Renders the aggregates in the Prometheus text exposition format.
+    """
+    lines = [
+        '# HELP api_request_duration_seconds Time spent handling the requests.',
+        '# TYPE api_request_duration_seconds histogram',
+    ]
+    for series in all_series:
+        for bound, count in zip(LATENCY_BUCKETS, series['buckets']):
+            lines.append('api_request_duration_seconds_bucket{} {}'.format(_labels(series, le=bound), count))
+        lines.append('api_request_duration_seconds_bucket{} {}'.format(_labels(series, le='+Inf'), series['count']))
+        lines.append('api_request_duration_seconds_sum{} {}'.format(_labels(series), series['duration']))
+        lines.append('api_request_duration_seconds_count{} {}'.format(_labels(series), series['count']))
+
+    for name, field, help_text in [
+        ('api_db_queries_total', 'queries', 'Database queries run by the requests.'),
+        ('api_db_duration_seconds_total', 'db', 'Time spent by the requests in the database.'),
+        ('api_serialize_duration_seconds_total', 'serialize', 'Time spent by the requests serializing data.'),
+        ('api_render_duration_seconds_total', 'render', 'Time spent by the requests rendering responses.'),
+    ]:
+        lines.append('# HELP {} {}'.format(name, help_text))
+        lines.append('# TYPE {} counter'.format(name))
+        for series in all_series:
+            lines.append('{}{} {}'.format(name, _labels(series), series[field]))
+    return '\n'.join(lines) + '\n'
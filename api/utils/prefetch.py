@@ -0,0 +1,87 @@
+from functools import lru_cache
+
+from django.db.models import Prefetch
+from rest_framework import serializers
+
+
+def _prefix(lookup, prefix):
+    """
+    Prefixes a select/prefetch lookup (a string or a Prefetch object) with
+    the source of the nested serializer that declared it.
+    """
+    if not prefix:
+        return lookup
+    if isinstance(lookup, Prefetch):
+        return Prefetch(
+            '{}__{}'.format(prefix, lookup.prefetch_through),
+            queryset=lookup.queryset,
+            to_attr=lookup.to_attr,
+        )
+    return '{}__{}'.format(prefix, lookup)
+
+
+@lru_cache(maxsize=None)
+def get_prefetch_plan(serializer_class):
+    """
+    Returns the (select_related, prefetch_related) lookups needed to serialize
+    instances with the given serializer class without issuing per-row queries.
+
+    Serializers declare the related objects they need through the
+    `select_related` and `prefetch_related` attributes of their Meta class.
+    Nested serializers are walked recursively so that their own declarations
+    are applied relative to the field that embeds them.
+    """
+    select_related = []
+    prefetch_related = []
+
+    meta = getattr(serializer_class, 'Meta', None)
+    select_related.extend(getattr(meta, 'select_related', []))
+    prefetch_related.extend(getattr(meta, 'prefetch_related', []))
+
+    for field in serializer_class().fields.values():
+        if isinstance(field, serializers.ListSerializer):
+            nested_class, many = field.child.__class__, True
+        elif isinstance(field, serializers.BaseSerializer):
+            nested_class, many = field.__class__, False
+        else:
+            continue
+        if field.source == '*':
+            prefix = ''
+        else:
+            prefix = field.source.replace('.', '__')
+        nested_select, nested_prefetch = get_prefetch_plan(nested_class)
+        if many:
+            # Anything below a to-many relation has to be prefetched
+            prefetch_related.extend(_prefix(lookup, prefix) for lookup in nested_select)
+        else:
+            select_related.extend(_prefix(lookup, prefix) for lookup in nested_select)
+        prefetch_related.extend(_prefix(lookup, prefix) for lookup in nested_prefetch)
+
+    return tuple(dict.fromkeys(select_related)), tuple(prefetch_related)
+
+
+def apply_prefetch_plan(queryset, serializer_class):
+    """
+    Applies the prefetch plan of the serializer class to the queryset.
+    """
+    select_related, prefetch_related = get_prefetch_plan(serializer_class)
+    if select_related:
+        queryset = queryset.select_related(*select_related)
+    if prefetch_related:
+        queryset = queryset.prefetch_related(*prefetch_related)
+    return queryset
+
+
+class PrefetchPlanMixin:
+    """
+    Mixin for generic views that applies the prefetch plan of the view's
+    serializer class to the queryset before it is evaluated.
+
+    The plan is applied in `filter_queryset`, as both `list()` and
+    `get_object()` pass through it, which also covers views that build their
+    queryset in an overridden `get_queryset`.
+    """
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        return apply_prefetch_plan(queryset, self.get_serializer_class())
@@ -0,0 +1,122 @@
+"""
+Routing of the reads of the read-only views to the database replicas listed
+in the DATABASE_REPLICAS setting. Everything else goes to the primary
+(`default`): writes, reads of the other views and methods, reads within a
+transaction, the reads of users who wrote within the last
+REPLICA_PIN_SECONDS, so that they read their own writes despite the
+replication lag, and the reads whose results are shared with other requests
+(cached responses and validators, see read_from_primary).
+"""
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+from rest_framework.permissions import SAFE_METHODS
+
+current_routing = ContextVar('current_routing', default=None)
+
+# App label of the table of the database cache backend, which is only ever
+# read from and written to the primary
+CACHE_APP_LABEL = 'django_cache'
+
+
+class RequestRouting:
+    """
+    Routing state of a request, set up by DatabaseRoutingMiddleware.
+    """
+    __slots__ = ('replica_reads', 'user_id', 'wrote', '_pinned')
+
+    def __init__(self):
+        self.replica_reads = False
+        self.user_id = None
+        self.wrote = False
+        self._pinned = None
+
+    @property
+    def pinned(self):
+        # Looked up on the first read only, the requests served from the
+        # response cache do not read at all. The reads of the lookup itself,
+        # e.g. from a database cache, go to the primary.
+        if self._pinned is None:
+            self._pinned = True
+            self._pinned = self.user_id is not None and cache.get(_pin_key(self.user_id)) is not None
+        return self._pinned
+
+
+def _pin_key(user_id):
+    return 'replica-pin:{}'.format(user_id)
+
+
+def pin_to_primary(user_id):
+    """
+    Sends the reads of the user to the primary for REPLICA_PIN_SECONDS. The
+    pins are shared between workers through the default cache, when it is
+    shared (see CACHE_URL).
+    """
+    cache.set(_pin_key(user_id), True, settings.REPLICA_PIN_SECONDS)
+
+
+def read_from_replicas(request):
+    """
+    Lets the reads of the current request go to the replicas, if it is safe.
+    """
+    routing = current_routing.get()
+    if routing is not None and request.method in SAFE_METHODS:
+        routing.replica_reads = True
+        if request.user.is_authenticated:
+            routing.user_id = request.user.pk
+
+
+def read_from_primary():
+    """
+    Sends the remaining reads of the current request to the primary. Used
+    for the reads whose results outlive the request, such as cached responses
+    and ETags: a lagging replica would have them serve stale data to every
+    client until the next invalidation.
+    """
+    routing = current_routing.get()
+    if routing is not None:
+        routing.replica_reads = False
+
+
+class ReplicaRouter:
+    """
+    Database router sending the reads of the requests that allow it to a
+    random replica, see read_from_replicas. A no-op without replicas.
+    """
+
+    def db_for_read(self, model, **hints):
+        routing = current_routing.get()
+        if model._meta.app_label == CACHE_APP_LABEL:
+            return None
+        if routing is None or not routing.replica_reads or routing.wrote or not settings.DATABASE_REPLICAS:
+            return None
+        # Reads within a transaction have to see its writes. This also keeps
+        # the reads of TestCase, which runs each test in a transaction, on the
+        # test database the replicas mirror.
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block or routing.pinned:
+            return None
+        return random.choice(settings.DATABASE_REPLICAS)
+
+    def db_for_write(self, model, **hints):
+        routing = current_routing.get()
+        if routing is not None and model._meta.app_label != CACHE_APP_LABEL:
+            routing.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # The replicas hold the same data as the primary
+        return True
+
+
+class ReplicaReadMixin:
+    """
+    Mixin for the read-only views, whose safe requests read from the
+    replicas.
+    """
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        read_from_replicas(request)
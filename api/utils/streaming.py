@@ -0,0 +1,84 @@
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+
+from api.utils.fast_serializers import get_plan
+
+STREAM_CONTENT_TYPES = {
+    'json': 'application/json',
+    'ndjson': 'application/x-ndjson',
+}
+
+
+def iter_representations(queryset, serializer, chunk_size):
+    """
+    Yields the representation of each object of the queryset, reading the
+    rows in chunks rather than loading the whole queryset.
+    """
+    plan = get_plan(serializer)
+    if plan is not None and plan.lookups is not None:
+        yield from plan.iter_queryset(queryset, chunk_size)
+    else:
+        for instance in queryset.iterator(chunk_size=chunk_size):
+            yield serializer.to_representation(instance)
+
+
+def iter_json(representations, stream_format, chunk_size):
+    """
+    Encodes the representations incrementally, as a JSON array identical to
+    the body of the unpaginated response, or as newline-delimited JSON.
+    Objects are encoded and written in chunks, to limit the number of writes.
+    """
+    renderer = JSONRenderer()
+    if stream_format == 'json':
+        yield b'['
+    chunk = []
+    written = False
+    for representation in representations:
+        chunk.append(renderer.render(representation))
+        if len(chunk) == chunk_size:
+            yield _join(chunk, stream_format, written)
+            chunk, written = [], True
+    if chunk:
+        yield _join(chunk, stream_format, written)
+    if stream_format == 'json':
+        yield b']'
+
+
+def _join(chunk, stream_format, written):
+    if stream_format == 'json':
+        return (b',' if written else b'') + b','.join(chunk)
+    return b''.join(line + b'\n' for line in chunk)
+
+
+class StreamingListMixin:
+    """
+    Streams the list of a view when the `stream` query parameter is given,
+    as a JSON array (`?stream=json`) or as newline-delimited JSON
+    (`?stream=ndjson`). The filtered queryset is read in chunks and encoded
+    as it is sent, so that the memory used stays flat whatever the number of
+    rows. Streamed lists are never paginated nor cached.
+
+    Lists are not streamed over ASGI, whose handler iterates the response on
+    the event loop, where the queryset cannot be read: `stream` is ignored
+    there, and the list is served as usual.
+    """
+    stream_query_param = 'stream'
+    stream_chunk_size = 2000
+
+    def get(self, request, *args, **kwargs):
+        stream_format = request.query_params.get(self.stream_query_param)
+        if stream_format is None or isinstance(request._request, ASGIRequest):
+            return super().get(request, *args, **kwargs)
+        if stream_format not in STREAM_CONTENT_TYPES:
+            return Response({"message": "stream must be one of: {}".format(', '.join(STREAM_CONTENT_TYPES))},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        representations = iter_representations(queryset, self.get_serializer(), self.stream_chunk_size)
+        return StreamingHttpResponse(
+            iter_json(representations, stream_format, self.stream_chunk_size),
+            content_type=STREAM_CONTENT_TYPES[stream_format],
+        )
@@ -1,28 +1,42 @@
+from types import GeneratorType
+
 from django.shortcuts import render
-from django.contrib.auth.models import User
-from django.http import HttpResponseBadRequest
+from django.http import HttpResponse, HttpResponseBadRequest
+from django.urls import reverse
+from django.utils import timezone
 
 from django_filters.rest_framework import DjangoFilterBackend
 
 from rest_framework import generics, status
 from rest_framework.views import APIView
+from rest_framework.parsers import JSONParser
 from rest_framework.response import Response
 from rest_framework.decorators import api_view, permission_classes
-from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.permissions import AllowAny, IsAdminUser, IsAuthenticated
 from rest_framework_simplejwt.views import TokenObtainPairView
 
 from api.models import (
     Company,
     Job,
+    JobCard,
+    Place,
+    UserProfile,
     WorkExperience,
     Workshop
 )
 
 from api.serializers import (
+    CompactUserProfileSerializer,
     CompanySerializer,
+    JobCardSerializer,
     JobSerializer,
     JobListSerializer,
     JwtSerializer,
+    NearbyQuerySerializer,
+    PlaceSerializer,
+    RecommendedJobsQuerySerializer,
+    SavedItemSerializer,
+    TrendingWorkshopsQuerySerializer,
     UserProfileSerializer,
     UserRegistrationSerializer,
     UserUpdateSerializer,
@@ -30,7 +44,29 @@ from api.serializers import (
     WorkshopSerializer
 )
 
-from api.pagination import JobPagination
+from api.logic.job_facets import facet_tags, job_facets
+from api.logic.job_ingestion import ingest_jobs
+from api.logic.job_similarity import similar_jobs
+from api.logic.nearby import nearby
+from api.logic.places import resolve_place_id
+from api.logic.recommendations import recommended_jobs
+from api.logic.saved_items import annotate_saved_counts, apply_saved_items, save_workshop, unsave_workshop
+from api.logic.trending_workshops import decay, trending_workshops
+from api.logic.workshop_calendar import (
+    calendar_profile_id,
+    regenerate_calendar_token,
+    revoke_calendar_token,
+    saved_workshops_calendar
+)
+from api.pagination import CalendarPagination, JobPagination, KeysetPagination
+from api.parsers import NDJSONParser
+from api.utils.cache import cache_response, nested_tags
+from api.utils.conditional import conditional_response, object_validators
+from api.utils.filters import JobCardFilter, JobFilter, JobSearchFilter, WorkshopFilter
+from api.utils.metrics import registry, render_prometheus
+from api.utils.prefetch import PrefetchPlanMixin, apply_prefetch_plan
+from api.utils.replicas import ReplicaReadMixin
+from api.utils.streaming import StreamingListMixin
 
 # Create your views here.
 # @api_view(['GET'])
@@ -55,6 +91,20 @@ class PublicView(APIView):
         })
 
 
+class MetricsView(APIView):
+    """
+    This view is for monitoring, and is restricted to staff users.
+    Returns the request metrics aggregated over every worker, in the
+    Prometheus text format.
+    """
+
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return HttpResponse(render_prometheus(registry.collect()),
+                            content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
 class RegisterUserView(generics.CreateAPIView):
     """
     This view is for registering a new user.
@@ -72,23 +122,30 @@ class RegisterUserView(generics.CreateAPIView):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
-class UserView(APIView):
+class UserView(ReplicaReadMixin, APIView):
     """
     This view is for retrieving and updating a user.
     User data is inferred from the provided username.
+    With `?compact=true`, the saved items are returned as counts and links to
+    the saved items endpoints, rather than as lists of ids.
     """
 
     permission_classes = [IsAuthenticated]
 
     def get(self, request, username):
+        compact = request.query_params.get('compact') in ('true', '1')
+        serializer_class = CompactUserProfileSerializer if compact else UserProfileSerializer
+        queryset = apply_prefetch_plan(UserProfile.objects, serializer_class)
+        if compact:
+            queryset = annotate_saved_counts(queryset)
         try:
-            user = User.objects.get(username=username)
-        except User.DoesNotExist:
+            profile = queryset.get(user__username=username)
+        except UserProfile.DoesNotExist:
             return Response({"message": "User does not exist"}, status=status.HTTP_404_NOT_FOUND)
         except Exception as e:
             return Response({"message": "Error retrieving user: {}".format(str(e))},
                             status=status.HTTP_400_BAD_REQUEST)
-        serializer = UserProfileSerializer(user.userprofile)
+        serializer = serializer_class(profile, context={'request': request})
         return Response(serializer.data)
 
     def put(self, request, username):
@@ -108,7 +165,7 @@ class JwtView(TokenObtainPairView):
     serializer_class = JwtSerializer
 
 
-class CompanyRegisterView(generics.ListCreateAPIView):
+class CompanyRegisterView(ReplicaReadMixin, PrefetchPlanMixin, generics.ListCreateAPIView):
     """
     This view is for registering a new company.
     """
@@ -117,7 +174,7 @@ class CompanyRegisterView(generics.ListCreateAPIView):
     queryset = Company.objects.all()
 
 
-class CompanyRetrieveView(generics.RetrieveAPIView):
+class CompanyRetrieveView(ReplicaReadMixin, generics.RetrieveAPIView):
     """
     This view is for retrieving a company based on the provided company ID
     as the query parameter.
@@ -125,6 +182,8 @@ class CompanyRetrieveView(generics.RetrieveAPIView):
 
     permission_classes = [IsAuthenticated]
 
+    @conditional_response(object_validators(Company, 'updated_at'))
+    @cache_response('company-detail', tags=['company:{id}'])
     def get(self, request, id):
         try:
             company = Company.objects.get(pk=id)
@@ -149,29 +208,48 @@ class JobRegisterView(generics.CreateAPIView):
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
 
-class JobListView(generics.ListCreateAPIView):
+class JobListView(ReplicaReadMixin, StreamingListMixin, PrefetchPlanMixin, generics.ListCreateAPIView):
     """
     This view is for retrieving a list of jobs, and for registering a new job.
-    Pagination is applied to reduce the amount of data returned.
-    TODO: Implement filtering classes
+    Cursor pagination is applied when the `cursor` or `page_size` query
+    parameter is provided, to reduce the amount of data returned.
+    Jobs can be filtered with `company_id__in`, `company__name__in`,
+    `job_type__in`, `experience__in` and `is_active`.
+    Jobs can be searched with the `q` query parameter, in which case the most
+    relevant jobs are returned first.
+    The full list can be streamed with `?stream=json` or `?stream=ndjson`,
+    except over ASGI.
+    The list is read from the job cards (see JobCard), searches from the jobs.
     """
 
     permission_classes = [IsAuthenticated]
-    queryset = Job.objects.all()
-    # pagination_class = JobPagination # Disable pagination for now
+    pagination_class = KeysetPagination
 
-    filter_backends = [DjangoFilterBackend]
-    filterset_fields = {
-        'company__name': ["in"],
-        'job_type': ["in"],
-        'experience': ["in"],
-    }
+    filter_backends = [DjangoFilterBackend, JobSearchFilter]
+
+    @conditional_response()
+    @cache_response('job-list', tags=['job'], data_tags=nested_tags('company'))
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    def reads_cards(self):
+        # Searches need the searchable fields of the jobs, see JobSearchFilter
+        return not JobSearchFilter.get_search_terms(self.request)
+
+    def get_queryset(self):
+        if self.reads_cards():
+            return JobCard.objects.all()
+        return Job.objects.all()
+
+    @property
+    def filterset_class(self):
+        return JobCardFilter if self.reads_cards() else JobFilter
 
     def get_serializer_class(self):
         if (self.request.method == 'POST'):
             return JobSerializer
         elif self.request.method == 'GET':
-            return JobListSerializer
+            return JobCardSerializer if self.reads_cards() else JobListSerializer
         else:
             return JobSerializer
 
@@ -182,7 +260,47 @@ class JobListView(generics.ListCreateAPIView):
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
 
-class JobDetailView(generics.RetrieveAPIView):
+class JobFacetsView(ReplicaReadMixin, APIView):
+    """
+    This view is for the counts of the job board sidebar: the number of jobs
+    per job type, experience and company for the filters and search terms of
+    the JobListView, given as the same query parameters. The counts of each
+    facet ignore the filters on that facet.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    @cache_response('job-facets', tags=['job'], data_tags=facet_tags)
+    def get(self, request):
+        terms = JobSearchFilter.get_search_terms(request)
+        return Response(job_facets(request.query_params, terms), status=status.HTTP_200_OK)
+
+
+class JobBulkCreateView(APIView):
+    """
+    This view is for registering many jobs at once, e.g. from a partner feed.
+    Accepts either a JSON array of jobs, or a stream of newline-delimited JSON
+    (Content-Type: application/x-ndjson) with one job per line. Each job has
+    the same format as for the JobListView, including its `company_id`.
+    Returns the number of jobs created, and the errors of the rejected rows,
+    with status 400 if every row was rejected.
+    """
+
+    permission_classes = [IsAuthenticated]
+    parser_classes = [JSONParser, NDJSONParser]
+
+    def post(self, request):
+        rows = request.data
+        # A JSON array, or the rows of an NDJSON stream
+        if not isinstance(rows, (list, GeneratorType)):
+            return Response({"message": "Expected a list of jobs"}, status=status.HTTP_400_BAD_REQUEST)
+        result = ingest_jobs(rows)
+        if not result['created'] and result['errors']:
+            return Response(result, status=status.HTTP_400_BAD_REQUEST)
+        return Response(result, status=status.HTTP_201_CREATED)
+
+
+class JobDetailView(ReplicaReadMixin, generics.RetrieveAPIView):
     """
     This view is for retrieving a job based on the provided job ID.
     Provides more detail than the above JobListView, as this view also returns
@@ -191,15 +309,31 @@ class JobDetailView(generics.RetrieveAPIView):
     permission_classes = [IsAuthenticated]
     serializer_class = JobSerializer
 
+    @conditional_response(object_validators(Job, 'updated_at', 'company__updated_at'))
+    @cache_response('job-detail', tags=['job:{id}'], data_tags=nested_tags('company'))
     def get(self, request, id):
         try:
-            job = Job.objects.get(pk=id)
+            job = apply_prefetch_plan(Job.objects, JobSerializer).get(pk=id)
         except:
             return Response({"message": "Job with the specified id does not exist"}, status=status.HTTP_404_NOT_FOUND)
         serializer = JobSerializer(job)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
 
+class SimilarJobsView(ReplicaReadMixin, APIView):
+    """
+    This view is for the active jobs similar to a job, based on their titles,
+    descriptions, responsibilities and qualifications, the most similar
+    first, each with its `score`. The similar jobs are indexed by
+    `manage.py build_similar_jobs`, and kept up to date as jobs are saved.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, id):
+        return Response(similar_jobs(id), status=status.HTTP_200_OK)
+
+
 class SaveJobView(APIView):
     """
     This view is for saving a job to the user's saved jobs list, as well as
@@ -225,16 +359,22 @@ class SaveJobView(APIView):
             return Response({"message": "Error saving job: {}".format(str(e))}, status=status.HTTP_400_BAD_REQUEST)
 
 
-class WorkExperienceRegisterView(generics.ListCreateAPIView):
+class WorkExperienceRegisterView(ReplicaReadMixin, StreamingListMixin, PrefetchPlanMixin, generics.ListCreateAPIView):
     """
     This view is for registering a new work experience.
+    The list of work experiences can be streamed with `?stream=json` or
+    `?stream=ndjson`, except over ASGI.
     """
     serializer_class = WorkExperienceSerializer
     permission_classes = [AllowAny]
     queryset = WorkExperience.objects.all()
 
+    def perform_create(self, serializer):
+        company = Company.objects.get(pk=self.request.data.get('company_id'))
+        serializer.save(company=company)
 
-class WorkExperienceRetrieveView(generics.RetrieveAPIView):
+
+class WorkExperienceRetrieveView(ReplicaReadMixin, generics.RetrieveAPIView):
     """
     This view is for retrieving a work experience based on the provided work experience ID
     as the query parameter.
@@ -244,7 +384,7 @@ class WorkExperienceRetrieveView(generics.RetrieveAPIView):
 
     def get(self, request, id):
         try:
-            work_experience = WorkExperience.objects.get(pk=id)
+            work_experience = apply_prefetch_plan(WorkExperience.objects, WorkExperienceSerializer).get(pk=id)
         except:
             return Response({"message:": "Work Experience with the specified id does not exist"}, status=status.HTTP_404_NOT_FOUND)
         serializer = WorkExperienceSerializer(work_experience)
@@ -265,10 +405,10 @@ class SaveWorkExperienceView(APIView):
             work_experience = WorkExperience.objects.get(pk=id)
             user = request.user
             if request.data.get("save") == False:
-                user.userprofile.saved_work_experiences.remove(work_experience)
+                user.userprofile.saved_experiences.remove(work_experience)
                 return Response({"message": "Work experience removed from saved work experiences"})
             else:
-                user.userprofile.saved_work_experiences.add(work_experience)
+                user.userprofile.saved_experiences.add(work_experience)
                 return Response({"message": "Work experience saved successfully"}, status=status.HTTP_200_OK)
         except WorkExperience.DoesNotExist:
             return Response({"message": "Work experience with the specified id does not exist"}, status=status.HTTP_404_NOT_FOUND)
@@ -280,7 +420,7 @@ class SaveWorkExperienceView(APIView):
 """
 
 
-class WorkshopRegisterView(generics.ListCreateAPIView):
+class WorkshopRegisterView(ReplicaReadMixin, PrefetchPlanMixin, generics.ListCreateAPIView):
     """
     This view is for registering a new job.
     """
@@ -288,12 +428,15 @@ class WorkshopRegisterView(generics.ListCreateAPIView):
     permission_classes = [IsAuthenticated]
     serializer_class = WorkshopSerializer
     queryset = Workshop.objects.all()
+    pagination_class = KeysetPagination
 
     filter_backends = [DjangoFilterBackend]
-    filterset_fields = {
-        'organizer__name': ["in"],
-        'location': ["in"],
-    }
+    filterset_class = WorkshopFilter
+
+    @conditional_response()
+    @cache_response('workshop-list', tags=['workshop'], data_tags=nested_tags('organizer', 'company'))
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
 
     def perform_create(self, serializer):
         company_id = self.request.data.get('company_id')
@@ -303,7 +446,59 @@ class WorkshopRegisterView(generics.ListCreateAPIView):
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
 
-class WorkshopRetrieveView(generics.RetrieveAPIView):
+class WorkshopCalendarView(ReplicaReadMixin, PrefetchPlanMixin, generics.ListAPIView):
+    """
+    This view is for the calendar of the workshops, the earliest first.
+    Returns the workshops that have not ended yet, or those overlapping the
+    dates given by `ends_after` and `starts_before`, and accepts the other
+    filters of the WorkshopRegisterView.
+    Cursor pagination is applied when the `cursor` or `page_size` query
+    parameter is provided.
+    """
+
+    permission_classes = [IsAuthenticated]
+    serializer_class = WorkshopSerializer
+    pagination_class = CalendarPagination
+
+    filter_backends = [DjangoFilterBackend]
+    filterset_class = WorkshopFilter
+
+    @conditional_response()
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    def get_queryset(self):
+        queryset = Workshop.objects.order_by('start_time', 'id')
+        if 'ends_after' not in self.request.query_params:
+            queryset = queryset.filter(end_time__gte=timezone.localdate())
+        return queryset
+
+
+class TrendingWorkshopsView(ReplicaReadMixin, APIView):
+    """
+    This view is for the trending workshops, the most saved recently first,
+    each with its `trending` score: the sum of its saves, each counting half
+    as much every TRENDING_HALF_LIFE_DAYS days. Up to `limit` workshops
+    (20 by default) are returned.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    @cache_response('workshop-trending', tags=['workshop', 'workshop-saves'],
+                    data_tags=nested_tags('organizer', 'company'))
+    def get(self, request):
+        query = TrendingWorkshopsQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        queryset = apply_prefetch_plan(Workshop.objects, WorkshopSerializer)
+        workshops = list(trending_workshops(queryset, query.validated_data['limit']))
+        data = WorkshopSerializer(workshops, many=True).data
+        now = timezone.now()
+        for item, workshop in zip(data, workshops):
+            item['trending'] = round(decay(workshop.trending_score, now), 4)
+        return Response(data, status=status.HTTP_200_OK)
+
+
+class WorkshopRetrieveView(ReplicaReadMixin, generics.RetrieveAPIView):
     """
     This view is for retrieving a workshop based on the provided workshop ID
     as the query parameter.
@@ -311,15 +506,57 @@ class WorkshopRetrieveView(generics.RetrieveAPIView):
 
     permission_classes = [IsAuthenticated]
 
+    @conditional_response(object_validators(Workshop, 'updated_at', 'organizer__updated_at', counters=['saves']))
+    @cache_response('workshop-detail', tags=['workshop:{id}'], data_tags=nested_tags('organizer', 'company'))
     def get(self, request, id):
         try:
-            workshop = Workshop.objects.get(pk=id)
+            workshop = apply_prefetch_plan(Workshop.objects, WorkshopSerializer).get(pk=id)
         except:
             return Response({"message:": "Workshop with the specified id does not exist"}, status=status.HTTP_404_NOT_FOUND)
         serializer = WorkshopSerializer(workshop)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
 
+class NearbyView(ReplicaReadMixin, APIView):
+    """
+    This view is for the active jobs and the workshops near a place, the
+    closest first, each with its `distance` in kilometers.
+    The place is given by the `lat` and `lng` query parameters, or by a place
+    name as the `near` query parameter, and defaults to the location of the
+    user's profile. Only the places within `radius` kilometers (50 by default)
+    are searched, for up to `limit` jobs and `limit` workshops (20 by default).
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        query = NearbyQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        params = query.validated_data
+
+        if 'lat' in params:
+            place = None
+            latitude, longitude = params['lat'], params['lng']
+        else:
+            if 'near' in params:
+                place_id = resolve_place_id(params['near'])
+            else:
+                place_id = UserProfile.objects.filter(user=request.user).values_list('place_id', flat=True).first()
+            place = Place.objects.filter(pk=place_id).first() if place_id is not None else None
+            if place is None:
+                message = "Unknown place" if 'near' in params else "The location of the user's profile is unknown"
+                return Response({"message": message}, status=status.HTTP_400_BAD_REQUEST)
+            latitude, longitude = place.latitude, place.longitude
+
+        data = nearby(latitude, longitude, params['radius'], params['limit'])
+        data['center'] = {
+            'place': PlaceSerializer(place).data if place is not None else None,
+            'latitude': latitude,
+            'longitude': longitude,
+        }
+        return Response(data, status=status.HTTP_200_OK)
+
+
 class SaveWorkshopView(APIView):
     """
     This view is for saving a workshop to the user's saved workshops list, as well
@@ -331,22 +568,18 @@ class SaveWorkshopView(APIView):
     def post(self, request):
         try:
             id = request.data.get('workshop_id')
-            workshop = Workshop.objects.get(pk=id)
-            user = request.user
+            if not Workshop.objects.filter(pk=id).exists():
+                raise Workshop.DoesNotExist
+            # The user profile shares its primary key with the user
+            profile_id = request.user.pk
             if request.data.get("save") == False:
-                if workshop in user.userprofile.saved_workshops.all():
-                    user.userprofile.saved_workshops.remove(workshop)
-                    workshop.saves -= 1
-                    workshop.save()
+                if unsave_workshop(profile_id, id):
                     return Response({"message": "Workshop removed from saved workshops"})
                 else:
                     return Response({"message": "Workshop not in saved workshops"}, status=status.HTTP_400_BAD_REQUEST)
             else:
-                if workshop in user.userprofile.saved_workshops.all():
+                if not save_workshop(profile_id, id):
                     return Response({"message": "Workshop already in saved workshops"}, status=status.HTTP_400_BAD_REQUEST)
-                user.userprofile.saved_workshops.add(workshop)
-                workshop.saves += 1
-                workshop.save()
                 return Response({"message": "Workshop saved successfully"}, status=status.HTTP_200_OK)
         except Workshop.DoesNotExist:
             return Response({"message": "Workshop with the specified id does not exist"}, status=status.HTTP_404_NOT_FOUND)
@@ -354,31 +587,138 @@ class SaveWorkshopView(APIView):
             return Response({"message": "Error saving workshop: {}".format(str(e))}, status=status.HTTP_400_BAD_REQUEST)
 
 
+class SaveBatchView(APIView):
+    """
+    This view is for saving and unsaving many jobs, work experiences and
+    workshops at once, e.g. when syncing the saved lists of an offline client.
+    Takes a list of `items`, each with the `type` of the item ("job",
+    "work_experience" or "workshop"), its `id`, and `save` (defaults to true,
+    false to unsave). All changes are applied in a single transaction.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        if not isinstance(request.data, dict):
+            return Response({"message": "Expected an object with a list of items"},
+                            status=status.HTTP_400_BAD_REQUEST)
+        serializer = SavedItemSerializer(data=request.data.get('items'), many=True)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            # The user profile shares its primary key with the user
+            profile = UserProfile.objects.get(pk=request.user.pk)
+        except UserProfile.DoesNotExist:
+            return Response({"message": "User does not exist"}, status=status.HTTP_404_NOT_FOUND)
+        result = apply_saved_items(profile, serializer.validated_data)
+        return Response(result, status=status.HTTP_200_OK)
+
+
 """ NEWCOMERS (FIX LATER)
 """
 
-class RetrieveSavedJobsView(generics.ListAPIView):
+class RetrieveSavedJobsView(ReplicaReadMixin, PrefetchPlanMixin, generics.ListAPIView):
     """
     This view is for retrieving the user's saved jobs.
+    Cursor pagination is applied when the `cursor` or `page_size` query
+    parameter is provided.
     """
 
     permission_classes = [IsAuthenticated]
-    serializer_class = JobListSerializer
+    serializer_class = JobCardSerializer
+    pagination_class = KeysetPagination
 
     def get_queryset(self):
         username = self.kwargs['username']  # Extract username from URL
-        user = User.objects.get(username=username)
-        return user.userprofile.saved_jobs.all()
+        saved_jobs = UserProfile.saved_jobs.through.objects.filter(userprofile__user__username=username)
+        return JobCard.objects.filter(id__in=saved_jobs.values('job_id'))
 
-class RetrievedSavedWorkshopsView(generics.ListAPIView):
+class RecommendedJobsView(ReplicaReadMixin, APIView):
+    """
+    This view is for the active jobs recommended to the user from the jobs
+    they saved, the best first, each with its `score`. The jobs are those
+    most often saved together with the user's saved jobs, as precomputed by
+    `manage.py build_job_neighbors`. Up to `limit` jobs (20 by default) are
+    returned.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, username):
+        query = RecommendedJobsQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        return Response(recommended_jobs(username, query.validated_data['limit']), status=status.HTTP_200_OK)
+
+class RetrieveSavedExperiencesView(ReplicaReadMixin, PrefetchPlanMixin, generics.ListAPIView):
+    """
+    This view is for retrieving the user's saved work experiences.
+    Cursor pagination is applied when the `cursor` or `page_size` query
+    parameter is provided.
+    """
+
+    permission_classes = [IsAuthenticated]
+    serializer_class = WorkExperienceSerializer
+    pagination_class = KeysetPagination
+
+    def get_queryset(self):
+        username = self.kwargs['username']  # Extract username from URL
+        return WorkExperience.objects.filter(userprofile__user__username=username)
+
+class RetrievedSavedWorkshopsView(ReplicaReadMixin, PrefetchPlanMixin, generics.ListAPIView):
     """
     This view is for retrieving the user's saved workshops.
+    Cursor pagination is applied when the `cursor` or `page_size` query
+    parameter is provided.
     """
 
     permission_classes = [IsAuthenticated]
     serializer_class = WorkshopSerializer
+    pagination_class = KeysetPagination
 
     def get_queryset(self):
         username = self.kwargs['username']  # Extract username from URL
-        user = User.objects.get(username=username)
-        return user.userprofile.saved_workshops.all()
+        return Workshop.objects.filter(userprofile__user__username=username)
+
+class SavedWorkshopsCalendarView(ReplicaReadMixin, APIView):
+    """
+    This view is for the user's saved workshops as an iCalendar feed, to
+    subscribe to from a calendar application. As those cannot send the JWT,
+    the feed is opened by the secret token in its URL instead, see
+    CalendarTokenView. The feed is cached until the user's saved workshops,
+    or any of them, change.
+    """
+
+    authentication_classes = []
+    permission_classes = [AllowAny]
+
+    def get(self, request, token):
+        profile_id = calendar_profile_id(token)
+        if profile_id is None:
+            return Response({"message": "Calendar does not exist"}, status=status.HTTP_404_NOT_FOUND)
+        return HttpResponse(saved_workshops_calendar(profile_id), content_type='text/calendar; charset=utf-8')
+
+
+class CalendarTokenView(APIView):
+    """
+    This view is for the user's own saved workshops calendar token.
+    POST generates a new token, revoking the previous one, and returns the
+    URL of the feed, which is only shown then. DELETE revokes the token.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, username):
+        if request.user.username != username:
+            return Response({"message": "Cannot manage the calendar of another user"}, status=status.HTTP_403_FORBIDDEN)
+        # The profile shares the id of its user
+        token = regenerate_calendar_token(request.user.pk)
+        if token is None:
+            return Response({"message": "User does not exist"}, status=status.HTTP_404_NOT_FOUND)
+        url = request.build_absolute_uri(reverse('saved-workshops-calendar', args=[token]))
+        return Response({"url": url}, status=status.HTTP_201_CREATED)
+
+    def delete(self, request, username):
+        if request.user.username != username:
+            return Response({"message": "Cannot manage the calendar of another user"}, status=status.HTTP_403_FORBIDDEN)
+        revoke_calendar_token(request.user.pk)
+        return Response(status=status.HTTP_204_NO_CONTENT)
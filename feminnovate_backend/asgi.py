@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'feminnovate_backend.settings')
+# Serves the async views, e.g. for logins to hash passwords off the event loop
+os.environ.setdefault('ASYNC_VIEWS', 'true')
 
 application = get_asgi_application()
@@ -16,6 +16,7 @@ from datetime import timedelta
 import dj_database_url
 import environ
 import os
+import tempfile
 
 env = environ.Env()
 environ.Env.read_env()
@@ -59,7 +60,9 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',
+    'api.middleware.AsyncWhiteNoiseMiddleware',
+    'api.middleware.RequestMetricsMiddleware',
+    'api.middleware.DatabaseRoutingMiddleware',
 ]
 
 ROOT_URLCONF = 'feminnovate_backend.urls'
@@ -84,7 +87,7 @@ WSGI_APPLICATION = 'feminnovate_backend.wsgi.application'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.authentication.CachedJWTAuthentication',
     ],
 }
 
@@ -94,8 +97,18 @@ CORS_ALLOW_ALL_ORIGINS = True
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
 
 
+# Connections are kept open for DATABASE_CONN_MAX_AGE seconds and checked
+# before being reused. Under ASGI each request runs its queries in a thread of
+# its own, whose connection cannot be reused, hence no persistent connections
+# by default there (use a connection pooler such as PgBouncer instead).
+DATABASE_CONN_MAX_AGE = env.int(
+    'DATABASE_CONN_MAX_AGE', default=0 if env.bool('ASYNC_VIEWS', default=False) else 600
+)
+
 if not DEBUG:
-    DATABASES = {'default': dj_database_url.parse(env('DATABASE_URL'))}
+    DATABASES = {'default': dj_database_url.parse(
+        env('DATABASE_URL'), conn_max_age=DATABASE_CONN_MAX_AGE, conn_health_checks=True,
+    )}
 else:
     DATABASES = {
         'default': {
@@ -105,9 +118,52 @@ else:
             'PASSWORD': env("DB_PASSWORD"),
             'HOST': env("DB_HOST"),
             'PORT': env("DB_PORT"),
+            'CONN_MAX_AGE': DATABASE_CONN_MAX_AGE,
+            'CONN_HEALTH_CHECKS': True,
         }
     }
 
+# Optional read replicas of the primary database, as a comma-separated list
+# of URLs, e.g. DATABASE_REPLICA_URLS=postgres://replica1/db,postgres://replica2/db.
+# The read-only views read from a random replica (see api.utils.replicas).
+# Users who wrote are pinned to the primary for REPLICA_PIN_SECONDS, which
+# should cover the replication lag; the pins are kept in the default cache,
+# which has to be shared by the workers (see CACHE_URL). In tests, the
+# replicas mirror the test database.
+DATABASE_REPLICAS = []
+for index, url in enumerate(env.list('DATABASE_REPLICA_URLS', default=[])):
+    alias = 'replica_{}'.format(index)
+    DATABASES[alias] = dj_database_url.parse(
+        url, conn_max_age=DATABASE_CONN_MAX_AGE, conn_health_checks=True, test_options={'MIRROR': 'default'},
+    )
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ['api.utils.replicas.ReplicaRouter']
+REPLICA_PIN_SECONDS = env.int('REPLICA_PIN_SECONDS', default=10)
+
+
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+# Defaults to the local-memory cache. A file or database cache can be used to
+# share the cache between workers, e.g. CACHE_URL=filecache:///var/tmp/feminnovate
+# or CACHE_URL=dbcache://api_cache (after running `manage.py createcachetable`)
+
+CACHES = {'default': env.cache('CACHE_URL', default='locmemcache://')}
+
+# Cache used for API responses, and how long they are kept (in seconds)
+API_CACHE_ALIAS = 'default'
+API_CACHE_TIMEOUT = env.int('API_CACHE_TIMEOUT', default=600)
+
+
+# Request metrics
+# Each worker writes its aggregated request metrics to its own file in
+# METRICS_DIR, at most every METRICS_FLUSH_INTERVAL seconds. The directory
+# must be shared by the workers, and is read by the /api/metrics/ endpoint,
+# which folds the files of the exited workers of its host into retired.json.
+
+METRICS_DIR = env('METRICS_DIR', default=os.path.join(tempfile.gettempdir(), 'feminnovate-metrics'))
+METRICS_FLUSH_INTERVAL = env.float('METRICS_FLUSH_INTERVAL', default=10)
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -171,3 +227,20 @@ SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(days=30),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=30)
 }
+
+# Authenticated users are cached by each worker for AUTH_USER_CACHE_TTL
+# seconds, which is how long another worker may take to see a change to a
+# user (e.g. a deactivation), for at most AUTH_USER_CACHE_SIZE users
+AUTH_USER_CACHE_TTL = env.int('AUTH_USER_CACHE_TTL', default=60)
+AUTH_USER_CACHE_SIZE = env.int('AUTH_USER_CACHE_SIZE', default=10000)
+
+# Serves the async versions of the views of api.async_views, set when served
+# over ASGI (see asgi.py). Their passwords are hashed by a pool of
+# PASSWORD_HASHING_WORKERS threads per worker process
+ASYNC_VIEWS = env.bool('ASYNC_VIEWS', default=False)
+PASSWORD_HASHING_WORKERS = env.int('PASSWORD_HASHING_WORKERS', default=min(os.cpu_count() or 1, 4))
+
+# Each save of a workshop counts half as much in its trending score every
+# TRENDING_HALF_LIFE_DAYS days (see api.logic.trending_workshops). The scores
+# have to be rebuilt with `manage.py rebuild_trending_workshops` after a change
+TRENDING_HALF_LIFE_DAYS = env.float('TRENDING_HALF_LIFE_DAYS', default=7)